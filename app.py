@@ -1,8 +1,15 @@
 import streamlit as st
-import requests
+import atlassian_client as client
 import json
-import pandas as pd
 import time
+import pandas as pd
+import exports
+import openapi_cache
+from endpoint_search import endpoint_label
+from crawl_engine import DEFAULT_MAX_WORKERS, fan_out
+from pagination import iter_pages
+from response_cache import DEFAULT_TTL, ResponseCache, cache_key
+from request_metrics import get_metrics
 
 # --- Logo ---
 st.image("https://a9group.net/a9logo.png", width=96)
@@ -18,45 +25,70 @@ st.info("""
 • The app remembers your responses for dynamic dropdowns (like `directoryId`, `userId`, etc.).  
 """)
 
-def paginate(url, headers, params, debug):
+def paginate(url, headers, params, debug, first_response=None, max_pages=0, max_items=0):
+    """Follow ``links.next``, showing rows as pages arrive; 0 means no page / item cap."""
+    def on_error(page_url, resp):
+        if debug:
+            st.error(f"Request failed: {resp.status_code} {resp.text}")
+
+    progress = st.empty()
+    preview = st.empty()
     all_results = []
-    while url:
-        resp = requests.get(url, headers=headers, params=params)
-        if resp.status_code != 200:
-            if debug:
-                st.error(f"Request failed: {resp.status_code} {resp.text}")
+    last_drawn = 0.0
+    pages = iter_pages(url, headers, params, on_error=on_error, first_response=first_response)
+    for page_no, page in enumerate(pages, 1):
+        all_results.extend(page.items)
+        if max_items:
+            del all_results[max_items:]
+        capped = (max_pages and page_no >= max_pages) or (max_items and len(all_results) >= max_items)
+        if page.next_url and capped:
+            st.info(f"Stopped after {page_no} pages / {len(all_results)} items (pagination cap); more results are available.")
             break
-        resp_json = resp.json()
-        data = resp_json.get("data", [])
-        if isinstance(data, list):
-            all_results.extend(data)
-        if debug:
-            st.write(f"Pagination URL: {resp.url}")
-            st.json(resp_json)
-        next_link = resp_json.get("links", {}).get("next")
-        if next_link:
-            if next_link.startswith("http"):
-                url = next_link
-                params = None
-            else:
-                base = url.split("?")[0]
-                if next_link.startswith("?"):
-                    url = base + next_link
-                else:
-                    url = f"{base}?cursor={next_link}"
-            time.sleep(delay)
-        else:
-            url = None
+        progress.caption(f"Fetched {len(all_results)} items from {page_no} pages...")
+        # Redraw the preview at most twice a second so large listings don't spend their time rendering
+        if page.next_url and time.monotonic() - last_drawn > 0.5:
+            preview.dataframe(pd.DataFrame(all_results))
+            last_drawn = time.monotonic()
+    progress.empty()
+    preview.empty()
     return {"data": all_results}
 
 st.sidebar.header("API Setup")
 api_key = st.sidebar.text_input("API Key (Bearer Token)", type="password")
 org_id = st.sidebar.text_input("Organization ID")
 paginate_results = st.sidebar.checkbox("Paginate results", value=True)
-delay = st.sidebar.number_input(
-    "Delay between requests (seconds)", min_value=0.0, max_value=5.0, value=0.5, step=0.5
+max_pages = st.sidebar.number_input("Max pages (0 = all)", min_value=0, value=0, step=10, disabled=not paginate_results)
+max_items = st.sidebar.number_input("Max items (0 = all)", min_value=0, value=0, step=1000, disabled=not paginate_results)
+rate_limit = st.sidebar.number_input(
+    "Max requests per second", min_value=0.5, max_value=100.0, value=10.0, step=0.5
 )
+client.configure(rate_limit=rate_limit)
+export_format = st.sidebar.selectbox("Export format", exports.available_formats())
 debug = st.sidebar.checkbox("Show Debug Output", value=False)
+limiter_stats = client.get_rate_limiter().snapshot()
+st.sidebar.caption(
+    f"Rate limiter: {limiter_stats['rate']}/s, {limiter_stats['throttled']} throttled, "
+    f"{limiter_stats['retries']} retries, {limiter_stats['wait_seconds']:.1f}s waiting"
+)
+
+@st.cache_resource
+def get_response_cache():
+    # One cache per server process; keys include a hash of the token, so sessions never share entries
+    return ResponseCache()
+
+response_cache = get_response_cache()
+use_cache = st.sidebar.checkbox("Cache GET responses", value=False,
+                                help="Answer repeated GETs (same URL, params, token and pagination caps) from memory.")
+if use_cache:
+    response_cache.ttl = st.sidebar.number_input("Cache TTL (seconds)", min_value=1, value=DEFAULT_TTL, step=60)
+    bypass_cache = st.sidebar.checkbox("Bypass cache (refresh)", value=False)
+    cache_stats = response_cache.snapshot()
+    st.sidebar.caption(
+        f"Response cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+        f"{cache_stats['entries']}/{response_cache.max_entries} entries"
+    )
+    if st.sidebar.button("Clear cache"):
+        response_cache.clear()
 
 # --- Auto-discover directories and groups for quick reference ---
 headers = {
@@ -66,7 +98,7 @@ headers = {
 
 if api_key and org_id and "directoryId_dict" not in st.session_state:
     dir_url = f"https://api.atlassian.com/admin/v2/orgs/{org_id}/directories"
-    resp = requests.get(dir_url, headers=headers)
+    resp = client.get(dir_url, headers=headers)
     if resp.status_code == 200:
         directories = resp.json().get("data", [])
         mapping = {d.get("directoryId"): d.get("name", d.get("directoryId")) for d in directories}
@@ -77,7 +109,7 @@ if api_key and org_id and "directoryId_dict" not in st.session_state:
 selected_dir = st.session_state.get("param_directoryId")
 if api_key and org_id and selected_dir and "groupId_dict" not in st.session_state:
     grp_url = f"https://api.atlassian.com/admin/v2/orgs/{org_id}/directories/{selected_dir}/groups"
-    resp = requests.get(grp_url, headers=headers)
+    resp = client.get(grp_url, headers=headers)
     if resp.status_code == 200:
         groups = resp.json().get("data", [])
         mapping = {g.get("id"): g.get("name", g.get("id")) for g in groups}
@@ -97,45 +129,33 @@ if grp_dict:
     st.write(f"**Groups for Directory {selected_dir}**")
     st.dataframe(pd.DataFrame(list(grp_dict.items()), columns=["ID", "Name"]))
 
-@st.cache_data
-def load_openapi_specs():
-    urls = [
-        "https://dac-static.atlassian.com/cloud/admin/organization/swagger.v3.json",
-        "https://dac-static.atlassian.com/cloud/jira/platform/swagger-v3.v3.json",
-    ]
-    specs = []
-    for url in urls:
-        try:
-            resp = requests.get(url)
-            if resp.status_code == 200:
-                specs.append(resp.json())
-        except Exception as e:
-            st.warning(f"Failed to load {url}: {e}")
-    return specs
-
-specs = load_openapi_specs()
-
-tags = {}
-for spec in specs:
-    server_url = spec.get("servers", [{}])[0].get("url", "https://api.atlassian.com")
-    paths = spec.get("paths", {})
-    for path, methods in paths.items():
-        for method, details in methods.items():
-            for tag in details.get("tags", []):
-                if tag not in tags:
-                    tags[tag] = []
-                tags[tag].append({
-                    "path": path,
-                    "method": method.upper(),
-                    "details": details,
-                    "server_url": server_url,
-                })
-
-tag = st.sidebar.selectbox("Select API Tag", list(tags.keys()))
-endpoints = tags[tag]
-endpoint_options = [f"{ep['method']} {ep['path']}" for ep in endpoints]
-selected_endpoint = st.sidebar.selectbox("Select Endpoint", endpoint_options)
-selected = next(ep for ep in endpoints if f"{ep['method']} {ep['path']}" == selected_endpoint)
+@st.cache_resource(ttl=openapi_cache.CACHE_TTL)
+def load_endpoint_index():
+    # Specs and the parsed index live in .openapi_cache/; this keeps them in memory across reruns
+    return openapi_cache.load_endpoint_index()
+
+tags, endpoint_search, spec_warnings = load_endpoint_index()
+for warning in spec_warnings:
+    st.warning(warning)
+if not tags:
+    st.error("No API specs available. Check your connection and reload.")
+    st.stop()
+
+search_query = st.sidebar.text_input("🔎 Search endpoints", "",
+                                     help="Method, path, operationId, summary or parameter names; prefixes and typos are fine.")
+if search_query:
+    endpoints = endpoint_search.search(search_query)
+    if not endpoints:
+        st.sidebar.warning(f"No endpoints match '{search_query}'.")
+        st.stop()
+    st.sidebar.caption(f"{len(endpoints)} best matches of {len(endpoint_search)} operations")
+else:
+    tag = st.sidebar.selectbox("Select API Tag", list(tags.keys()))
+    endpoints = tags[tag]
+selected_idx = st.sidebar.selectbox("Select Endpoint", range(len(endpoints)),
+                                    format_func=lambda i: endpoint_label(endpoints[i]))
+selected = endpoints[selected_idx]
+selected_endpoint = endpoint_label(selected)
 
 st.subheader(f"{selected_endpoint}")
 st.write(selected["details"].get("summary", "No summary available."))
@@ -166,8 +186,8 @@ if "parameters" in selected["details"]:
                     st.session_state.get(param_key, ""),
                     key=param_key,
                 )
+            # The widget key keeps the value in st.session_state[param_key]
             path_params[pname] = value
-            st.session_state[param_key] = value
         elif ptype == "query":
             value = st.text_input(f"Query param: {pname} ({pdesc})", "")
             if value:
@@ -199,13 +219,23 @@ def send_request(method, url, api_key, body=None, params=None):
         "Content-Type": "application/json"
     }
     if method == "GET":
-        resp = requests.get(url, headers=headers, params=params)
-        data = resp.json()
+        key = cache_key(method, url, params, api_key, paginate=paginate_results, max_pages=max_pages, max_items=max_items)
+        if use_cache and not bypass_cache:
+            cached = response_cache.get(key)
+            if cached is not None:
+                st.caption("⚡ Served from the response cache")
+                return cached
+        resp = client.get(url, headers=headers, params=params)
         if paginate_results and resp.status_code == 200:
-            data = paginate(url, headers, params, debug)
-        return resp, data
+            # The response already in hand is page one
+            result = resp, paginate(url, headers, params, debug, first_response=resp, max_pages=max_pages, max_items=max_items)
+        else:
+            result = resp, resp.json()
+        if use_cache and resp.status_code == 200:
+            response_cache.put(key, result)
+        return result
     else:
-        resp = requests.request(method, url, headers=headers, json=body, params=params)
+        resp = client.request(method, url, headers=headers, json=body, params=params)
         return resp, resp.json() if resp.headers.get("Content-Type", "").startswith("application/json") else None
 
 if st.button("Send Request"):
@@ -244,13 +274,12 @@ if st.button("Send Request"):
             st.subheader("Tabular View")
             st.dataframe(df)
 
-            # --- Download CSV ---
-            csv = df.to_csv(index=False).encode('utf-8')
+            # --- Download (written in chunks when clicked) ---
             st.download_button(
-                label="Download data as CSV",
-                data=csv,
-                file_name='api_data.csv',
-                mime='text/csv',
+                label=f"Download data as {export_format}",
+                data=exports.file_reader(df, "api_data", export_format),
+                file_name=f"api_data.{export_format}",
+                mime=exports.mime_type(export_format),
             )
         else:
             st.info("No tabular data to display.")
@@ -258,6 +287,83 @@ if st.button("Send Request"):
         st.text(resp.text)
         st.error(f"Error parsing JSON: {e}")
 
+# --- Batch mode: run the endpoint once per known path-parameter value ---
+batch_params = [p for p in path_params if st.session_state.get(f"{p}_dict")]
+if selected["method"] == "GET" and batch_params:
+    with st.expander("🧺 Batch mode: run for every known value"):
+        batch_param = st.selectbox("Vary path parameter", batch_params)
+        batch_dict = st.session_state[f"{batch_param}_dict"]
+        batch_filter = st.text_input("Filter values (id or name contains)", "")
+        batch_values = [
+            k for k, name in batch_dict.items()
+            if batch_filter.lower() in k.lower() or batch_filter.lower() in str(name).lower()
+        ]
+        batch_workers = st.number_input("Parallel requests", min_value=1, max_value=32, value=DEFAULT_MAX_WORKERS, step=1)
+        st.caption(f"{len(batch_values)} of {len(batch_dict)} `{batch_param}` values selected")
+
+        if st.button(f"Run batch ({len(batch_values)} requests)", disabled=not batch_values):
+            batch_headers = {"Authorization": f"Bearer {api_key}", "Accept": "application/json"}
+            template = editable_url
+            for param, value in path_params.items():
+                if param != batch_param:
+                    template = template.replace(f"{{{param}}}", value)
+
+            def fetch_one(value):
+                url = template.replace(f"{{{batch_param}}}", value)
+                failed = []
+                items = []
+                try:
+                    for page in iter_pages(url, batch_headers, query_params,
+                                           on_error=lambda page_url, resp: failed.append(f"HTTP {resp.status_code}")):
+                        # Single-object endpoints have no data list; keep the object as one row
+                        items.extend(page.items if "data" in page.body else [page.body])
+                        if not paginate_results or (max_items and len(items) >= max_items):
+                            break
+                except Exception as e:
+                    failed.append(str(e))
+                return items, failed[0] if failed else None
+
+            rows, errors = [], []
+            progress = st.progress(0.0)
+            for done, (value, (items, error)) in enumerate(fan_out(fetch_one, batch_values, batch_workers), 1):
+                if error:
+                    errors.append({batch_param: value, "name": batch_dict[value], "error": error})
+                for item in items:
+                    rows.append({batch_param: value, f"{batch_param}Name": batch_dict[value],
+                                 **(item if isinstance(item, dict) else {"value": item})})
+                progress.progress(done / len(batch_values), text=f"{done}/{len(batch_values)} requests")
+
+            st.write(f"**{len(rows)} rows** from {len(batch_values)} requests, {len(errors)} failed")
+            if errors:
+                st.dataframe(pd.DataFrame(errors))
+            if rows:
+                batch_df = pd.DataFrame(rows)
+                st.dataframe(batch_df)
+                st.download_button(f"Download batch as {export_format}",
+                                   data=exports.file_reader(batch_df, f"batch_{batch_param}", export_format),
+                                   file_name=f"batch_{batch_param}.{export_format}", mime=exports.mime_type(export_format))
+
+# --- Request metrics (every request this server process has made; debug adds the recent-request log) ---
+request_metrics = get_metrics()
+with st.expander("📈 Request metrics"):
+    totals = request_metrics.totals()
+    st.caption(
+        f"{totals['requests']} requests, {totals['bytes'] / 1e6:.2f} MB, {totals['throttled']} throttled (429), "
+        f"{totals['retries']} retries, {totals['sleep_seconds']:.1f}s sleeping"
+    )
+    summary = request_metrics.summary()
+    if summary:
+        st.dataframe(pd.DataFrame(summary))
+    if debug:
+        st.write(f"Last {request_metrics.recent_size} requests")
+        st.dataframe(pd.DataFrame(request_metrics.recent_requests()))
+    st.download_button("Download metrics JSON", data=json.dumps(request_metrics.to_json(), indent=2),
+                       file_name="request_metrics.json", mime="application/json")
+    st.download_button("Download Prometheus metrics", data=request_metrics.to_prometheus(),
+                       file_name="request_metrics.prom", mime="text/plain")
+    if st.button("Reset metrics"):
+        request_metrics.reset()
+
 st.markdown("---")
 st.caption("Final release: fully dynamic, builds dictionaries for known path params, and CSV export ready!")
 
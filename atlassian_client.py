@@ -0,0 +1,163 @@
+"""Shared HTTP client for the Atlassian Admin and Jira REST APIs.
+
+Every request made by the crawler and the playground goes through one pooled
+``requests.Session`` so TLS connections to api.atlassian.com are kept alive
+and reused across pages, groups and Streamlit reruns.
+"""
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from rate_limiter import AdaptiveRateLimiter, parse_retry_after
+from request_metrics import get_metrics
+
+DEFAULT_POOL_SIZE = int(os.environ.get("ATLASSIAN_POOL_SIZE", "10"))
+# (connect, read) timeouts in seconds
+DEFAULT_TIMEOUT = (5, 30)
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_HEADERS = {
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive",
+}
+
+_session = None
+_pool_size = DEFAULT_POOL_SIZE
+_timeout = DEFAULT_TIMEOUT
+_max_per_host = None
+_host_slots = {}
+_rate_limiter = None
+_max_retries = DEFAULT_MAX_RETRIES
+_lock = threading.Lock()
+
+
+def build_session(pool_size=DEFAULT_POOL_SIZE):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(DEFAULT_HEADERS)
+    return session
+
+
+def configure(pool_size=None, timeout=None, max_per_host=None, rate_limit=None, max_retries=None):
+    """Change pool size, default timeout, per-host in-flight limit or rate ceiling.
+
+    The session is rebuilt lazily when the pool size changes. ``max_per_host=0``
+    removes the per-host limit. ``rate_limit`` (requests/second) creates the
+    shared rate limiter on first use and only moves its ceiling afterwards, so
+    its adapted rate and metrics survive Streamlit reruns.
+    """
+    global _session, _pool_size, _timeout, _max_per_host, _rate_limiter, _max_retries
+    with _lock:
+        if pool_size is not None and pool_size != _pool_size:
+            _pool_size = pool_size
+            if _session is not None:
+                _session.close()
+                _session = None
+        if timeout is not None:
+            _timeout = timeout
+        if max_per_host is not None and (max_per_host or None) != _max_per_host:
+            _max_per_host = max_per_host or None
+            _host_slots.clear()
+        if max_retries is not None:
+            _max_retries = max_retries
+        if rate_limit is not None:
+            if _rate_limiter is None:
+                _rate_limiter = AdaptiveRateLimiter(rate=rate_limit)
+            elif rate_limit != _rate_limiter.max_rate:
+                _rate_limiter.set_ceiling(rate_limit)
+
+
+def get_rate_limiter():
+    return _rate_limiter
+
+
+def get_session():
+    global _session
+    with _lock:
+        if _session is None:
+            _session = build_session(_pool_size)
+        return _session
+
+
+def close():
+    global _session
+    with _lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def _host_slot(url):
+    if _max_per_host is None:
+        return None
+    host = urlsplit(url).netloc
+    with _lock:
+        slot = _host_slots.get(host)
+        if slot is None:
+            slot = _host_slots[host] = threading.BoundedSemaphore(_max_per_host)
+        return slot
+
+
+def _send(session, method, url, timeout, **kwargs):
+    slot = _host_slot(url)
+    if slot is None:
+        return session.request(method, url, timeout=timeout or _timeout, **kwargs)
+    with slot:
+        return session.request(method, url, timeout=timeout or _timeout, **kwargs)
+
+
+def request(method, url, timeout=None, **kwargs):
+    """Send a request, pacing it through the shared rate limiter.
+
+    429 responses are retried up to ``max_retries`` times after the
+    ``Retry-After`` delay; the last response is returned either way. Every
+    attempt is recorded in ``request_metrics``.
+    """
+    session = get_session()
+    limiter = _rate_limiter
+    metrics = get_metrics()
+    attempt = 0
+    while True:
+        if limiter is not None:
+            metrics.record_sleep(limiter.acquire())
+        started = time.perf_counter()
+        try:
+            resp = _send(session, method, url, timeout, **kwargs)
+        except requests.RequestException:
+            metrics.record_request(method, url, None, time.perf_counter() - started)
+            raise
+        metrics.record_request(method, url, resp.status_code, time.perf_counter() - started, len(resp.content))
+        if limiter is not None:
+            limiter.observe(resp)
+        if resp.status_code != 429 or attempt >= _max_retries:
+            return resp
+        attempt += 1
+        metrics.record_retry()
+        if limiter is not None:
+            # acquire() blocks until the Retry-After window has passed
+            limiter.record_retry()
+        else:
+            delay = parse_retry_after(resp.headers.get("Retry-After")) or min(60, 2 ** attempt)
+            metrics.record_sleep(delay)
+            time.sleep(delay)
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def resolve_next(url, next_link):
+    """Absolute URL for a ``links.next`` value (full URL, query string or bare cursor)."""
+    if not next_link:
+        return None
+    if next_link.startswith("http"):
+        return next_link
+    base = url.split("?")[0]
+    if next_link.startswith("?"):
+        return base + next_link
+    return f"{base}?cursor={next_link}"
@@ -0,0 +1,186 @@
+"""Local SQLite index of the crawled hierarchy for audit queries.
+
+The crawler can write its ``HierarchyModel`` into ``hierarchy_index.sqlite``
+(normalized tables with indexes on user id, group, role key and email). The
+file persists across sessions, so questions like "who holds org-admin" or
+"which groups is this user in" are answered without re-crawling or loading
+the snapshot into memory.
+"""
+import os
+import sqlite3
+
+DB_PATH = "hierarchy_index.sqlite"
+
+SCHEMA = """
+CREATE TABLE directories (id TEXT PRIMARY KEY, name TEXT);
+CREATE TABLE groups (directory_id TEXT, id TEXT, name TEXT, PRIMARY KEY (directory_id, id));
+CREATE TABLE users (id TEXT PRIMARY KEY, name TEXT, email TEXT);
+CREATE TABLE memberships (directory_id TEXT, group_id TEXT, user_id TEXT);
+CREATE TABLE group_roles (directory_id TEXT, group_id TEXT, role_key TEXT);
+CREATE TABLE platform_roles (user_id TEXT, role_key TEXT);
+CREATE INDEX idx_users_email ON users (email COLLATE NOCASE);
+CREATE INDEX idx_groups_name ON groups (name);
+CREATE INDEX idx_memberships_user ON memberships (user_id);
+CREATE INDEX idx_memberships_group ON memberships (directory_id, group_id);
+CREATE INDEX idx_group_roles_role ON group_roles (role_key);
+CREATE INDEX idx_group_roles_group ON group_roles (directory_id, group_id);
+CREATE INDEX idx_platform_roles_role ON platform_roles (role_key);
+CREATE INDEX idx_platform_roles_user ON platform_roles (user_id);
+"""
+
+QUERIES = {
+    "Who holds role": "holders_of_role",
+    "Groups granting role": "groups_granting",
+    "Groups of user (id or email)": "groups_of_user",
+    "Roles of user (id or email)": "roles_of_user",
+    "Members of group (id or name)": "members_of_group",
+}
+
+
+def write_model(model, path=DB_PATH):
+    """Replace the index with the contents of a ``HierarchyModel``."""
+    tmp_path = f"{path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.executescript("PRAGMA journal_mode = OFF; PRAGMA synchronous = OFF;")
+        # Tables first, indexes after the bulk insert
+        tables, indexes = SCHEMA.split("CREATE INDEX", 1)
+        conn.executescript(tables)
+        dirs = model.directories.rows
+        role_keys = model.roles.rows
+        conn.executemany("INSERT INTO directories VALUES (?, ?)", dirs)
+        conn.executemany(
+            "INSERT OR IGNORE INTO groups VALUES (?, ?, ?)",
+            ((dirs[d][0], gid, name) for d, gid, name, _ in model.groups.rows),
+        )
+        conn.executemany(
+            "INSERT INTO group_roles VALUES (?, ?, ?)",
+            ((dirs[d][0], gid, role_keys[r]) for d, gid, _, roles in model.groups.rows for r in roles),
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO users VALUES (?, ?, ?)",
+            ((uid, name, email) for uid, name, email, _ in model.users.rows),
+        )
+        conn.executemany(
+            "INSERT INTO platform_roles VALUES (?, ?)",
+            sorted({(uid, role_keys[r]) for uid, _, _, roles in model.users.rows for r in roles}),
+        )
+        groups = [(dirs[d][0], gid) for d, gid, _, _ in model.groups.rows]
+        users = [uid for uid, _, _, _ in model.users.rows]
+        conn.executemany(
+            "INSERT INTO memberships VALUES (?, ?, ?)",
+            ((*groups[g], users[u]) for g, u in zip(model.member_group, model.member_user)),
+        )
+        conn.executescript("CREATE INDEX" + indexes + "ANALYZE;")
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, path)
+
+
+class AuditIndex:
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+
+    def close(self):
+        self.conn.close()
+
+    def _rows(self, sql, params):
+        cursor = self.conn.execute(sql, params)
+        columns = [c[0] for c in cursor.description]
+        return columns, cursor.fetchall()
+
+    def _user_ids(self, user):
+        return "SELECT id FROM users WHERE id = ? OR email = ? COLLATE NOCASE", (user, user)
+
+    def holders_of_role(self, role_key):
+        return self._rows(
+            """
+            SELECT u.id AS userId, u.email AS userEmail, d.name AS directoryName, g.name AS groupName, ? AS roleKey
+            FROM group_roles gr
+            JOIN memberships m ON m.directory_id = gr.directory_id AND m.group_id = gr.group_id
+            JOIN users u ON u.id = m.user_id
+            JOIN groups g ON g.directory_id = gr.directory_id AND g.id = gr.group_id
+            JOIN directories d ON d.id = gr.directory_id
+            WHERE gr.role_key = ?
+            UNION ALL
+            SELECT u.id, u.email, NULL, 'Organization-wide', pr.role_key
+            FROM platform_roles pr JOIN users u ON u.id = pr.user_id
+            WHERE pr.role_key = ?
+            """,
+            (role_key, role_key, role_key),
+        )
+
+    def groups_granting(self, role_key):
+        return self._rows(
+            """
+            SELECT d.name AS directoryName, g.id AS groupId, g.name AS groupName,
+                   (SELECT COUNT(*) FROM memberships m
+                    WHERE m.directory_id = g.directory_id AND m.group_id = g.id) AS members
+            FROM group_roles gr
+            JOIN groups g ON g.directory_id = gr.directory_id AND g.id = gr.group_id
+            JOIN directories d ON d.id = g.directory_id
+            WHERE gr.role_key = ?
+            """,
+            (role_key,),
+        )
+
+    def groups_of_user(self, user):
+        sql, params = self._user_ids(user)
+        return self._rows(
+            f"""
+            SELECT m.user_id AS userId, d.name AS directoryName, g.id AS groupId, g.name AS groupName
+            FROM memberships m
+            JOIN groups g ON g.directory_id = m.directory_id AND g.id = m.group_id
+            JOIN directories d ON d.id = m.directory_id
+            WHERE m.user_id IN ({sql})
+            """,
+            params,
+        )
+
+    def roles_of_user(self, user):
+        sql, params = self._user_ids(user)
+        return self._rows(
+            f"""
+            SELECT m.user_id AS userId, gr.role_key AS roleKey, g.name AS grantedBy
+            FROM memberships m
+            JOIN group_roles gr ON gr.directory_id = m.directory_id AND gr.group_id = m.group_id
+            JOIN groups g ON g.directory_id = m.directory_id AND g.id = m.group_id
+            WHERE m.user_id IN ({sql})
+            UNION ALL
+            SELECT pr.user_id, pr.role_key, 'Organization-wide'
+            FROM platform_roles pr WHERE pr.user_id IN ({sql})
+            """,
+            params + params,
+        )
+
+    def members_of_group(self, group):
+        return self._rows(
+            """
+            SELECT d.name AS directoryName, g.name AS groupName, u.id AS userId, u.email AS userEmail
+            FROM groups g
+            JOIN memberships m ON m.directory_id = g.directory_id AND m.group_id = g.id
+            JOIN users u ON u.id = m.user_id
+            JOIN directories d ON d.id = g.directory_id
+            WHERE g.id = ? OR g.name = ?
+            """,
+            (group, group),
+        )
+
+    def role_keys(self):
+        return [r for (r,) in self.conn.execute(
+            "SELECT role_key FROM group_roles UNION SELECT role_key FROM platform_roles ORDER BY 1"
+        )]
+
+    def stats(self):
+        return {
+            table: self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ("directories", "groups", "users", "memberships", "group_roles", "platform_roles")
+        }
+
+
+def index_exists(path=DB_PATH):
+    return os.path.exists(path)
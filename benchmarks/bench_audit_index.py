@@ -0,0 +1,60 @@
+"""Audit query latency on the SQLite index vs scanning the snapshot frame.
+
+    python benchmarks/bench_audit_index.py --rows 1000000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from audit_index import AuditIndex, write_model  # noqa: E402
+from bench_sankey_frames import synthetic_hierarchy  # noqa: E402
+from hierarchy_model import HierarchyModel  # noqa: E402
+
+
+def timed(fn, *args, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return result, best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=100_000)
+    args = parser.parse_args()
+
+    model = HierarchyModel.from_rows(synthetic_hierarchy(args.rows, groups=2000, users=args.users))
+    df = model.hierarchy_frame()
+    path = os.path.join(tempfile.mkdtemp(), "hierarchy_index.sqlite")
+    start = time.perf_counter()
+    write_model(model, path)
+    print(f"{len(model):,} memberships indexed in {time.perf_counter() - start:.1f}s "
+          f"({os.path.getsize(path) / 1e6:.0f} MB)")
+
+    index = AuditIndex(path)
+    user_id = df["userId"].iloc[len(df) // 2]
+    email = df["userEmail"].iloc[len(df) // 2]
+    group = df["groupName"].iloc[0]
+    cases = [
+        ("groups of user", lambda: df[df["userId"] == user_id], index.groups_of_user, user_id),
+        ("groups of email", lambda: df[df["userEmail"] == email], index.groups_of_user, email),
+        ("members of group", lambda: df[df["groupName"] == group], index.members_of_group, group),
+        ("groups granting", lambda: df[df["notes"].str.contains("role-3-1", regex=False)][["groupId"]].drop_duplicates(),
+         index.groups_granting, "role-3-1"),
+        ("who holds role", lambda: df[df["platformRoles"] == "org-admin"], index.holders_of_role, "org-admin"),
+    ]
+    for name, scan, query, value in cases:
+        scanned, t_scan = timed(scan)
+        (_, rows), t_index = timed(query, value)
+        print(f"{name:17} scan {t_scan:8.2f} ms   sqlite {t_index:8.2f} ms   ({len(rows):,} rows)")
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
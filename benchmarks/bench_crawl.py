@@ -0,0 +1,130 @@
+"""End-to-end crawl benchmark against the local mock Admin API at several scales.
+
+For each scale a ``SyntheticOrg`` is served by ``mock_admin_api`` and crawled
+with ``crawler.crawl`` in a fresh worker process inside a temporary
+directory, so peak RSS covers one crawl only. The worker then runs the
+``hierarchy_sankey.py`` pipeline on the snapshot it wrote: load it as a
+DataFrame, derive the role mapping, build both Sankey frames (with the
+app's default level of detail) and render the two charts.
+
+    python benchmarks/bench_crawl.py --scales small medium large --latency-ms 5
+    python benchmarks/bench_crawl.py --scales medium --throttle 0.02 --rate-limit 50
+    python benchmarks/bench_crawl.py --scales large xlarge --skip-render
+
+Reported per scale: memberships, requests (and 429s), crawl seconds,
+memberships and requests per second, peak RSS after the crawl and after the
+Sankey stage, and Sankey load / frame / render seconds.
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mock_admin_api import MockAdminServer, SyntheticOrg  # noqa: E402
+
+# directories, groups and users per directory
+SCALES = {
+    "small": (1, 50, 500),
+    "medium": (2, 300, 3000),
+    "large": (3, 1000, 10000),
+    "xlarge": (4, 2500, 25000),
+}
+# hierarchy_sankey.py's sidebar defaults
+LEVEL_OF_DETAIL = dict(top_groups=25, top_users=50, collapse_users=False)
+
+
+def peak_rss_mb():
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def crawl_and_render(base_url, org_id, options, work_dir):
+    """Worker process: one crawl plus the viewer's Sankey pipeline."""
+    os.chdir(work_dir)
+    import atlassian_client as client
+    import crawler
+    import snapshot
+    from request_metrics import get_metrics
+    from sankey_frames import level_of_detail, membership_sankey_frame, role_sankey_frame
+    from sankey_render import _render
+
+    client.configure(pool_size=max(client.DEFAULT_POOL_SIZE, options["workers"]), max_per_host=options["workers"],
+                     rate_limit=options["rate_limit"] or None)
+    started = time.perf_counter()
+    result = crawler.crawl("bench-token", org_id, max_workers=options["workers"], resume=False,
+                           snapshot_format=options["format"], base_url=base_url)
+    crawl_seconds = time.perf_counter() - started
+    totals = get_metrics().totals()
+    crawl_rss = peak_rss_mb()
+
+    started = time.perf_counter()
+    # Same load as hierarchy_sankey.load_snapshot_frames
+    df = snapshot.load_hierarchy()
+    roles_df = snapshot.roles_frame(df)
+    load_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    membership = level_of_detail(membership_sankey_frame(df), **LEVEL_OF_DETAIL)
+    roles = level_of_detail(role_sankey_frame(df, roles_df), **LEVEL_OF_DETAIL)
+    frame_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    if options["render"] and not membership.empty:
+        _render(membership, ["Directory", "Group", "User (Email)"], ["left", "center", "right"], "membership", (14, 10), "png", 100)
+    if options["render"] and not roles.empty:
+        _render(roles, ["Directory", "Group", "User (Email)", "Role"], ["left", "left", "center", "right"], "roles", (16, 10), "png", 100)
+    render_seconds = time.perf_counter() - started
+
+    return {
+        "memberships": len(result.model),
+        "requests": totals["requests"],
+        "throttled": totals["throttled"],
+        "crawl_seconds": crawl_seconds,
+        "crawl_rss_mb": crawl_rss,
+        "load_seconds": load_seconds,
+        "frame_seconds": frame_seconds,
+        "render_seconds": render_seconds,
+        "total_rss_mb": peak_rss_mb(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", nargs="+", default=["small", "medium"], choices=list(SCALES))
+    parser.add_argument("--density", type=float, default=0.01, help="mean share of a directory's users in a group")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--jitter-ms", type=float, default=2.0)
+    parser.add_argument("--throttle", type=float, default=0.0, help="fraction of requests answered 429")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="requests per second (0 = unlimited)")
+    parser.add_argument("--format", default="json", choices=["json", "parquet", "arrow"])
+    parser.add_argument("--skip-render", action="store_true", help="time the crawl and Sankey frames only")
+    args = parser.parse_args()
+    options = {"workers": args.workers, "rate_limit": args.rate_limit, "format": args.format, "render": not args.skip_render}
+
+    print(f"{'scale':<8}{'members':>10}{'requests':>10}{'429s':>6}{'crawl s':>9}{'memb/s':>10}{'req/s':>8}"
+          f"{'RSS MB':>8}{'load s':>8}{'frames s':>9}{'render s':>9}{'RSS MB':>8}")
+    context = multiprocessing.get_context("spawn")
+    for scale in args.scales:
+        directories, groups, users = SCALES[scale]
+        org = SyntheticOrg(directories, groups, users, args.density)
+        server = MockAdminServer(org, page_size=args.page_size, latency_ms=args.latency_ms,
+                                 jitter_ms=args.jitter_ms, throttle=args.throttle, retry_after=1)
+        with server, tempfile.TemporaryDirectory() as work_dir, context.Pool(1) as pool:
+            r = pool.apply(crawl_and_render, (server.base_url, org.org_id, options, work_dir))
+        if r["memberships"] != org.memberships:
+            print(f"warning: crawled {r['memberships']} memberships, the org has {org.memberships}")
+        print(f"{scale:<8}{r['memberships']:>10}{r['requests']:>10}{r['throttled']:>6}{r['crawl_seconds']:>9.2f}"
+              f"{r['memberships'] / r['crawl_seconds']:>10.0f}{r['requests'] / r['crawl_seconds']:>8.0f}"
+              f"{r['crawl_rss_mb']:>8.0f}{r['load_seconds']:>8.2f}{r['frame_seconds']:>9.2f}"
+              f"{r['render_seconds']:>9.2f}{r['total_rss_mb']:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Endpoint search latency on a synthetic spec the size of Admin + Jira Cloud.
+
+    python benchmarks/bench_endpoint_search.py --operations 1500
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from endpoint_search import EndpointSearch, endpoint_label  # noqa: E402
+from openapi_cache import build_index  # noqa: E402
+
+NOUNS = ["issue", "project", "user", "group", "directory", "workflow", "field", "screen", "dashboard", "filter",
+         "permission", "role", "comment", "worklog", "attachment", "version", "component", "priority", "status",
+         "resolution", "notification", "scheme", "avatar", "webhook", "audit", "policy", "domain", "event"]
+VERBS = {"get": "Get", "post": "Create", "put": "Update", "delete": "Delete"}
+
+
+def synthetic_spec(operations, seed=3):
+    rng = random.Random(seed)
+    paths = {}
+    while sum(len(m) for m in paths.values()) < operations:
+        parts = rng.sample(NOUNS, rng.randint(1, 3))
+        path = "/rest/api/3/" + "/".join(f"{p}/{{{p}Id}}" if rng.random() < 0.5 else p for p in parts)
+        method = rng.choice(list(VERBS))
+        name = "".join(p.title() for p in parts)
+        paths.setdefault(path, {})[method] = {
+            "tags": [parts[0].title()],
+            "operationId": f"{VERBS[method].lower()}{name}",
+            "summary": f"{VERBS[method]} {' '.join(parts)}",
+            "parameters": [{"name": f"{p}Id", "in": "path"} for p in parts] + [{"name": "expand", "in": "query"}],
+        }
+    return {"servers": [{"url": "https://example.atlassian.net"}], "paths": paths}
+
+
+def linear_search(endpoints, query):
+    terms = query.lower().split()
+    return [ep for ep in endpoints
+            if all(t in f"{endpoint_label(ep)} {ep['details'].get('summary', '')}".lower() for t in terms)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--operations", type=int, default=1500)
+    args = parser.parse_args()
+
+    tags = build_index([synthetic_spec(args.operations)])
+    endpoints = [ep for eps in tags.values() for ep in eps]
+    start = time.perf_counter()
+    search = EndpointSearch(endpoints)
+    print(f"{len(search):,} operations, {len(search.vocabulary):,} tokens indexed in "
+          f"{(time.perf_counter() - start) * 1000:.1f} ms")
+
+    for query in ["GET issue comment", "workfl", "permision scheme", "deleteProjectRole", "{userId}", "put dash"]:
+        start = time.perf_counter()
+        for _ in range(20):
+            linear = linear_search(endpoints, query)
+        t_linear = (time.perf_counter() - start) / 20
+        start = time.perf_counter()
+        for _ in range(20):
+            ranked = search.search(query)
+        t_index = (time.perf_counter() - start) / 20
+        top = endpoint_label(ranked[0]) if ranked else "-"
+        print(f"{query!r:22} linear {t_linear * 1000:6.2f} ms ({len(linear):4} hits)   "
+              f"index {t_index * 1000:6.2f} ms ({len(ranked):3} shown)  top: {top}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Memory and query time: flat per-membership dicts vs ``HierarchyModel``.
+
+    python benchmarks/bench_hierarchy_model.py --rows 200000
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench_sankey_frames import synthetic_hierarchy  # noqa: E402
+from hierarchy_model import HierarchyModel  # noqa: E402
+from snapshot import roles_from_entries  # noqa: E402
+
+
+def traced(build):
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args()
+
+    # Round-trip through JSON so every row owns its strings, as crawled rows do
+    encoded = json.dumps(synthetic_hierarchy(args.rows))
+
+    def flat():
+        rows = json.loads(encoded)
+        return rows, roles_from_entries(rows)
+
+    (rows, roles), flat_size = traced(flat)
+    model, model_size = traced(lambda: HierarchyModel.from_rows(json.loads(encoded)))
+    print(f"{len(rows):,} memberships, {len(roles):,} role rows")
+    print(f"flat dicts      {flat_size / 1e6:9.1f} MB")
+    print(f"HierarchyModel  {model_size / 1e6:9.1f} MB  ({flat_size / model_size:.0f}x smaller)")
+
+    user_id = rows[len(rows) // 2]["userId"]
+    start = time.perf_counter()
+    scanned = [r for r in rows if r["userId"] == user_id]
+    t_scan = time.perf_counter() - start
+    model.groups_of_user(user_id)  # builds the indexes once
+    start = time.perf_counter()
+    indexed = model.groups_of_user(user_id)
+    t_index = time.perf_counter() - start
+    assert len(scanned) == len(indexed)
+    print(f"groups of user  scan {t_scan * 1000:8.3f} ms   index {t_index * 1000:8.3f} ms")
+
+    same = model.hierarchy_frame().astype(object).to_dict("records") == rows
+    print(f"derived hierarchy frame matches flat rows: {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Per-request latency: bare ``requests.get`` vs the pooled shared client.
+
+Starts a local keep-alive HTTP server that answers like an Admin API page and
+times N sequential GETs with each approach. ``--handshake-ms`` delays every new
+connection to stand in for the TCP + TLS setup cost of a remote host.
+
+    python benchmarks/bench_http_client.py --requests 500
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import atlassian_client as client  # noqa: E402
+
+PAGE = json.dumps({
+    "data": [{"accountId": f"user-{i}", "email": f"user{i}@example.com"} for i in range(50)],
+    "links": {},
+}).encode()
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    handshake_delay = 0.0
+
+    def setup(self):
+        super().setup()
+        time.sleep(self.handshake_delay)
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(PAGE)))
+        self.end_headers()
+        self.wfile.write(PAGE)
+
+    def log_message(self, *args):
+        pass
+
+
+def timed(get, url, n):
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        resp = get(url)
+        resp.json()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(label, samples):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{label:<16} mean {statistics.mean(samples):7.3f} ms   "
+          f"p50 {statistics.median(samples):7.3f} ms   p95 {p95:7.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--handshake-ms", type=float, default=25.0)
+    args = parser.parse_args()
+
+    PageHandler.handshake_delay = args.handshake_ms / 1000
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/admin/v2/orgs/bench/users"
+
+    try:
+        bare = timed(requests.get, url, args.requests)
+        pooled = timed(client.get, url, args.requests)
+    finally:
+        server.shutdown()
+        client.close()
+
+    report("requests.get", bare)
+    report("pooled session", pooled)
+    print(f"speedup (mean)   {statistics.mean(bare) / statistics.mean(pooled):.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Sankey frame construction: original row-wise code vs ``sankey_frames``.
+
+Generates a synthetic snapshot, builds both Sankey frames with the original
+``iterrows`` / per-row ``df.loc`` code and with the vectorized builders, checks
+that they describe the same flows (row-wise frames summed per path) and
+prints the timings.
+
+    python benchmarks/bench_sankey_frames.py --rows 100000
+
+The original role frame does a full scan of the hierarchy per role row, so by
+default it only runs on the first ``--legacy-role-rows`` role rows; the full
+role frame is checked against a row-wise reference with the same
+first-membership semantics.
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.sankey_reference import (  # noqa: E402
+    flows, legacy_membership, legacy_roles, reference_roles, synthetic_hierarchy,
+)
+from sankey_frames import MEMBERSHIP_COLUMNS, ROLE_COLUMNS, membership_sankey_frame, role_sankey_frame  # noqa: E402
+from snapshot import roles_from_entries  # noqa: E402
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def check(label, expected, actual, columns):
+    same = flows(expected, columns) == flows(actual, columns)
+    print(f"{label:<38} {'identical' if same else 'MISMATCH'}")
+    return same
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--legacy-role-rows", type=int, default=2_000)
+    args = parser.parse_args()
+
+    hierarchy = synthetic_hierarchy(args.rows)
+    df = pd.DataFrame(hierarchy)
+    roles_df = pd.DataFrame(roles_from_entries(hierarchy))
+    print(f"{len(df):,} membership rows, {len(roles_df):,} role rows")
+
+    legacy_m, t_legacy_m = timed(legacy_membership, df)
+    new_m, t_new_m = timed(membership_sankey_frame, df)
+    reference_r, t_reference_r = timed(reference_roles, df, roles_df)
+    new_r, t_new_r = timed(role_sankey_frame, df, roles_df)
+    sample = roles_df.head(args.legacy_role_rows)
+    legacy_r, t_legacy_r = timed(legacy_roles, df, sample)
+
+    ok = all([
+        check("membership frame vs original", legacy_m, new_m, MEMBERSHIP_COLUMNS),
+        check("role frame vs row-wise reference", reference_r, new_r, ROLE_COLUMNS),
+        check(f"role frame vs original ({len(sample):,} rows)", legacy_r, role_sankey_frame(df, sample), ROLE_COLUMNS),
+    ])
+
+    print(f"membership: original {t_legacy_m:8.3f}s  vectorized {t_new_m:8.3f}s  "
+          f"({len(legacy_m):,} -> {len(new_m):,} rows)")
+    per_row = t_legacy_r / max(1, len(sample))
+    print(f"roles:      original {t_legacy_r:8.3f}s for {len(sample):,} rows "
+          f"(~{per_row * len(roles_df):,.0f}s extrapolated)  reference {t_reference_r:6.3f}s  "
+          f"vectorized {t_new_r:6.3f}s  ({len(roles_df):,} -> {len(new_r):,} rows)")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Synthetic hierarchies and the original row-wise Sankey frames.
+
+Shared by ``bench_sankey_frames.py`` and ``tests/test_sankey_frames.py`` to
+check that ``sankey_frames`` draws the same flows as the code it replaced.
+"""
+import random
+
+import pandas as pd
+
+from sankey_frames import MEMBERSHIP_COLUMNS, ROLE_COLUMNS
+
+
+def synthetic_hierarchy(rows, directories=5, groups=400, users=20000, seed=7):
+    rng = random.Random(seed)
+    platform = {f"u{i}": rng.choice(["", "", "", "org-admin", "site-admin", "site-admin, org-admin"]) for i in range(users)}
+    data = []
+    for _ in range(rows):
+        d = rng.randrange(directories)
+        g = rng.randrange(groups)
+        u = f"u{rng.randrange(users)}"
+        data.append({
+            "directoryId": f"dir-{d}",
+            "directoryName": f"Directory {d}",
+            "groupId": f"grp-{d}-{g}",
+            "groupName": f"group-{g}",
+            "userId": u,
+            "userName": f"{u}@example.com",
+            "userEmail": f"{u}@example.com",
+            "notes": ", ".join(f"role-{g % 7}-{k}" for k in range(g % 3)),
+            "platformRoles": platform[u],
+        })
+    return data
+
+
+# The row-wise frames the app built before sankey_frames, verbatim
+def legacy_membership(df):
+    return pd.DataFrame([
+        (row["directoryName"], 1, row["groupName"], 1, row["userEmail"], 1)
+        for _, row in df.iterrows()
+    ], columns=MEMBERSHIP_COLUMNS)
+
+
+def legacy_roles(df, roles_df):
+    return pd.DataFrame([
+        (df.loc[df["userId"] == row["userId"], "directoryName"].values[0], 1,
+         df.loc[df["userId"] == row["userId"], "groupName"].values[0], 1,
+         row["userEmail"], 1, row["roleKey"], 1)
+        for _, row in roles_df.iterrows()
+    ], columns=ROLE_COLUMNS)
+
+
+def reference_roles(df, roles_df):
+    """``legacy_roles`` with a dict of each user's first membership instead of a scan per row."""
+    first = {}
+    for user_id, directory, group in zip(df["userId"], df["directoryName"], df["groupName"]):
+        first.setdefault(user_id, (directory, group))
+    rows = []
+    for user_id, email, role in zip(roles_df["userId"], roles_df["userEmail"], roles_df["roleKey"]):
+        directory, group = first[user_id]
+        rows.append((directory, 1, group, 1, email, 1, role, 1))
+    return pd.DataFrame(rows, columns=ROLE_COLUMNS)
+
+
+def flows(frame, columns):
+    """Total weight per path, which is what the diagram draws."""
+    return frame.groupby(columns[::2], sort=True)[columns[-1]].sum().to_dict()
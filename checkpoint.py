@@ -0,0 +1,164 @@
+"""Crawl checkpoints so an interrupted crawl resumes instead of starting over.
+
+The checkpoint is an append-only JSONL log (``crawl_checkpoint.jsonl``) of
+four kinds of events:
+
+* ``options`` - written first: the org, API base and crawl options the
+  checkpoint belongs to. A crawl with different options starts fresh
+  instead of reusing it;
+* ``page`` - one fetched page of a paginated listing (only the fields the
+  crawl reads) and its ``links.next`` cursor, so a listing can continue from
+  the last saved cursor;
+* ``group`` - every row for a directory/group pair is in the snapshot journal;
+* ``directory`` - every group of a directory is complete.
+
+Flushing the checkpoint flushes the snapshot journal first, so a recorded
+``group`` event never points at rows that were not written yet.
+"""
+import json
+import os
+import threading
+import time
+
+CHECKPOINT_PATH = "crawl_checkpoint.jsonl"
+DEFAULT_BATCH_SIZE = 200
+DEFAULT_FSYNC_INTERVAL = 2.0
+
+
+class CrawlCheckpoint:
+    def __init__(self, path=CHECKPOINT_PATH, journal=None, batch_size=DEFAULT_BATCH_SIZE,
+                 fsync_interval=DEFAULT_FSYNC_INTERVAL, options=None):
+        self.path = path
+        self.journal = journal
+        self.options = None
+        self.batch_size = batch_size
+        self.fsync_interval = fsync_interval
+        self.done_groups = set()
+        self.done_directories = set()
+        # key -> {"items": [...], "next": url or None}; items are only kept from a
+        # replayed checkpoint, until resume_listing hands them to the listing
+        self.pages = {}
+        self.buffer = []
+        self.last_sync = time.monotonic()
+        # Listings are paginated from worker threads
+        self.lock = threading.RLock()
+        self._load()
+        self.file = open(path, "a", encoding="utf-8")
+        if options is not None and self.options is None:
+            self._write({"type": "options", "options": options})
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+                self._apply(event, replay=True)
+
+    def _apply(self, event, replay=False):
+        kind = event.get("type")
+        if kind == "options":
+            self.options = event["options"]
+        elif kind == "page":
+            state = self.pages.setdefault(event["key"], {"items": [], "next": None})
+            if replay:
+                state["items"].extend(event.get("items", []))
+            state["next"] = event.get("next")
+        elif kind == "group":
+            self.done_groups.add((event["directoryId"], event["groupId"]))
+            for key in event.get("keys", []):
+                self.pages.pop(key, None)
+        elif kind == "directory":
+            self.done_directories.add(event["directoryId"])
+            for key in event.get("keys", []):
+                self.pages.pop(key, None)
+
+    def _write(self, event):
+        with self.lock:
+            self._apply(event)
+            self.buffer.append(json.dumps(event, separators=(",", ":")))
+            if len(self.buffer) >= self.batch_size or time.monotonic() - self.last_sync >= self.fsync_interval:
+                self.flush()
+
+    @property
+    def is_resumed(self):
+        return bool(self.pages or self.done_groups or self.done_directories)
+
+    def resume_listing(self, key):
+        """Saved ``(items, next_url)`` for a listing, or None if it never started.
+
+        ``next_url`` is None when the listing already reached its last page.
+        The saved items are handed over once and not kept here.
+        """
+        with self.lock:
+            state = self.pages.get(key)
+            if state is None:
+                return None
+            items, state["items"] = state["items"], []
+            return items, state["next"]
+
+    def record_page(self, key, items, next_url):
+        self._write({"type": "page", "key": key, "items": items, "next": next_url})
+
+    def is_group_done(self, directory_id, group_id):
+        return (directory_id, group_id) in self.done_groups
+
+    def mark_group_done(self, directory_id, group_id, keys=()):
+        self._write({"type": "group", "directoryId": directory_id, "groupId": group_id, "keys": list(keys)})
+
+    def is_directory_done(self, directory_id):
+        return directory_id in self.done_directories
+
+    def mark_directory_done(self, directory_id, keys=()):
+        self._write({"type": "directory", "directoryId": directory_id, "keys": list(keys)})
+
+    def flush(self):
+        with self.lock:
+            if self.journal is not None:
+                self.journal.flush()
+            if self.buffer:
+                self.file.write("\n".join(self.buffer) + "\n")
+                self.buffer = []
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.last_sync = time.monotonic()
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+    def clear(self):
+        """Drop the checkpoint once the crawl has been compacted into a snapshot."""
+        if not self.file.closed:
+            self.file.close()
+        self.buffer = []
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def checkpoint_exists(path=CHECKPOINT_PATH):
+    return os.path.exists(path)
+
+
+def saved_options(path=CHECKPOINT_PATH):
+    """Crawl options recorded at the start of a checkpoint, or None."""
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            event = json.loads(f.readline())
+        except json.JSONDecodeError:
+            return None
+    return event.get("options") if event.get("type") == "options" else None
+
+
+def discard(path=CHECKPOINT_PATH):
+    if os.path.exists(path):
+        os.remove(path)
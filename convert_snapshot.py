@@ -0,0 +1,47 @@
+"""Convert a hierarchy snapshot between JSON, Parquet and Arrow IPC.
+
+Reports file sizes and the time and memory it takes to load each file into a
+DataFrame, e.g.:
+
+    python convert_snapshot.py hierarchy_data.json --to parquet arrow
+"""
+import argparse
+import os
+import time
+
+import snapshot
+
+
+def load_stats(path):
+    start = time.perf_counter()
+    df = snapshot.read_frame(path)
+    elapsed = time.perf_counter() - start
+    return df, elapsed, df.memory_usage(deep=True).sum()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", nargs="?", default=snapshot.SNAPSHOT_PATH)
+    parser.add_argument("--to", nargs="+", choices=list(snapshot.SNAPSHOT_FORMATS), default=["parquet"])
+    parser.add_argument("--out-dir", default=".")
+    args = parser.parse_args()
+
+    df, elapsed, memory = load_stats(args.source)
+    rows = [(args.source, os.path.getsize(args.source), elapsed, memory)]
+    stem = os.path.splitext(os.path.basename(args.source))[0]
+    for fmt in args.to:
+        target = os.path.join(args.out_dir, f"{stem}.{fmt}")
+        if os.path.abspath(target) == os.path.abspath(args.source):
+            continue
+        snapshot.write_snapshot(df, target)
+        _, elapsed, memory = load_stats(target)
+        rows.append((target, os.path.getsize(target), elapsed, memory))
+
+    print(f"{len(df):,} rows")
+    print(f"{'file':<40} {'size':>12} {'load':>10} {'in memory':>12}")
+    for path, size, elapsed, memory in rows:
+        print(f"{path:<40} {size / 1e6:>9.2f} MB {elapsed:>8.3f} s {memory / 1e6:>9.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
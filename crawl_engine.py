@@ -0,0 +1,61 @@
+"""Concurrent fan-out of the per-group crawl requests.
+
+Each group needs two independent paginated calls (``/role-assignments`` and
+``/groups/{id}/users``). They are submitted to a bounded thread pool and the
+results are yielded back in the original group order, so the rows built from
+them come out exactly as a serial crawl would produce them. ``fan_out`` is the
+same pattern for one call per item (the playground's batch mode).
+"""
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_MAX_WORKERS = 8
+# Items in flight per worker: enough to keep the pool busy while the head of
+# the window is slow, without piling up results for every later item
+WINDOW_PER_WORKER = 2
+
+
+def _in_order(pool, items, calls, window):
+    """Yield ``(item, *results)`` in input order, with at most ``window`` items submitted ahead."""
+    pending = deque()
+    try:
+        for item in items:
+            pending.append((item, [pool.submit(call, item) for call in calls]))
+            if len(pending) >= window:
+                item, futures = pending.popleft()
+                yield (item, *(f.result() for f in futures))
+        while pending:
+            item, futures = pending.popleft()
+            yield (item, *(f.result() for f in futures))
+    finally:
+        for _, futures in pending:
+            for future in futures:
+                future.cancel()
+
+
+def iter_group_details(groups, fetch_roles, fetch_members, max_workers=DEFAULT_MAX_WORKERS, initializer=None):
+    """Yield ``(group, roles, members)`` for every group, in input order.
+
+    ``max_workers <= 1`` runs serially on the calling thread. ``initializer``
+    is run once in each worker thread (e.g. to attach a Streamlit context).
+    At most ``max_workers * WINDOW_PER_WORKER`` groups are fetched ahead of
+    the one being yielded.
+    """
+    if max_workers <= 1:
+        for g in groups:
+            yield g, fetch_roles(g), fetch_members(g)
+        return
+
+    with ThreadPoolExecutor(max_workers=max_workers, initializer=initializer) as pool:
+        yield from _in_order(pool, groups, (fetch_roles, fetch_members), max_workers * WINDOW_PER_WORKER)
+
+
+def fan_out(fn, items, max_workers=DEFAULT_MAX_WORKERS, initializer=None):
+    """Yield ``(item, fn(item))`` for every item, in input order."""
+    if max_workers <= 1:
+        for item in items:
+            yield item, fn(item)
+        return
+
+    with ThreadPoolExecutor(max_workers=max_workers, initializer=initializer) as pool:
+        yield from _in_order(pool, items, (fn,), max_workers * WINDOW_PER_WORKER)
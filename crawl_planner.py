@@ -0,0 +1,122 @@
+"""Cost-based choice of the per-directory membership strategy.
+
+After a directory's ``/groups`` and ``/users`` listings are in, the planner
+estimates how many requests each way of fetching its memberships needs:
+
+* ``per-group``: one ``/role-assignments`` call plus ``ceil(members / page)``
+  ``/groups/{id}/users`` pages per group. When the group listing reports
+  member counts (``counts.users``), groups with no members are skipped.
+* ``per-user`` (opt-in, needs ``/users/{accountId}/groups``): at least one
+  page per user, plus role assignments for the groups that have members.
+  This wins in directories with few users and many groups.
+
+The cheaper strategy is used and the totals are reported as the crawl's
+request budget before any group is fetched. Without member counts every
+group is assumed to need one page of members and none is skipped.
+"""
+import math
+
+DEFAULT_PAGE_SIZE = 100
+PER_GROUP = "per-group"
+PER_USER = "per-user"
+
+
+def member_count(group):
+    """``counts.users`` from a ``/groups`` listing item, or None when not reported."""
+    counts = group.get("counts")
+    if isinstance(counts, dict) and isinstance(counts.get("users"), int):
+        return counts["users"]
+    return None
+
+
+def _pages(items, page_size):
+    return max(1, math.ceil(items / page_size))
+
+
+class DirectoryPlan:
+    def __init__(self, directory_id, name, strategy, groups, skipped, users, costs, baseline):
+        self.directory_id = directory_id
+        self.name = name
+        self.strategy = strategy
+        self.groups = groups  # groups to crawl, in listing order
+        self.skipped = skipped  # groups left out because they have no members
+        self.users = users
+        self.costs = costs  # strategy -> estimated requests
+        self.baseline = baseline  # per-group crawl of every group, empty ones included
+
+    @property
+    def requests(self):
+        return self.costs[self.strategy]
+
+    def row(self):
+        return {
+            "directory": self.name,
+            "groups": len(self.groups) + len(self.skipped),
+            "empty groups skipped": len(self.skipped),
+            "users": self.users,
+            "strategy": self.strategy,
+            "requests": self.requests,
+            **{f"{name} requests": cost for name, cost in self.costs.items()},
+        }
+
+
+def plan_directory(directory_id, name, groups, users, page_size=DEFAULT_PAGE_SIZE, skip_empty=True, user_side=False):
+    """Plan one directory from its group listing and its number of users."""
+    counts = [member_count(g) for g in groups]
+    known = all(c is not None for c in counts)
+    if known and skip_empty:
+        crawl = [g for g, c in zip(groups, counts) if c]
+        skipped = [g for g, c in zip(groups, counts) if not c]
+        crawl_counts = [c for c in counts if c]
+    else:
+        crawl, skipped, crawl_counts = list(groups), [], counts
+
+    def per_group(group_counts):
+        return sum(1 + (_pages(c, page_size) if c is not None else 1) for c in group_counts)
+
+    costs = {PER_GROUP: per_group(crawl_counts)}
+    if user_side and users:
+        memberships = sum(crawl_counts) if known else 0
+        # Every user costs a page, even one in no group; roles are still fetched per group
+        costs[PER_USER] = max(users, math.ceil(memberships / page_size)) + len(crawl)
+    # Ties go to per-group, which keeps the API's member order
+    strategy = min(costs, key=costs.get)
+    return DirectoryPlan(directory_id, name, strategy, crawl, skipped, users, costs, per_group(counts))
+
+
+class CrawlPlan:
+    def __init__(self, listing_requests=0):
+        self.directories = []
+        self.listing_requests = listing_requests  # directory / group / user listings already made
+
+    def add(self, plan):
+        self.directories.append(plan)
+
+    @property
+    def requests(self):
+        return sum(p.requests for p in self.directories)
+
+    @property
+    def baseline_requests(self):
+        """What the plain per-group crawl of every group would cost."""
+        return sum(p.baseline for p in self.directories)
+
+    def rows(self):
+        return [p.row() for p in self.directories]
+
+    def summary(self):
+        return (
+            f"Request budget: {self.listing_requests} listing requests made, {self.requests} planned "
+            f"for {sum(len(p.groups) for p in self.directories)} groups "
+            f"({sum(len(p.skipped) for p in self.directories)} empty groups skipped, "
+            f"{sum(p.strategy == PER_USER for p in self.directories)} directories fetched per user); "
+            f"the per-group crawl of every group would need {self.baseline_requests}."
+        )
+
+    def to_dict(self):
+        return {
+            "listing_requests": self.listing_requests,
+            "planned_requests": self.requests,
+            "baseline_requests": self.baseline_requests,
+            "directories": self.rows(),
+        }
@@ -0,0 +1,592 @@
+"""Headless org hierarchy crawl: directories -> groups -> roles / members.
+
+The crawl writes the same files the Streamlit app reads: the snapshot (in
+the chosen format), its journal and checkpoint while running, the ETag
+validators, ``hierarchy_delta.json`` for incremental crawls, the optional
+SQLite audit index, ``crawl_metrics.json`` with counts, rate limiter and
+per-endpoint request statistics, and the same request metrics in Prometheus
+text format (``crawl_metrics.prom``, for node_exporter's textfile
+collector). ``--trace`` also records the time spent in each crawl phase as a
+Chrome / Perfetto trace. Run it from cron with::
+
+    python crawler.py --org-id <org> --format parquet --incremental
+
+The API token is read from ``--token``, ``ATLASSIAN_API_TOKEN`` or the
+``[api]`` table of ``.streamlit/secrets.toml``.
+
+``--all-orgs`` crawls every ``[[orgs]]`` entry of ``secrets.toml`` (``name``,
+``org_id``, ``api_key``) in its own worker process, each with its own
+connection pool and rate limiter, into ``orgs/<name>/``. The per-org
+snapshots are then merged into ``hierarchy_all_orgs.*`` with ``orgName`` /
+``orgId`` columns.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+import tomllib
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+import atlassian_client as client
+import audit_index
+import delta
+import exports
+import snapshot
+from checkpoint import CrawlCheckpoint, checkpoint_exists, discard as discard_checkpoint, saved_options
+from crawl_engine import DEFAULT_MAX_WORKERS, fan_out, iter_group_details
+from crawl_planner import PER_USER, CrawlPlan, plan_directory
+from hierarchy_model import HierarchyModel
+from pagination import iter_pages
+from request_metrics import get_metrics
+from tracing import TRACE_PATH, get_tracer
+
+# ATLASSIAN_API_BASE points the crawl at another host (e.g. a proxy or a local mock)
+API_BASE = os.environ.get("ATLASSIAN_API_BASE", "https://api.atlassian.com").rstrip("/")
+BASE_URL = f"{API_BASE}/admin/v2/orgs"
+SECRETS_PATH = os.path.join(".streamlit", "secrets.toml")
+METRICS_PATH = "crawl_metrics.json"
+PROMETHEUS_PATH = "crawl_metrics.prom"
+ORGS_DIR = "orgs"
+MERGED_SNAPSHOTS = {fmt: path.replace("hierarchy_data", "hierarchy_all_orgs") for fmt, path in snapshot.SNAPSHOT_FORMATS.items()}
+ALL_ORGS_METRICS_PATH = "crawl_metrics_all_orgs.json"
+USER_FIELDS = ("accountId", "email", "name", "nickname", "platformRoles")
+# Fields of each listing the crawl reads; only these are saved in the checkpoint
+DIRECTORY_FIELDS = ("directoryId", "name")
+GROUP_FIELDS = ("id", "name", "counts")
+ROLE_FIELDS = ("roleKey",)
+
+log = logging.getLogger("crawler")
+
+
+def extract_guid(urn_id: str) -> str:
+    if urn_id and ":" in urn_id:
+        return urn_id.split(":")[-1]
+    return urn_id
+
+
+def _log_message(level, message):
+    log.log(logging.getLevelName(level.upper()), message)
+
+
+class CrawlResult:
+    def __init__(self, model, directories, changes, validator_stats, metrics, plan=None):
+        self.model = model
+        self.directories = directories
+        self.changes = changes
+        self.validator_stats = validator_stats
+        self.metrics = metrics
+        self.plan = plan
+
+
+def _project(items, fields):
+    return [{k: item[k] for k in fields if k in item} for item in items if isinstance(item, dict)]
+
+
+def iter_listing(url, headers, checkpoint=None, validators=None, on_page=None, on_message=_log_message, fields=None,
+                 errors=None):
+    """Yield a listing's items page by page, resuming from a checkpointed cursor.
+
+    Each page is checkpointed as its ``links.next`` cursor plus the items cut
+    down to ``fields`` (all fields when None), which is what a resumed crawl
+    replays before continuing from the cursor. A failed page ends the listing
+    and, when given, is appended to ``errors`` as ``"HTTP <status>"``.
+    """
+    key = url
+    saved = checkpoint.resume_listing(key) if checkpoint else None
+    if saved:
+        # Continue from the last saved links.next cursor (None = already complete)
+        items, url = saved
+        yield from items
+    if not url:
+        return
+
+    def on_error(page_url, resp):
+        if errors is not None:
+            errors.append(f"HTTP {resp.status_code}")
+        if resp.status_code == 429:
+            on_message("warning", f"Still rate limited after retries, remaining pages skipped: {page_url}")
+        else:
+            on_message("debug", f"Request failed: {resp.status_code} {resp.text}")
+
+    for page in iter_pages(url, headers, on_error=on_error):
+        if on_page:
+            on_page(page)
+        if validators:
+            validators.record(page.url, page.response, page.next_url)
+        if checkpoint:
+            checkpoint.record_page(key, page.items if fields is None else _project(page.items, fields), page.next_url)
+        yield from page.items
+
+
+def crawl(api_key, org_id, max_workers=DEFAULT_MAX_WORKERS, incremental=False, resume=True,
+          snapshot_format="json", write_index=False, base_url=None,
+          on_page=None, on_message=_log_message, initializer=None, trace_path=None,
+          skip_empty_groups=True, user_side=False, plan_only=False, on_plan=None):
+    """Crawl one org and write its snapshot, validators, delta, index and metrics.
+
+    ``on_page(page)`` sees every fetched page (debug output), ``on_message(level,
+    text)`` receives progress and warnings, and ``initializer`` runs in each
+    worker thread of the group fan-out. Phases are recorded as spans whenever
+    the tracer is enabled; ``trace_path`` enables it for this crawl and writes
+    the Chrome trace there.
+
+    Once every directory's group and user listings are in, ``crawl_planner``
+    picks each directory's membership strategy (``skip_empty_groups``,
+    ``user_side``) and ``on_plan(plan)`` is called with the request budget.
+    ``plan_only`` stops there without fetching any group, keeping the
+    listings in the checkpoint for the real crawl.
+    """
+    tracer = get_tracer()
+    if trace_path:
+        tracer.enable()
+    with tracer.span("crawl", org=org_id):
+        result = _crawl(api_key, org_id, max_workers, incremental, resume, snapshot_format, write_index,
+                        base_url, on_page, on_message, initializer, tracer,
+                        skip_empty_groups, user_side, plan_only, on_plan)
+    if trace_path:
+        tracer.disable()
+        result.metrics["trace"] = tracer.write(trace_path)
+        if not plan_only:
+            write_metrics(result.metrics)
+    return result
+
+
+def _crawl(api_key, org_id, max_workers, incremental, resume, snapshot_format, write_index,
+           base_url, on_page, on_message, initializer, tracer,
+           skip_empty_groups, user_side, plan_only, on_plan):
+    started = time.time()
+    base_url = base_url or BASE_URL
+    request_metrics = get_metrics()
+    request_metrics.reset()
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Accept": "application/json"
+    }
+
+    def paginate(url, fields, checkpoint=None, validators=None):
+        return list(iter_listing(url, headers, checkpoint, validators, on_page, on_message, fields))
+
+    # Normalized tables + integer edge lists; flat frames are derived after the crawl
+    model = HierarchyModel()
+
+    # A checkpoint is only reused by a crawl of the same org with the same options
+    options = {
+        "org_id": org_id, "base_url": base_url, "incremental": incremental,
+        "skip_empty_groups": skip_empty_groups, "user_side": user_side,
+    }
+    if resume and checkpoint_exists() and saved_options() != options:
+        on_message("warning", "The saved checkpoint is from a crawl with other options; starting fresh.")
+        resume = False
+    if not (resume and checkpoint_exists()):
+        discard_checkpoint()
+        snapshot.discard_journal()
+    previous_rows = snapshot.read_snapshot() if incremental else []
+    previous_by_group = delta.group_rows(previous_rows)
+    validators = delta.ValidatorStore(load_previous=incremental)
+
+    checkpoint = CrawlCheckpoint(options=options)
+    if checkpoint.is_resumed:
+        # Keep only rows whose group was recorded complete, once each, and cut the journal back
+        # to them: the rest are re-crawled, and a second crash must not leave duplicates behind
+        kept, seen = [], set()
+        for e in snapshot.read_journal():
+            row_key = (e["directoryId"], e["groupId"], e["userId"])
+            if checkpoint.is_group_done(e["directoryId"], e["groupId"]) and row_key not in seen:
+                seen.add(row_key)
+                kept.append(e)
+        snapshot.rewrite_journal(kept)
+        model.add_rows(kept)
+        on_message(
+            "info",
+            f"Resuming interrupted crawl: {len(checkpoint.done_directories)} directories and "
+            f"{len(checkpoint.done_groups)} groups already complete ({len(model)} rows)."
+        )
+    journal = checkpoint.journal = snapshot.SnapshotJournal()
+
+    try:
+        dir_url = f"{base_url}/{org_id}/directories"
+        directory_errors = []
+        with tracer.span("list directories"):
+            directories = list(iter_listing(dir_url, headers, checkpoint, None, on_page, on_message,
+                                            DIRECTORY_FIELDS, directory_errors))
+
+        if directory_errors:
+            on_message("warning", f"Unable to fetch directories ({directory_errors[0]}); check the org id and token.")
+        elif not directories:
+            on_message("warning", "No directories found.")
+        # Directory-level listings first, so the planner sees every directory before any group is fetched
+        plan = CrawlPlan()
+        listings = []
+        for d in directories:
+            dir_id = extract_guid(d.get("directoryId"))
+            dir_name = d.get("name", "Unknown Directory")
+            if not dir_id or checkpoint.is_directory_done(dir_id):
+                continue
+
+            grp_url = f"{base_url}/{org_id}/directories/{dir_id}/groups"
+            with tracer.span("list groups", directory=dir_id):
+                groups = paginate(grp_url, GROUP_FIELDS, checkpoint)
+
+            usr_url = f"{base_url}/{org_id}/directories/{dir_id}/users"
+            # Stream the directory-wide listing straight into the lookup, keeping only the fields used below
+            with tracer.span("list users", directory=dir_id):
+                user_map = {
+                    extract_guid(u.get("accountId")): {k: u[k] for k in USER_FIELDS if k in u}
+                    for u in iter_listing(usr_url, headers, checkpoint, None, on_page, on_message, USER_FIELDS)
+                }
+
+            groups = [
+                g for g in groups
+                if extract_guid(g.get("id")) and not checkpoint.is_group_done(dir_id, extract_guid(g.get("id")))
+            ]
+            dir_plan = plan_directory(dir_id, dir_name, groups, len(user_map),
+                                      skip_empty=skip_empty_groups, user_side=user_side)
+            plan.add(dir_plan)
+            listings.append((dir_plan, grp_url, usr_url, user_map))
+
+        plan.listing_requests = request_metrics.totals()["requests"]
+        on_message("info", plan.summary())
+        if on_plan:
+            on_plan(plan)
+        if plan_only:
+            return CrawlResult(model, directories, None, dict(validators.stats), {"plan": plan.to_dict()}, plan)
+
+        for dir_plan, grp_url, usr_url, user_map in listings:
+            dir_id, dir_name, groups = dir_plan.directory_id, dir_plan.name, dir_plan.groups
+            user_group_urls = {}
+            if dir_plan.strategy == PER_USER:
+                # Invert each user's group listing into group -> members; groups nobody is in are dropped
+                user_group_urls = {account_id: f"{usr_url}/{account_id}/groups" for account_id in user_map}
+                members_by_group = {}
+                with tracer.span("user groups", directory=dir_id, users=len(user_map)):
+                    for account_id, user_groups in fan_out(
+                        lambda a: paginate(user_group_urls[a], ("id",), checkpoint), list(user_map),
+                        max_workers=max_workers, initializer=initializer,
+                    ):
+                        for ug in user_groups:
+                            members_by_group.setdefault(extract_guid(ug.get("id")), []).append({"accountId": account_id})
+                groups = [g for g in groups if extract_guid(g.get("id")) in members_by_group]
+
+            def fetch_roles(g, dir_id=dir_id):
+                grp_id = extract_guid(g.get("id"))
+                role_url = f"{base_url}/{org_id}/directories/{dir_id}/groups/{grp_id}/role-assignments"
+                with tracer.span("group roles", group=grp_id):
+                    if incremental:
+                        previous = delta.roles_from_rows(previous_by_group.get((dir_id, grp_id)))
+                        if previous is not None and delta.listing_unchanged(role_url, headers, validators):
+                            return previous
+                    return paginate(role_url, ROLE_FIELDS, checkpoint, validators)
+
+            def fetch_members(g, dir_id=dir_id):
+                grp_id = extract_guid(g.get("id"))
+                if dir_plan.strategy == PER_USER:
+                    return members_by_group[grp_id]
+                grp_users_url = f"{base_url}/{org_id}/directories/{dir_id}/groups/{grp_id}/users"
+                with tracer.span("group members", group=grp_id):
+                    if incremental and delta.listing_unchanged(grp_users_url, headers, validators):
+                        return delta.members_from_rows(previous_by_group.get((dir_id, grp_id), []))
+                    return paginate(grp_users_url, USER_FIELDS, checkpoint, validators)
+
+            dir_idx = model.add_directory(dir_id, dir_name)
+            for g, roles, group_users in iter_group_details(
+                groups, fetch_roles, fetch_members, max_workers=max_workers, initializer=initializer
+            ):
+                grp_id = extract_guid(g.get("id"))
+                grp_name = g.get("name", "Unknown Group")
+                role_names = [r.get("roleKey", "unknown-role") for r in roles if r]
+                grp_idx = model.add_group(dir_idx, grp_id, grp_name, role_names)
+
+                # Journal + model updates for the group's rows
+                with tracer.span("group rows", group=grp_id, rows=len(group_users)):
+                    for u in group_users:
+                        user_id = extract_guid(u.get("accountId"))
+                        if not user_id:
+                            continue
+
+                        u_full = user_map.get(user_id, u)
+
+                        user_email = u_full.get("email") or user_id
+                        user_name = (
+                            user_email or
+                            u_full.get("name") or
+                            u_full.get("nickname") or
+                            user_id
+                        )
+                        platform_roles = ", ".join(u_full.get("platformRoles", []))
+
+                        entry = {
+                            "directoryId": dir_id,
+                            "directoryName": dir_name,
+                            "groupId": grp_id,
+                            "groupName": grp_name,
+                            "userId": user_id,
+                            "userName": user_name,
+                            "userEmail": user_email,
+                            "notes": ", ".join(role_names),
+                            "platformRoles": platform_roles
+                        }
+                        journal.append(entry)
+
+                        # Group roles come from the group, platform (org-level) roles from the user
+                        usr_idx = model.add_user(user_id, user_name, user_email, u_full.get("platformRoles", []))
+                        model.add_membership(grp_idx, usr_idx)
+
+                group_base = f"{base_url}/{org_id}/directories/{dir_id}/groups/{grp_id}"
+                checkpoint.mark_group_done(dir_id, grp_id, keys=(f"{group_base}/role-assignments", f"{group_base}/users"))
+
+            checkpoint.mark_directory_done(dir_id, keys=(grp_url, usr_url, *user_group_urls.values()))
+    finally:
+        # Persist whatever completed so the next run can resume from here
+        checkpoint.close()
+        journal.close()
+
+    changes = None
+    if directories:
+        with tracer.span("build DataFrame", rows=len(model)):
+            df = model.hierarchy_frame()
+        snapshot.compact(df, snapshot.SNAPSHOT_FORMATS[snapshot_format])
+        if write_index:
+            with tracer.span("write audit index"):
+                audit_index.write_model(model)
+        validators.save()
+        checkpoint.clear()
+
+        if incremental and previous_rows:
+            with tracer.span("build delta"):
+                changes = delta.build_delta(
+                    previous_rows, df.to_dict("records"),
+                    snapshot.roles_from_entries(previous_rows), model.roles_frame().to_dict("records")
+                )
+                delta.write_delta(changes)
+
+    metrics = {
+        "org_id": org_id,
+        "started": started,
+        "duration_seconds": round(time.time() - started, 3),
+        "directories": len(model.directories),
+        "groups": len(model.groups),
+        "users": len(model.users),
+        "memberships": len(model),
+        "listings_not_modified": validators.stats["not_modified"],
+        "listings_modified": validators.stats["modified"],
+        "plan": plan.to_dict(),
+    }
+    # A wrong or unreachable org lists no directories; report it instead of an empty success
+    if directory_errors:
+        metrics["error"] = f"directories listing failed: {directory_errors[0]}"
+    elif not directories:
+        metrics["error"] = "no directories found"
+    limiter = client.get_rate_limiter()
+    if limiter is not None:
+        metrics["rate_limiter"] = limiter.snapshot()
+    metrics["requests"] = request_metrics.to_json()
+    write_metrics(metrics)
+    write_prometheus(request_metrics.to_prometheus())
+    return CrawlResult(model, directories, changes, dict(validators.stats), metrics, plan)
+
+
+def write_metrics(metrics, path=METRICS_PATH):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(metrics, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def write_prometheus(text, path=PROMETHEUS_PATH):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def read_metrics(path=METRICS_PATH):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def load_secrets(path=SECRETS_PATH):
+    try:
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def configured_orgs(secrets):
+    """``[[orgs]]`` entries of secrets.toml, or the single ``[api]`` org."""
+    orgs = [dict(o) for o in secrets.get("orgs", [])]
+    if not orgs and "api" in secrets:
+        orgs = [dict(secrets["api"])]
+    for org in orgs:
+        org.setdefault("name", org["org_id"])
+    return orgs
+
+
+def _crawl_org(org, root, client_options, crawl_options, log_level):
+    """Worker process: crawl one org inside ``root/orgs/<name>/``."""
+    work_dir = os.path.join(root, ORGS_DIR, org["name"])
+    os.makedirs(work_dir, exist_ok=True)
+    # Every snapshot / checkpoint / metrics path is relative, so they all land in the org's directory
+    os.chdir(work_dir)
+    logging.basicConfig(level=log_level, format=f"%(asctime)s %(levelname)s [{org['name']}] %(message)s")
+    # A fresh process: own connection pool and rate limiter budget
+    client.configure(**client_options)
+    result = crawl(org["api_key"], org["org_id"], **crawl_options)
+    path = snapshot.SNAPSHOT_FORMATS[crawl_options.get("snapshot_format", "json")]
+    return (os.path.join(work_dir, path) if result.directories else None), result.metrics
+
+
+def merge_org_snapshots(paths, orgs, out_path):
+    """Concatenate per-org snapshots with leading ``orgName`` / ``orgId`` columns."""
+    org_ids = {org["name"]: org["org_id"] for org in orgs}
+    frames = []
+    for name, path in paths.items():
+        frame = snapshot.read_frame(path)
+        frame.insert(0, "orgId", org_ids[name])
+        frame.insert(0, "orgName", name)
+        frames.append(frame.astype(object))
+    if not frames:
+        return None
+    merged = pd.concat(frames, ignore_index=True)
+    snapshot.write_snapshot(merged, out_path)
+    return merged
+
+
+def crawl_orgs(orgs, processes=None, client_options=None, log_level=logging.INFO, **crawl_options):
+    """Crawl several orgs in parallel worker processes and merge their snapshots."""
+    started = time.time()
+    root = os.getcwd()
+    snapshots, org_metrics = {}, {}
+    processes = min(processes or len(orgs), len(orgs))
+    # spawn: no inherited sockets or limiter state. With fewer processes than orgs each
+    # process is replaced after one org; otherwise skip that (respawns slow down shutdown).
+    context = multiprocessing.get_context("spawn")
+    max_tasks = 1 if processes < len(orgs) else None
+    with ProcessPoolExecutor(max_workers=processes, mp_context=context, max_tasks_per_child=max_tasks) as pool:
+        futures = {
+            org["name"]: pool.submit(_crawl_org, org, root, client_options or {}, crawl_options, log_level)
+            for org in orgs
+        }
+        for name, future in futures.items():
+            try:
+                path, metrics = future.result()
+            except Exception as e:
+                log.error("[%s] crawl failed: %s", name, e)
+                org_metrics[name] = {"error": str(e)}
+                continue
+            org_metrics[name] = metrics
+            if "error" in metrics:
+                log.error("[%s] crawl failed: %s", name, metrics["error"])
+            if path:
+                snapshots[name] = path
+
+    fmt = crawl_options.get("snapshot_format", "json")
+    merged = merge_org_snapshots(snapshots, orgs, MERGED_SNAPSHOTS[fmt])
+    summary = {
+        "started": started,
+        "wall_seconds": round(time.time() - started, 3),
+        "sum_of_org_seconds": round(sum(m.get("duration_seconds", 0) for m in org_metrics.values()), 3),
+        "memberships": 0 if merged is None else len(merged),
+        "orgs": org_metrics,
+    }
+    write_metrics(summary, ALL_ORGS_METRICS_PATH)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--org-id", default=os.environ.get("ATLASSIAN_ORG_ID"))
+    parser.add_argument("--token", default=os.environ.get("ATLASSIAN_API_TOKEN"))
+    parser.add_argument("--format", choices=snapshot.available_formats(), default="json")
+    parser.add_argument("--incremental", action="store_true", help="conditional requests + hierarchy_delta.json")
+    parser.add_argument("--fresh", action="store_true", help="ignore an interrupted crawl's checkpoint")
+    parser.add_argument("--index", action="store_true", help=f"also write the SQLite audit index {audit_index.DB_PATH}")
+    parser.add_argument("--workers", type=int, default=DEFAULT_MAX_WORKERS)
+    parser.add_argument("--max-per-host", type=int, default=DEFAULT_MAX_WORKERS)
+    parser.add_argument("--rate-limit", type=float, default=10.0, help="max requests per second")
+    parser.add_argument("--all-orgs", action="store_true", help=f"crawl every [[orgs]] entry of {SECRETS_PATH} in parallel")
+    parser.add_argument("--processes", type=int, default=None, help="worker processes for --all-orgs (default: one per org)")
+    parser.add_argument("--trace", nargs="?", const=TRACE_PATH, default=None, metavar="PATH",
+                        help=f"record crawl phases as a Chrome / Perfetto trace (default {TRACE_PATH})")
+    parser.add_argument("--plan", action="store_true", help="list directories, groups and users, print the request budget and stop")
+    parser.add_argument("--keep-empty-groups", action="store_true", help="also fetch groups the listing reports with no members")
+    parser.add_argument("--user-side", action="store_true",
+                        help="allow fetching memberships per user (/users/{accountId}/groups) where that needs fewer requests")
+    parser.add_argument("--export", nargs="+", choices=exports.available_formats(), default=[], metavar="FORMAT",
+                        help=f"also stream hierarchy_data / roles_mapping to {exports.EXPORT_DIR}/ as {', '.join(exports.available_formats())}")
+    parser.add_argument("--verbose", "-v", action="store_true")
+    args = parser.parse_args(argv)
+
+    log_level = logging.DEBUG if args.verbose else logging.INFO
+    logging.basicConfig(level=log_level, format="%(asctime)s %(levelname)s %(message)s")
+    client_options = dict(
+        pool_size=max(client.DEFAULT_POOL_SIZE, args.max_per_host), max_per_host=args.max_per_host, rate_limit=args.rate_limit
+    )
+    crawl_options = dict(
+        max_workers=args.workers, incremental=args.incremental, resume=not args.fresh,
+        snapshot_format=args.format, write_index=args.index, trace_path=args.trace,
+        skip_empty_groups=not args.keep_empty_groups, user_side=args.user_side,
+    )
+
+    if args.all_orgs:
+        if args.plan or args.export:
+            parser.error("--plan and --export work on one org at a time")
+        orgs = configured_orgs(load_secrets())
+        if not orgs:
+            parser.error(f"no [[orgs]] (or [api]) entries in {SECRETS_PATH}")
+        summary = crawl_orgs(orgs, args.processes, client_options, log_level, **crawl_options)
+        for name, metrics in summary["orgs"].items():
+            log.info("[%s] %s", name, metrics.get("error") or f"{metrics['memberships']} memberships in {metrics['duration_seconds']:.1f}s")
+        log.info(
+            "%d orgs, %d memberships merged into %s; wall %.1fs (orgs summed %.1fs)",
+            len(orgs), summary["memberships"], MERGED_SNAPSHOTS[args.format], summary["wall_seconds"], summary["sum_of_org_seconds"],
+        )
+        return 0 if all("error" not in m for m in summary["orgs"].values()) else 1
+
+    secrets = load_secrets().get("api", {})
+    api_key = args.token or secrets.get("api_key")
+    org_id = args.org_id or secrets.get("org_id")
+    if not (api_key and org_id):
+        parser.error(f"an API token and org id are required (flags, environment or {SECRETS_PATH})")
+
+    client.configure(**client_options)
+    result = crawl(api_key, org_id, plan_only=args.plan, **crawl_options)
+    if args.plan:
+        for row in result.plan.rows():
+            log.info("%s", ", ".join(f"{k}: {v}" for k, v in row.items()))
+        return 0 if result.directories else 1
+    metrics = result.metrics
+    log.info(
+        "%d memberships, %d users, %d groups in %d directories; %.1fs",
+        metrics["memberships"], metrics["users"], metrics["groups"], metrics["directories"], metrics["duration_seconds"],
+    )
+    totals = metrics["requests"]["totals"]
+    log.info(
+        "%d requests, %.1f MB, %d throttled, %d retries, %.1fs sleeping",
+        totals["requests"], totals["bytes"] / 1e6, totals["throttled"], totals["retries"], totals["sleep_seconds"],
+    )
+    if args.export and result.directories:
+        log.info("exports written: %s", ", ".join(exports.export_model(result.model, args.export)))
+    if args.trace:
+        for row in get_tracer().summary():
+            log.info("phase %-18s %6d x  total %8.2fs  wall %8.2fs  max %8.1f ms",
+                     row["phase"], row["count"], row["total_s"], row["wall_s"], row["max_ms"])
+        log.info("trace written to %s (open in https://ui.perfetto.dev)", args.trace)
+    if result.changes:
+        log.info("delta: %s", {kind: {k: len(v) for k, v in c.items()} for kind, c in result.changes.items()})
+    if "error" in metrics:
+        log.error("crawl failed: %s", metrics["error"])
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""Incremental (delta) crawls against the previous snapshot.
+
+Every page fetched by the crawler records its ``ETag`` / ``Last-Modified``
+validators and its ``links.next`` cursor in ``crawl_validators.json``. An
+incremental crawl replays a group's listings with ``If-None-Match`` /
+``If-Modified-Since``; when every page answers ``304 Not Modified`` the
+group's roles or members are rebuilt from the previous snapshot instead of
+being downloaded again. Endpoints that do not send validators are simply
+fetched in full.
+
+After the crawl, only the added and removed membership and role rows are
+written to ``hierarchy_delta.json``.
+"""
+import json
+import os
+import threading
+
+import atlassian_client as client
+
+VALIDATORS_PATH = "crawl_validators.json"
+DELTA_PATH = "hierarchy_delta.json"
+
+
+class ValidatorStore:
+    """Per-page-URL validators: ``{url: {"etag", "last_modified", "next"}}``.
+
+    ``previous`` holds what the last completed crawl saved; ``current`` collects
+    this crawl's validators and is what gets saved alongside the new snapshot.
+    """
+
+    def __init__(self, path=VALIDATORS_PATH, load_previous=True):
+        self.path = path
+        self.previous = {}
+        self.current = {}
+        self.lock = threading.Lock()
+        self.stats = {"not_modified": 0, "modified": 0}
+        if load_previous and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.previous = json.load(f)
+
+    def record(self, url, resp, next_url):
+        etag = resp.headers.get("ETag")
+        last_modified = resp.headers.get("Last-Modified")
+        if etag or last_modified:
+            with self.lock:
+                self.current[url] = {"etag": etag, "last_modified": last_modified, "next": next_url}
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.current, f)
+        os.replace(tmp_path, self.path)
+
+
+def listing_unchanged(url, headers, store):
+    """Walk a listing with conditional GETs; True only if every page is a 304.
+
+    On success the pages' validators are carried over into ``store.current``.
+    """
+    chain = []
+    while url:
+        saved = store.previous.get(url)
+        if not saved:
+            return False
+        conditional = dict(headers)
+        if saved.get("etag"):
+            conditional["If-None-Match"] = saved["etag"]
+        if saved.get("last_modified"):
+            conditional["If-Modified-Since"] = saved["last_modified"]
+        resp = client.get(url, headers=conditional)
+        if resp.status_code != 304:
+            with store.lock:
+                store.stats["modified"] += 1
+            return False
+        chain.append((url, saved))
+        url = saved.get("next")
+    with store.lock:
+        store.stats["not_modified"] += 1
+        store.current.update(chain)
+    return True
+
+
+def group_rows(rows):
+    """Hierarchy rows keyed by ``(directoryId, groupId)``, preserving order."""
+    grouped = {}
+    for row in rows:
+        grouped.setdefault((row["directoryId"], row["groupId"]), []).append(row)
+    return grouped
+
+
+def roles_from_rows(rows):
+    """Role-assignment items equivalent to what the API returned for a group."""
+    if not rows:
+        return None
+    return [{"roleKey": r} for r in filter(None, (rows[0].get("notes") or "").split(", "))]
+
+
+def members_from_rows(rows):
+    """Group member items equivalent to what the API returned for a group."""
+    return [
+        {
+            "accountId": r["userId"],
+            "email": r["userEmail"],
+            "name": r["userName"],
+            "platformRoles": list(filter(None, (r.get("platformRoles") or "").split(", "))),
+        }
+        for r in rows
+    ]
+
+
+def _row_key(row):
+    return tuple(sorted(row.items()))
+
+
+def diff_rows(previous, current):
+    """Rows only in ``current`` (added) and only in ``previous`` (removed)."""
+    prev_keys = {_row_key(r) for r in previous}
+    curr_keys = {_row_key(r) for r in current}
+    return {
+        "added": [r for r in current if _row_key(r) not in prev_keys],
+        "removed": [r for r in previous if _row_key(r) not in curr_keys],
+    }
+
+
+def build_delta(previous_hierarchy, hierarchy, previous_roles, roles):
+    return {
+        "memberships": diff_rows(previous_hierarchy, hierarchy),
+        "roles": diff_rows(previous_roles, roles),
+    }
+
+
+def write_delta(delta, path=DELTA_PATH):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(delta, f, indent=2)
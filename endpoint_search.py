@@ -0,0 +1,126 @@
+"""Prefix and fuzzy search over the playground's API operations.
+
+Every operation is tokenized once: method, path segments, ``operationId``
+(camelCase split), summary words and parameter names. Tokens go into an
+inverted index with a sorted vocabulary for prefix lookups (``bisect``) and a
+trigram index for typo-tolerant matches, so a query touches only the tokens
+it could match instead of every operation.
+"""
+import re
+from bisect import bisect_left
+from difflib import SequenceMatcher
+
+# Field weights: a hit in the path or operationId ranks above one in the summary
+FIELD_WEIGHTS = {"method": 2.0, "path": 3.0, "operation": 3.0, "param": 1.5, "summary": 1.0}
+EXACT, PREFIX, FUZZY = 1.0, 0.7, 0.5
+MIN_FUZZY_RATIO = 0.75
+MAX_RESULTS = 50
+
+_WORD = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+
+
+def tokenize(text):
+    """Lower-case words, splitting camelCase, snake_case, paths and punctuation."""
+    return [w.lower() for w in _WORD.findall(text or "")]
+
+
+def _trigrams(token):
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def endpoint_label(ep):
+    return f"{ep['method']} {ep['path']}"
+
+
+class EndpointSearch:
+    def __init__(self, endpoints):
+        self.endpoints = []
+        self.postings = {}  # token -> {endpoint idx: field weight}
+        seen = set()
+        for ep in endpoints:
+            key = (ep["method"], ep["path"], ep["server_url"])
+            if key in seen:  # operations with several tags are listed once
+                continue
+            seen.add(key)
+            idx = len(self.endpoints)
+            self.endpoints.append(ep)
+            details = ep["details"]
+            fields = {
+                "method": [ep["method"].lower()],
+                "path": tokenize(ep["path"]),
+                "operation": tokenize(details.get("operationId")),
+                "param": [t for p in details.get("parameters", []) if isinstance(p, dict) for t in tokenize(p.get("name"))],
+                "summary": tokenize(details.get("summary")),
+            }
+            for field, tokens in fields.items():
+                weight = FIELD_WEIGHTS[field]
+                for token in tokens:
+                    hits = self.postings.setdefault(token, {})
+                    if hits.get(idx, 0) < weight:
+                        hits[idx] = weight
+        self.vocabulary = sorted(self.postings)
+        self.trigrams = {}
+        for token in self.vocabulary:
+            for gram in _trigrams(token):
+                self.trigrams.setdefault(gram, []).append(token)
+
+    def __len__(self):
+        return len(self.endpoints)
+
+    def _prefixed(self, term):
+        start = bisect_left(self.vocabulary, term)
+        for token in self.vocabulary[start:]:
+            if not token.startswith(term):
+                break
+            yield token
+
+    def _fuzzy(self, term):
+        grams = _trigrams(term)
+        shared = {}
+        for gram in grams:
+            for token in self.trigrams.get(gram, ()):
+                shared[token] = shared.get(token, 0) + 1
+        # Only score tokens sharing a fair number of trigrams with the term
+        floor = max(1, len(grams) // 3)
+        for token, count in shared.items():
+            if count >= floor:
+                ratio = SequenceMatcher(None, term, token).ratio()
+                if ratio >= MIN_FUZZY_RATIO:
+                    yield token, ratio
+
+    def _term_scores(self, term):
+        scores = {}
+
+        def add(token, quality):
+            for idx, weight in self.postings[token].items():
+                score = weight * quality
+                if scores.get(idx, 0) < score:
+                    scores[idx] = score
+
+        if term in self.postings:
+            add(term, EXACT)
+        for token in self._prefixed(term):
+            if token != term:
+                add(token, PREFIX)
+        if not scores:
+            for token, ratio in self._fuzzy(term):
+                add(token, FUZZY * ratio)
+        return scores
+
+    def search(self, query, limit=MAX_RESULTS):
+        """Endpoints matching every query term, best first."""
+        terms = tokenize(query)
+        if not terms:
+            return []
+        totals = None
+        for term in terms:
+            scores = self._term_scores(term)
+            if totals is None:
+                totals = scores
+            else:
+                totals = {idx: totals[idx] + s for idx, s in scores.items() if idx in totals}
+            if not totals:
+                return []
+        ranked = sorted(totals, key=lambda idx: (-totals[idx], len(self.endpoints[idx]["path"]), idx))
+        return [self.endpoints[idx] for idx in ranked[:limit]]
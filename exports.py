@@ -0,0 +1,142 @@
+"""Chunked, compressed table exports: CSV, NDJSON (optionally gzipped) and Parquet.
+
+Tables are written ``CHUNK_ROWS`` rows at a time straight into the output
+file (through ``gzip`` for ``.gz`` formats, or as Parquet row groups), so an
+export never builds the whole CSV / JSON payload as one string. Files are
+written to a temporary name and renamed into place. The download buttons pass
+a callable to ``st.download_button``, so nothing is generated until the
+button is clicked and only the compressed file is handed to Streamlit.
+
+Parquet needs ``pyarrow``; ``available_formats()`` leaves it out otherwise.
+"""
+import gzip
+import io
+import json
+import os
+import tempfile
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+EXPORT_DIR = os.environ.get("EXPORT_DIR", "exports")
+CHUNK_ROWS = 50_000
+EXPORT_FORMATS = {
+    "csv.gz": "application/gzip",
+    "ndjson.gz": "application/gzip",
+    "parquet": "application/vnd.apache.parquet",
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+DEFAULT_FORMAT = "csv.gz"
+
+
+def available_formats():
+    return [fmt for fmt in EXPORT_FORMATS if fmt != "parquet" or pq is not None]
+
+
+def mime_type(fmt):
+    return EXPORT_FORMATS[fmt]
+
+
+def format_of(path):
+    for fmt in sorted(EXPORT_FORMATS, key=len, reverse=True):
+        if path.endswith(f".{fmt}"):
+            return fmt
+    raise ValueError(f"Unknown export format for {path}; expected one of {', '.join(EXPORT_FORMATS)}")
+
+
+def iter_chunks(data, chunk_rows=CHUNK_ROWS):
+    """Slices of a DataFrame, or the frames of an iterable of DataFrames, aligned to the first one's columns."""
+    if isinstance(data, pd.DataFrame):
+        for start in range(0, max(len(data), 1), chunk_rows):
+            yield data.iloc[start:start + chunk_rows]
+        return
+    columns = None
+    for frame in data:
+        if columns is None:
+            columns = frame.columns
+        yield frame.reindex(columns=columns)
+
+
+def _flatten_nested(chunk):
+    """Nested dicts / lists (API responses) as JSON text, so every Parquet chunk has the same schema."""
+    chunk = chunk.copy()
+    for column in chunk.columns[chunk.dtypes == object]:
+        if chunk[column].map(lambda v: isinstance(v, (dict, list))).any():
+            chunk[column] = chunk[column].map(lambda v: json.dumps(v) if isinstance(v, (dict, list)) else v)
+    return chunk
+
+
+def _write_text(chunks, f, fmt):
+    for i, chunk in enumerate(chunks):
+        if fmt.startswith("csv"):
+            chunk.to_csv(f, header=i == 0, index=False)
+        elif len(chunk):
+            chunk.to_json(f, orient="records", lines=True, force_ascii=False)
+
+
+def _write_parquet(chunks, path):
+    writer = None
+    try:
+        for chunk in chunks:
+            chunk = _flatten_nested(chunk).astype({c: "string" for c in chunk.columns[chunk.dtypes == object]})
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema, compression="zstd")
+            writer.write_table(table.cast(writer.schema))
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def write_export(data, path, fmt=None, chunk_rows=CHUNK_ROWS):
+    """Write ``data`` (a DataFrame or an iterable of DataFrames) to ``path`` chunk by chunk."""
+    fmt = fmt or format_of(path)
+    tmp_path = f"{path}.tmp"
+    chunks = iter_chunks(data, chunk_rows)
+    if fmt == "parquet":
+        if pq is None:
+            raise RuntimeError("Parquet exports need pyarrow: pip install pyarrow")
+        _write_parquet(chunks, tmp_path)
+    elif fmt.endswith(".gz"):
+        # mtime=0 and no file name keep the bytes identical for identical data
+        with open(tmp_path, "wb") as raw, gzip.GzipFile(filename="", fileobj=raw, mode="wb", compresslevel=6, mtime=0) as gz:
+            with io.TextIOWrapper(gz, encoding="utf-8", newline="") as f:
+                _write_text(chunks, f, fmt)
+    else:
+        with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+            _write_text(chunks, f, fmt)
+    os.replace(tmp_path, path)
+    return path
+
+
+def export_file(data, name, fmt=DEFAULT_FORMAT, directory=EXPORT_DIR, chunk_rows=CHUNK_ROWS):
+    """Write ``<directory>/<name>.<fmt>`` and return its path."""
+    os.makedirs(directory, exist_ok=True)
+    return write_export(data, os.path.join(directory, f"{name}.{fmt}"), fmt, chunk_rows)
+
+
+def file_reader(data, name, fmt=DEFAULT_FORMAT):
+    """Zero-argument callable for ``st.download_button(data=...)``: exports on click, returns the file's bytes.
+
+    The file goes to a private temporary directory, so concurrent sessions don't share it.
+    """
+    def build():
+        with tempfile.TemporaryDirectory(prefix="export-") as directory:
+            with open(export_file(data, name, fmt, directory), "rb") as f:
+                return f.read()
+    return build
+
+
+def export_model(model, formats, directory=EXPORT_DIR, chunk_rows=CHUNK_ROWS):
+    """Stream a ``HierarchyModel``'s ``hierarchy_data`` and ``roles_mapping`` tables in each format; returns the paths."""
+    paths = []
+    for fmt in formats:
+        paths.append(export_file(model.iter_hierarchy_frames(chunk_rows), "hierarchy_data", fmt, directory, chunk_rows))
+        paths.append(export_file(model.iter_roles_frames(chunk_rows), "roles_mapping", fmt, directory, chunk_rows))
+    return paths
@@ -5,8 +5,7 @@ import matplotlib.pyplot as plt
 import ausankey as ask
 import requests
 import time
-import json
-import os
+import snapshot
 
 st.set_page_config(page_title="A9 Hierarchy Crawler", layout="wide")
 st.image("https://a9group.net/a9logo.png", width=200)
@@ -17,10 +16,6 @@ def extract_guid(urn_id: str) -> str:
         return urn_id.split(":")[-1]
     return urn_id
 
-def save_hierarchy_to_json(data, filename="hierarchy_data.json"):
-    with open(filename, "w") as f:
-        json.dump(data, f, indent=2)
-
 if "api" in st.secrets:
     api_key = st.secrets["api"]["api_key"]
     org_id = st.secrets["api"]["org_id"]
@@ -42,10 +37,12 @@ if st.button("🚀 Start Crawl"):
     hierarchy_data = []
     roles_mapping = []
 
-    if os.path.exists("hierarchy_data.json"):
-        with open("hierarchy_data.json", "r") as f:
-            hierarchy_data = json.load(f)
+    if snapshot.snapshot_exists():
+        # The last snapshot plus any rows journaled by an interrupted crawl
+        hierarchy_data = snapshot.read_snapshot(snapshot.SNAPSHOT_PATH) + snapshot.read_journal()
         st.info("Loaded existing hierarchy snapshot (continuing from last state).")
+    # Rows are appended to hierarchy_data.jsonl and compacted once at the end
+    journal = snapshot.SnapshotJournal()
 
     dir_url = f"{base_url}/{org_id}/directories"
     dirs_resp = requests.get(dir_url, headers=headers).json()
@@ -139,7 +136,7 @@ if st.button("🚀 Start Crawl"):
                         "platformRoles": platform_roles
                     }
                     hierarchy_data.append(entry)
-                    save_hierarchy_to_json(hierarchy_data)
+                    journal.append(entry)
 
                     for r in role_names:
                         roles_mapping.append({
@@ -161,6 +158,9 @@ if st.button("🚀 Start Crawl"):
                             "roleKey": p_role
                         })
 
+    journal.close()
+    snapshot.compact(hierarchy_data)
+
     df = pd.DataFrame(hierarchy_data)
     roles_df = pd.DataFrame(roles_mapping)
 
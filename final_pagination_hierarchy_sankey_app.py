@@ -3,10 +3,9 @@ import streamlit as st
 import pandas as pd
 import matplotlib.pyplot as plt
 import ausankey as ask
-import requests
-import time
-import json
-import os
+import atlassian_client as client
+import snapshot
+from pagination import iter_pages
 
 st.set_page_config(page_title="A9 Hierarchy Crawler", layout="wide")
 st.image("https://a9group.net/a9logo.png", width=200)
@@ -17,10 +16,6 @@ def extract_guid(urn_id: str) -> str:
         return urn_id.split(":")[-1]
     return urn_id
 
-def save_hierarchy_to_json(data, filename="hierarchy_data.json"):
-    with open(filename, "w") as f:
-        json.dump(data, f, indent=2)
-
 if "api" in st.secrets:
     api_key = st.secrets["api"]["api_key"]
     org_id = st.secrets["api"]["org_id"]
@@ -29,38 +24,26 @@ else:
     api_key = st.sidebar.text_input("🔑 API Token (Bearer)", type="password")
     org_id = st.sidebar.text_input("🏢 Organization ID")
 
-delay = st.number_input("⏳ Delay between requests (seconds)", min_value=0.5, max_value=5.0, value=1.0, step=0.5)
+rate_limit = st.number_input("⏳ Max requests per second", min_value=0.5, max_value=100.0, value=10.0, step=0.5,
+                             help="Ceiling for the shared adaptive rate limiter; it backs off on 429 / Retry-After automatically.")
+client.configure(rate_limit=rate_limit)
 debug = st.checkbox("🐞 Show Debug Output", value=True)
 
 
-def paginate(url, headers, debug):
-    results = []
-    while url:
-        resp = requests.get(url, headers=headers)
-        if resp.status_code != 200:
-            if debug:
-                st.error(f"Request failed: {resp.status_code} {resp.text}")
-            break
-        resp_json = resp.json()
-        data = resp_json.get("data", [])
-        results.extend(data)
+def iter_listing(url, headers, debug):
+    """Items of a listing, page by page, through the shared rate-limited client."""
+    def on_error(page_url, resp):
         if debug:
-            st.write(f"➡️ Pagination URL: {resp.url}")
-            st.json(resp_json)
-        next_link = resp_json.get("links", {}).get("next")
-        if next_link:
-            if next_link.startswith("http"):
-                url = next_link
-            else:
-                base = url.split("?")[0]
-                if next_link.startswith("?"):
-                    url = base + next_link
-                else:
-                    url = f"{base}?cursor={next_link}"
-            time.sleep(delay)
-        else:
-            url = None
-    return results
+            st.error(f"Request failed: {resp.status_code} {resp.text}")
+
+    for page in iter_pages(url, headers, on_error=on_error):
+        if debug:
+            st.write(f"➡️ Pagination URL: {page.url} ({len(page.items)} items)")
+        yield from page.items
+
+
+def paginate(url, headers, debug):
+    return list(iter_listing(url, headers, debug))
 
 if st.button("🚀 Start Crawl"):
     headers = {
@@ -72,10 +55,12 @@ if st.button("🚀 Start Crawl"):
     hierarchy_data = []
     roles_mapping = []
 
-    if os.path.exists("hierarchy_data.json"):
-        with open("hierarchy_data.json", "r") as f:
-            hierarchy_data = json.load(f)
+    if snapshot.snapshot_exists():
+        # The last snapshot plus any rows journaled by an interrupted crawl
+        hierarchy_data = snapshot.read_snapshot(snapshot.SNAPSHOT_PATH) + snapshot.read_journal()
         st.info("Loaded existing hierarchy snapshot (continuing from last state).")
+    # Rows are appended to hierarchy_data.jsonl and compacted once at the end
+    journal = snapshot.SnapshotJournal()
 
     # Fetch all directories with pagination
     dir_url = f"{base_url}/{org_id}/directories"
@@ -99,8 +84,7 @@ if st.button("🚀 Start Crawl"):
 
             # Fetch users with pagination (directory-wide)
             usr_url = f"{base_url}/{org_id}/directories/{dir_id}/users"
-            users = paginate(usr_url, headers, debug)
-            user_map = {extract_guid(u.get("accountId")): u for u in users}
+            user_map = {extract_guid(u.get("accountId")): u for u in iter_listing(usr_url, headers, debug)}
 
             for g in groups:
                 grp_id = extract_guid(g.get("id"))
@@ -118,9 +102,7 @@ if st.button("🚀 Start Crawl"):
 
                 # Fetch members of the group to avoid creating a cross-product
                 grp_users_url = f"{base_url}/{org_id}/directories/{dir_id}/groups/{grp_id}/users"
-                group_users = paginate(grp_users_url, headers, debug)
-
-                for u in group_users:
+                for u in iter_listing(grp_users_url, headers, debug):
                     user_id = extract_guid(u.get("accountId"))
                     if not user_id:
                         continue
@@ -149,7 +131,7 @@ if st.button("🚀 Start Crawl"):
                         "platformRoles": platform_roles
                     }
                     hierarchy_data.append(entry)
-                    save_hierarchy_to_json(hierarchy_data)
+                    journal.append(entry)
 
                     for r in role_names:
                         roles_mapping.append({
@@ -171,6 +153,9 @@ if st.button("🚀 Start Crawl"):
                             "roleKey": p_role
                         })
 
+    journal.close()
+    snapshot.compact(hierarchy_data)
+
     df = pd.DataFrame(hierarchy_data)
     roles_df = pd.DataFrame(roles_mapping)
 
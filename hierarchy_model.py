@@ -0,0 +1,225 @@
+"""Normalized in-memory model of a crawled org hierarchy.
+
+Directories, groups, users and role keys are each stored once in their own
+table; memberships (group -> user), group role assignments (group -> role)
+and platform roles (user -> role) are integer edge lists. The flat
+``hierarchy_data`` / ``roles_mapping`` frames the app displays are derived on
+demand, and membership queries are index lookups instead of DataFrame scans.
+"""
+from array import array
+
+import numpy as np
+import pandas as pd
+
+HIERARCHY_COLUMNS = [
+    "directoryId", "directoryName", "groupId", "groupName",
+    "userId", "userName", "userEmail", "notes", "platformRoles",
+]
+ROLE_COLUMNS = ["userId", "userName", "userEmail", "groupId", "groupName", "roleKey"]
+ORG_LEVEL_GROUP = ("ORG-LEVEL", "Organization-wide")
+
+
+class _Interned:
+    """Append-only table that stores each distinct key once."""
+
+    def __init__(self):
+        self.rows = []
+        self.index = {}
+
+    def add(self, key, row=None):
+        idx = self.index.get(key)
+        if idx is None:
+            idx = self.index[key] = len(self.rows)
+            self.rows.append(key if row is None else row)
+        return idx
+
+    def __len__(self):
+        return len(self.rows)
+
+
+def _edges_by(source, target, size):
+    """CSR-style index: targets grouped by source, plus per-source offsets."""
+    order = np.argsort(source, kind="stable")
+    offsets = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(source, minlength=size), out=offsets[1:])
+    return target[order], offsets
+
+
+class HierarchyModel:
+    def __init__(self):
+        self.directories = _Interned()  # (directoryId, directoryName)
+        self.groups = _Interned()       # (directory idx, groupId, groupName, role idx tuple)
+        self.users = _Interned()        # (userId, userName, userEmail, platform role idx tuple)
+        self.roles = _Interned()        # roleKey
+        self.member_group = array("i")
+        self.member_user = array("i")
+        self._indexes = None
+
+    # --- building ---
+
+    def add_directory(self, directory_id, name):
+        return self.directories.add(directory_id, (directory_id, name))
+
+    def add_group(self, directory_idx, group_id, name, role_keys=()):
+        role_idx = tuple(self.roles.add(r) for r in role_keys)
+        return self.groups.add((directory_idx, group_id), (directory_idx, group_id, name, role_idx))
+
+    def add_user(self, user_id, name, email, platform_roles=()):
+        role_idx = tuple(self.roles.add(r) for r in platform_roles)
+        return self.users.add((user_id, name, email, role_idx))
+
+    def add_membership(self, group_idx, user_idx):
+        self.member_group.append(group_idx)
+        self.member_user.append(user_idx)
+        self._indexes = None
+
+    def add_rows(self, rows):
+        """Load flat hierarchy rows (snapshot / journal entries)."""
+        for row in rows:
+            d = self.add_directory(row["directoryId"], row["directoryName"])
+            g = self.add_group(d, row["groupId"], row["groupName"], filter(None, (row.get("notes") or "").split(", ")))
+            u = self.add_user(row["userId"], row["userName"], row["userEmail"],
+                              filter(None, (row.get("platformRoles") or "").split(", ")))
+            self.add_membership(g, u)
+        return self
+
+    @classmethod
+    def from_rows(cls, rows):
+        return cls().add_rows(rows)
+
+    def __len__(self):
+        return len(self.member_group)
+
+    # --- flat views ---
+
+    def _membership_arrays(self):
+        return np.frombuffer(self.member_group, dtype=np.int32), np.frombuffer(self.member_user, dtype=np.int32)
+
+    def _lookup_columns(self):
+        """Per-group and per-user column arrays; memberships index into them."""
+        role_keys = self.roles.rows
+        dirs = self.directories.rows
+        group_rows = [
+            (*dirs[d], gid, name, ", ".join(role_keys[r] for r in roles)) for d, gid, name, roles in self.groups.rows
+        ]
+        user_rows = [
+            (uid, name, email, ", ".join(role_keys[r] for r in roles)) for uid, name, email, roles in self.users.rows
+        ]
+        groups = pd.DataFrame(group_rows, columns=["directoryId", "directoryName", "groupId", "groupName", "notes"])
+        users = pd.DataFrame(user_rows, columns=["userId", "userName", "userEmail", "platformRoles"])
+        return {c: groups[c].array for c in groups.columns}, {c: users[c].array for c in users.columns}
+
+    def _hierarchy_slice(self, lookups, start, stop):
+        g, u = self._membership_arrays()
+        g, u = g[start:stop], u[start:stop]
+        if not len(g):
+            return pd.DataFrame(columns=HIERARCHY_COLUMNS)
+        group_columns, user_columns = lookups
+        columns = {c: values.take(g) for c, values in group_columns.items()}
+        columns.update((c, values.take(u)) for c, values in user_columns.items())
+        return pd.DataFrame(columns)[HIERARCHY_COLUMNS]
+
+    def hierarchy_frame(self, start=0, stop=None):
+        """One row per membership, identical to the crawler's ``hierarchy_data``.
+
+        ``start`` / ``stop`` select a slice of the memberships (see ``iter_hierarchy_frames``).
+        """
+        if not len(self):
+            return pd.DataFrame(columns=HIERARCHY_COLUMNS)
+        return self._hierarchy_slice(self._lookup_columns(), start, stop)
+
+    def iter_hierarchy_frames(self, chunk_rows):
+        """``hierarchy_frame`` in slices of ``chunk_rows`` memberships, for streaming exports.
+
+        The group and user columns are built once; each chunk only slices the memberships.
+        """
+        if not len(self):
+            yield self.hierarchy_frame()
+            return
+        lookups = self._lookup_columns()
+        for start in range(0, len(self), chunk_rows):
+            yield self._hierarchy_slice(lookups, start, start + chunk_rows)
+
+    def _role_rows(self):
+        role_keys = self.roles.rows
+        for g, u in zip(self.member_group, self.member_user):
+            _, group_id, group_name, group_roles = self.groups.rows[g]
+            user_id, user_name, user_email, platform_roles = self.users.rows[u]
+            for r in group_roles:
+                yield user_id, user_name, user_email, group_id, group_name, role_keys[r]
+            for r in platform_roles:
+                yield user_id, user_name, user_email, *ORG_LEVEL_GROUP, role_keys[r]
+
+    def roles_frame(self):
+        """Group roles then platform roles for each membership, as ``roles_mapping``."""
+        return pd.DataFrame(list(self._role_rows()), columns=ROLE_COLUMNS)
+
+    def iter_roles_frames(self, chunk_rows):
+        """``roles_frame`` in frames of at most ``chunk_rows`` rows, for streaming exports."""
+        rows, emitted = [], False
+        for row in self._role_rows():
+            rows.append(row)
+            if len(rows) == chunk_rows:
+                yield pd.DataFrame(rows, columns=ROLE_COLUMNS)
+                rows, emitted = [], True
+        if rows or not emitted:
+            yield pd.DataFrame(rows, columns=ROLE_COLUMNS)
+
+    # --- index lookups ---
+
+    def _build_indexes(self):
+        if self._indexes is None:
+            g, u = self._membership_arrays()
+            user_ids, groups_by_role, users_by_platform_role = {}, {}, {}
+            for idx, (user_id, _, _, platform_roles) in enumerate(self.users.rows):
+                user_ids.setdefault(user_id, []).append(idx)
+                for r in platform_roles:
+                    users_by_platform_role.setdefault(r, []).append(idx)
+            for idx, (_, _, _, roles) in enumerate(self.groups.rows):
+                for r in roles:
+                    groups_by_role.setdefault(r, []).append(idx)
+            self._indexes = {
+                "users_by_group": _edges_by(g, u, len(self.groups)),
+                "groups_by_user": _edges_by(u, g, len(self.users)),
+                "user_ids": user_ids,
+                "groups_by_role": groups_by_role,
+                "users_by_platform_role": users_by_platform_role,
+            }
+        return self._indexes
+
+    def _lookup(self, name, idx):
+        targets, offsets = self._build_indexes()[name]
+        return targets[offsets[idx]:offsets[idx + 1]]
+
+    def _group_info(self, g):
+        d, group_id, name, _ = self.groups.rows[g]
+        return self.directories.rows[d][0], group_id, name
+
+    def groups_of_user(self, user_id):
+        """``(directoryId, groupId, groupName)`` for every group the user is in."""
+        return [
+            self._group_info(g)
+            for u in self._build_indexes()["user_ids"].get(user_id, [])
+            for g in self._lookup("groups_by_user", u)
+        ]
+
+    def members_of_group(self, directory_id, group_id):
+        """``(userId, userEmail)`` for every member of a group."""
+        g = self.groups.index.get((self.directories.index.get(directory_id), group_id))
+        if g is None:
+            return []
+        return [(self.users.rows[u][0], self.users.rows[u][2]) for u in self._lookup("users_by_group", g)]
+
+    def groups_granting(self, role_key):
+        """``(directoryId, groupId, groupName)`` for groups assigned ``role_key``."""
+        r = self.roles.index.get(role_key)
+        return [self._group_info(g) for g in self._build_indexes()["groups_by_role"].get(r, [])]
+
+    def users_with_role(self, role_key):
+        """User ids holding ``role_key`` through a group or as a platform role."""
+        r = self.roles.index.get(role_key)
+        indexes = self._build_indexes()
+        holders = {self.users.rows[u][0] for u in indexes["users_by_platform_role"].get(r, [])}
+        for g in indexes["groups_by_role"].get(r, []):
+            holders.update(self.users.rows[u][0] for u in self._lookup("users_by_group", g))
+        return holders
@@ -1,12 +1,22 @@
 
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-import ausankey as ask
-import requests
-import time
+import atlassian_client as client
 import json
 import os
+import time
+import snapshot
+import delta
+import audit_index
+import exports
+import crawler
+from concurrent.futures import ThreadPoolExecutor, wait
+from request_metrics import get_metrics
+from tracing import get_tracer
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from crawl_engine import DEFAULT_MAX_WORKERS
+from sankey_frames import drill_down, level_of_detail, membership_sankey_frame, role_sankey_frame
+from sankey_render import submit_render
 
 st.set_page_config(page_title="A9 Hierarchy Crawler", layout="wide")
 st.image("https://a9group.net/a9logo.png", width=200)
@@ -16,10 +26,10 @@ st.title("🔍 A9 Hierarchy Crawler & Sankey View")
 st.markdown("""
 **Setup:**  
 - This app requires an Atlassian API Token and your Organization ID (provided in `.streamlit/secrets.toml` or entered in the sidebar).  
-- It creates a snapshot file `hierarchy_data.json` to save crawl progress.  
-- You can delete this file to start fresh:  
+- It journals crawl progress to `hierarchy_data.jsonl` and compacts it into the snapshot `hierarchy_data.json` when the crawl finishes.  
+- You can delete these files to start fresh:  
 ```bash
-rm hierarchy_data.json
+rm hierarchy_data.json hierarchy_data.jsonl
 ```
 """)
 
@@ -33,15 +43,6 @@ st.markdown("""
 ---
 """)
 
-def extract_guid(urn_id: str) -> str:
-    if urn_id and ":" in urn_id:
-        return urn_id.split(":")[-1]
-    return urn_id
-
-def save_hierarchy_to_json(data, filename="hierarchy_data.json"):
-    with open(filename, "w") as f:
-        json.dump(data, f, indent=2)
-
 if "api" in st.secrets:
     api_key = st.secrets["api"]["api_key"]
     org_id = st.secrets["api"]["org_id"]
@@ -50,191 +51,258 @@ else:
     api_key = st.sidebar.text_input("🔑 API Token (Bearer)", type="password")
     org_id = st.sidebar.text_input("🏢 Organization ID")
 
-delay = st.number_input("⏳ Delay between requests (seconds)", min_value=0.5, max_value=5.0, value=1.0, step=0.5)
+rate_limit = st.number_input("⏳ Max requests per second", min_value=0.5, max_value=100.0, value=10.0, step=0.5,
+                             help="Ceiling for the adaptive rate limiter; it backs off on 429 / Retry-After automatically.")
 debug = st.checkbox("🐞 Show Debug Output", value=False)
-
-
-def paginate(url, headers, debug):
-    results = []
-    while url:
-        resp = requests.get(url, headers=headers)
-        if resp.status_code != 200:
-            if debug:
-                st.error(f"Request failed: {resp.status_code} {resp.text}")
-            break
-        resp_json = resp.json()
-        data = resp_json.get("data", [])
-        results.extend(data)
+snapshot_format = st.selectbox("💽 Snapshot format", snapshot.available_formats(),
+                               help="Parquet / Arrow store repeated columns dictionary-encoded and load straight into a DataFrame (requires pyarrow).")
+export_format = st.selectbox("📤 Export format", exports.available_formats(),
+                             help="Downloads are written in chunks to a compressed file when the button is clicked instead of being built in memory on every rerun.")
+incremental = st.checkbox("🔁 Incremental (delta) crawl", value=False,
+                          help="Send conditional requests (ETag / If-None-Match) and reuse unchanged groups from the previous snapshot; writes only added/removed rows to hierarchy_delta.json.")
+resume = st.checkbox("♻️ Resume interrupted crawl", value=True,
+                     help="Skip directories/groups already completed by an interrupted crawl and continue paginations from their saved cursors.")
+profile = st.checkbox("⏱️ Record profiling trace", value=False,
+                      help="Time the crawl phases, snapshot writes, DataFrame construction and Sankey rendering of this run; shows a per-phase table and a Chrome / Perfetto trace to download.")
+tracer = get_tracer()
+if profile:
+    tracer.enable()
+skip_empty_groups = st.checkbox("🧮 Skip empty groups", value=True,
+                                help="Don't fetch members / role assignments of groups the group listing reports with no members.")
+user_side = st.checkbox("👤 Allow per-user membership fetch", value=False,
+                        help="Where it needs fewer requests (few users, many groups), fetch each user's groups (/users/{accountId}/groups) instead of each group's members.")
+write_index = st.checkbox("🗄️ Write SQLite audit index", value=False,
+                          help=f"Also store the crawl in {audit_index.DB_PATH} (indexed by user, group, role and email) for the audit query panel below.")
+st.sidebar.subheader("🔗 Sankey detail")
+top_groups = st.sidebar.number_input("Top groups (0 = all)", min_value=0, max_value=500, value=25, step=5)
+top_users = st.sidebar.number_input("Top users (0 = all)", min_value=0, max_value=2000, value=50, step=10)
+collapse_users = st.sidebar.checkbox("Collapse users into counts", value=False)
+drill_directory = st.sidebar.text_input("Drill into directory (name)", "")
+drill_group = st.sidebar.text_input("Drill into group (name)", "")
+
+max_workers = st.sidebar.number_input("⚡ Concurrent group requests", min_value=1, max_value=32, value=DEFAULT_MAX_WORKERS, step=1)
+max_per_host = st.sidebar.number_input("🔌 Max in-flight requests per host", min_value=1, max_value=64, value=DEFAULT_MAX_WORKERS, step=1)
+client.configure(pool_size=max(client.DEFAULT_POOL_SIZE, max_per_host), max_per_host=max_per_host, rate_limit=rate_limit)
+
+
+def show_request_metrics(container, request_metrics):
+    """Totals, per-endpoint table and (in debug mode) the most recent requests."""
+    with container.container():
+        totals = request_metrics.totals()
+        st.caption(
+            f"📈 {totals['requests']} requests in {totals['elapsed_seconds']:.0f}s, {totals['bytes'] / 1e6:.2f} MB, "
+            f"{totals['throttled']} throttled (429), {totals['retries']} retries, {totals['sleep_seconds']:.1f}s sleeping"
+        )
+        summary = request_metrics.summary()
+        if summary:
+            st.dataframe(pd.DataFrame(summary))
         if debug:
-            st.write(f"➡️ Pagination URL: {resp.url}")
-            st.json(resp_json)
-        next_link = resp_json.get("links", {}).get("next")
-        if next_link:
-            if next_link.startswith("http"):
-                url = next_link
-            else:
-                base = url.split("?")[0]
-                if next_link.startswith("?"):
-                    url = base + next_link
-                else:
-                    url = f"{base}?cursor={next_link}"
-            time.sleep(delay)
-        else:
-            url = None
-    return results
-
-if st.button("🚀 Start Crawl"):
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Accept": "application/json"
-    }
-    base_url = "https://api.atlassian.com/admin/v2/orgs"
-
-    hierarchy_data = []
-    roles_mapping = []
-
-    if os.path.exists("hierarchy_data.json"):
-        with open("hierarchy_data.json", "r") as f:
-            hierarchy_data = json.load(f)
-        st.info("Loaded existing hierarchy snapshot (continuing from last state).")
-
-
-    dir_url = f"{base_url}/{org_id}/directories"
-    directories = paginate(dir_url, headers, debug)
-
-    if not directories:
-        st.warning("No directories found or unable to fetch directories.")
-    else:
-        for d in directories:
-            dir_id = extract_guid(d.get("directoryId"))
-            dir_name = d.get("name", "Unknown Directory")
-            if not dir_id:
-                continue
-
-            grp_url = f"{base_url}/{org_id}/directories/{dir_id}/groups"
-            groups = paginate(grp_url, headers, debug)
-
-            usr_url = f"{base_url}/{org_id}/directories/{dir_id}/users"
-            users = paginate(usr_url, headers, debug)
-            user_map = {extract_guid(u.get("accountId")): u for u in users}
-
-            for g in groups:
-                grp_id = extract_guid(g.get("id"))
-                grp_name = g.get("name", "Unknown Group")
-                if not grp_id:
-                    continue
-
-                role_url = f"{base_url}/{org_id}/directories/{dir_id}/groups/{grp_id}/role-assignments"
-                roles = paginate(role_url, headers, debug)
-                role_names = [r.get("roleKey", "unknown-role") for r in roles if r]
-
-                grp_users_url = f"{base_url}/{org_id}/directories/{dir_id}/groups/{grp_id}/users"
-                group_users = paginate(grp_users_url, headers, debug)
-
-                for u in group_users:
-                    user_id = extract_guid(u.get("accountId"))
-                    if not user_id:
-                        continue
-
-                    u_full = user_map.get(user_id, u)
-
-                    user_email = u_full.get("email") or user_id
-                    user_name = (
-                        user_email or
-                        u_full.get("name") or
-                        u_full.get("nickname") or
-                        user_id
-                    )
-                    platform_roles = ", ".join(u_full.get("platformRoles", []))
-
-                    entry = {
-                        "directoryId": dir_id,
-                        "directoryName": dir_name,
-                        "groupId": grp_id,
-                        "groupName": grp_name,
-                        "userId": user_id,
-                        "userName": user_name,
-                        "userEmail": user_email,
-                        "notes": ", ".join(role_names),
-                        "platformRoles": platform_roles
-                    }
-                    hierarchy_data.append(entry)
-                    save_hierarchy_to_json(hierarchy_data)
-
-                    # Group roles
-                    for r in role_names:
-                        roles_mapping.append({
-                            "userId": user_id,
-                            "userName": user_name,
-                            "userEmail": user_email,
-                            "groupId": grp_id,
-                            "groupName": grp_name,
-                            "roleKey": r
-                        })
-                    
-                    # Platform (org-level) roles
-                    for p_role in u_full.get("platformRoles", []):
-                        roles_mapping.append({
-                            "userId": user_id,
-                            "userName": user_name,
-                            "userEmail": user_email,
-                            "groupId": "ORG-LEVEL",
-                            "groupName": "Organization-wide",
-                            "roleKey": p_role
-                        })
-
-    df = pd.DataFrame(hierarchy_data)
-    roles_df = pd.DataFrame(roles_mapping)
+            st.write(f"🐞 Last {request_metrics.recent_size} requests")
+            st.dataframe(pd.DataFrame(request_metrics.recent_requests()))
+
+
+start_crawl = st.button("🚀 Start Crawl")
+estimate_only = st.button("🧮 Estimate request budget",
+                          help="Fetch only the directory, group and user listings and show the planned requests per directory.")
+if start_crawl or estimate_only:
+    # Worker threads need the script context so debug output still reaches the page
+    script_ctx = get_script_run_ctx()
+
+    def attach_ctx():
+        add_script_run_ctx(ctx=script_ctx)
+
+    def show_message(level, text):
+        if level == "info":
+            st.info(text)
+        elif level == "warning":
+            st.warning(text)
+        elif debug:
+            st.error(text)
+
+    def show_plan(plan):
+        st.write("### 🧮 Crawl plan")
+        st.dataframe(pd.DataFrame(plan.rows()))
+
+    live_panel = st.empty()
+    with st.spinner("Listing directories, groups and users..." if estimate_only else "Crawling..."):
+        # The crawl runs in a background thread so this one can redraw the metrics panel while it goes
+        with ThreadPoolExecutor(max_workers=1, initializer=attach_ctx) as pool:
+            future = pool.submit(
+                crawler.crawl, api_key, org_id, max_workers=max_workers, incremental=incremental, resume=resume,
+                snapshot_format=snapshot_format, write_index=write_index,
+                on_message=show_message, initializer=attach_ctx, on_plan=show_plan,
+                skip_empty_groups=skip_empty_groups, user_side=user_side, plan_only=estimate_only,
+            )
+            while not wait([future], timeout=1.0).done:
+                show_request_metrics(live_panel, get_metrics())
+        show_request_metrics(live_panel, get_metrics())
+        result = future.result()
+
+    if result.changes:
+        changes = result.changes
+        st.write("### 🔁 Changes since previous snapshot")
+        st.caption(
+            f"{result.validator_stats['not_modified']} listings unchanged (304), "
+            f"{result.validator_stats['modified']} changed; written to `{delta.DELTA_PATH}`"
+        )
+        for kind in ("memberships", "roles"):
+            added, removed = changes[kind]["added"], changes[kind]["removed"]
+            st.write(f"**{kind.title()}:** {len(added)} added, {len(removed)} removed")
+            if added:
+                st.dataframe(pd.DataFrame(added))
+            if removed:
+                st.dataframe(pd.DataFrame(removed))
+
+
+@st.cache_resource(max_entries=1)
+def load_snapshot_frames(path, mtime, journal_mtime):
+    # Keyed by both mtimes so a new crawl (from here or the CLI), or rows journaled by a running
+    # or interrupted one, are picked up on the next rerun
+    with tracer.span("read snapshot", "render"):
+        df = snapshot.load_hierarchy(path)
+    with tracer.span("build DataFrame", "render", rows=len(df)):
+        return df, snapshot.roles_frame(df)
+
+
+def modified_time(path):
+    return os.path.getmtime(path) if os.path.exists(path) else None
+
+
+snapshot_path = snapshot.latest_snapshot_path()
+journal_path = snapshot.journal_path_for(snapshot_path)
+if snapshot.snapshot_exists(snapshot_path, journal_path):
+    df, roles_df = load_snapshot_frames(snapshot_path, modified_time(snapshot_path), modified_time(journal_path))
+    if os.path.exists(journal_path):
+        st.info(f"`{journal_path}` holds rows of a running or interrupted crawl; they are shown on top of the last snapshot.")
+    metrics = crawler.read_metrics()
+    if metrics:
+        crawled_at = time.strftime("%Y-%m-%d %H:%M", time.localtime(metrics["started"]))
+        st.caption(
+            f"Snapshot `{snapshot_path}` from the crawl of {crawled_at} "
+            f"({metrics['memberships']} memberships, {metrics['duration_seconds']:.0f}s)"
+        )
+    if metrics and "rate_limiter" in metrics:
+        stats = metrics["rate_limiter"]
+        st.caption(
+            f"Rate limiter: {stats['requests']} requests, {stats['throttled']} throttled (429), "
+            f"{stats['retries']} retries, {stats['wait_seconds']:.1f}s waiting, "
+            f"current rate {stats['rate']}/s of {stats['ceiling']}/s"
+        )
+    if metrics and metrics.get("requests", {}).get("endpoints"):
+        with st.expander("📈 Request metrics of the last crawl"):
+            endpoints = pd.DataFrame.from_dict(metrics["requests"]["endpoints"], orient="index")
+            st.dataframe(endpoints[["requests", "bytes", "latency_seconds_sum", "listing_calls", "pages"]])
+            st.download_button("💾 Download metrics JSON", data=json.dumps(metrics["requests"], indent=2),
+                               file_name="request_metrics.json", mime="application/json")
+            if os.path.exists(crawler.PROMETHEUS_PATH):
+                with open(crawler.PROMETHEUS_PATH, "r", encoding="utf-8") as f:
+                    st.download_button("💾 Download Prometheus metrics", data=f.read(),
+                                       file_name="crawl_metrics.prom", mime="text/plain")
 
     if df.empty:
-        st.warning("No hierarchy data retrieved!")
+        st.warning("No hierarchy data in the snapshot!")
     else:
+        frames_started = time.perf_counter_ns()
+        sankey_source_df, sankey_roles_source_df = drill_down(df, roles_df, drill_directory, drill_group)
+        lod = dict(top_groups=top_groups, top_users=top_users, collapse_users=collapse_users)
+
+        # Stage titles / label positions, minus the User stage when it is collapsed
+        def stages(titles, label_loc):
+            if collapse_users:
+                return titles[:2] + titles[3:], label_loc[:2] + label_loc[3:]
+            return titles, label_loc
+
+        # Start both renders in the worker pool (or the image cache) before drawing the tables
+        titles1, label_loc1 = stages(["Directory", "Group", "User (Email)"], ["left", "center", "right"])
+        sankey_df = level_of_detail(membership_sankey_frame(sankey_source_df), **lod)
+        render1 = None
+        if not sankey_df.empty:
+            render1 = submit_render(sankey_df, titles1, label_loc1, f"{' ➜ '.join(titles1)} Map", figsize=(14, 10))
+
+        titles2, label_loc2 = stages(["Directory", "Group", "User (Email)", "Role"], ["left", "left", "center", "right"])
+        render2 = None
+        if not sankey_roles_source_df.empty:
+            sankey_roles_df = level_of_detail(role_sankey_frame(sankey_source_df, sankey_roles_source_df), **lod)
+            render2 = submit_render(sankey_roles_df, titles2, label_loc2, f"{' ➜ '.join(titles2)} Map", figsize=(16, 10))
+        # Renders are timed from submission to the image being on the page
+        renders_started = time.perf_counter_ns()
+        tracer.record("Sankey frames + submit", "render", frames_started, renders_started)
+
         st.write("✅ **Hierarchy Data**")
         st.dataframe(df)
 
-        st.download_button("💾 Download CSV", data=df.to_csv(index=False), file_name="hierarchy_data.csv", mime="text/csv")
-        st.download_button("💾 Download JSON", data=json.dumps(hierarchy_data, indent=2), file_name="hierarchy_data.json", mime="application/json")
+        st.download_button(f"💾 Download {export_format}", data=exports.file_reader(df, "hierarchy_data", export_format),
+                           file_name=f"hierarchy_data.{export_format}", mime=exports.mime_type(export_format))
 
 
         st.write("### 🗂️ User-Role Mapping Table")
         st.dataframe(roles_df)
-        st.download_button("💾 Download Roles Mapping CSV", data=roles_df.to_csv(index=False), file_name="roles_mapping.csv", mime="text/csv")
-
-
-        st.write("### 🔗 Sankey Diagram: **Directory ➜ Group ➜ User (Email)**")
-        sankey_df = pd.DataFrame([
-            (row["directoryName"], 1, row["groupName"], 1, row["userEmail"], 1)
-            for _, row in df.iterrows()
-        ], columns=["Source", "Source_Weight", "Intermediate", "Intermediate_Weight", "Target", "Target_Weight"])
-        fig1, ax1 = plt.subplots(figsize=(14, 10))
-        ask.sankey(
-            sankey_df,
-            fontsize=8,
-            titles=["Directory", "Group", "User (Email)"],
-            label_values=True,
-            label_loc=["left", "center", "right"]
-        )
-        plt.title("Directory ➜ Group ➜ User (Email) Map", fontsize=12)
-        st.pyplot(fig1)
-
-        if not roles_df.empty:
-            st.write("### 🔗 Sankey Diagram: **Directory ➜ Group ➜ User (Email) ➜ Role**")
-            sankey_roles_df = pd.DataFrame([
-                (df.loc[df["userId"] == row["userId"], "directoryName"].values[0], 1,
-                 df.loc[df["userId"] == row["userId"], "groupName"].values[0], 1,
-                 row["userEmail"], 1, row["roleKey"], 1)
-                for _, row in roles_df.iterrows()
-            ], columns=["Source", "Source_Weight", "Intermediate", "Intermediate_Weight", "Target", "Target_Weight", "Role", "Role_Weight"])
-
-            fig2, ax2 = plt.subplots(figsize=(16, 10))
-            ask.sankey(
-                sankey_roles_df,
-                fontsize=8,
-                titles=["Directory", "Group", "User (Email)", "Role"],
-                label_values=True,
-                label_loc=["left", "left", "center", "right"]
-            )
-            plt.title("Directory ➜ Group ➜ User (Email) ➜ Role Map", fontsize=12)
-            st.pyplot(fig2)
+        st.download_button(f"💾 Download Roles Mapping {export_format}", data=exports.file_reader(roles_df, "roles_mapping", export_format),
+                           file_name=f"roles_mapping.{export_format}", mime=exports.mime_type(export_format))
+        if st.button(f"📁 Write exports to {exports.EXPORT_DIR}/"):
+            paths = [exports.export_file(df, "hierarchy_data", export_format),
+                     exports.export_file(roles_df, "roles_mapping", export_format)]
+            st.success(f"Exported {', '.join(f'`{p}`' for p in paths)}")
+
+
+        if drill_directory or drill_group:
+            st.info(f"Sankey drill-down: {drill_directory or 'all directories'} / {drill_group or 'all groups'}")
+
+        st.write(f"### 🔗 Sankey Diagram: **{' ➜ '.join(titles1)}**")
+        if render1 is None:
+            st.warning("No memberships match the drill-down filter!")
+        else:
+            with st.spinner("Rendering Sankey diagram..."):
+                st.image(render1.result())
+            tracer.record("render Sankey", "render", renders_started, time.perf_counter_ns(),
+                          {"chart": "memberships", "cache_hit": render1.cache_hit})
+
+        if render2 is not None:
+            st.write(f"### 🔗 Sankey Diagram: **{' ➜ '.join(titles2)}**")
+            with st.spinner("Rendering Sankey diagram..."):
+                st.image(render2.result())
+            tracer.record("render Sankey", "render", renders_started, time.perf_counter_ns(),
+                          {"chart": "roles", "cache_hit": render2.cache_hit})
         else:
             st.warning("No role data found for Sankey diagram!")
+
+
+else:
+    st.info("No snapshot yet: start a crawl above or run `python crawler.py`.")
+
+
+if audit_index.index_exists():
+    st.write("### 🗄️ Audit Queries")
+    index = audit_index.AuditIndex()
+    try:
+        counts = index.stats()
+        st.caption(f"`{audit_index.DB_PATH}`: {counts['memberships']} memberships, {counts['users']} users, "
+                   f"{counts['groups']} groups in {counts['directories']} directories")
+        query = st.selectbox("Query", list(audit_index.QUERIES))
+        method = audit_index.QUERIES[query]
+        if method in ("holders_of_role", "groups_granting"):
+            value = st.selectbox("Role key", index.role_keys())
+        else:
+            value = st.text_input("User id / email" if "user" in method else "Group id / name", "")
+        if value:
+            started = time.perf_counter()
+            columns, rows = getattr(index, method)(value)
+            elapsed = (time.perf_counter() - started) * 1000
+            st.caption(f"{len(rows)} rows in {elapsed:.1f} ms")
+            st.dataframe(pd.DataFrame(rows, columns=columns))
+    finally:
+        index.close()
+
+
+if profile:
+    tracer.disable()
+    st.write("### ⏱️ Profile of this run")
+    phases = tracer.summary()
+    if phases:
+        st.caption("Worker-thread spans overlap, so a phase's total can exceed its wall time. "
+                   "Open the trace in https://ui.perfetto.dev or chrome://tracing for the timeline.")
+        st.dataframe(pd.DataFrame(phases))
+        st.download_button("💾 Download trace (Chrome / Perfetto JSON)", data=json.dumps(tracer.to_chrome_trace()),
+                           file_name="crawl_trace.json", mime="application/json")
+    else:
+        st.info("Nothing was traced in this run.")
@@ -0,0 +1,299 @@
+"""Local stand-in for the Admin v2 hierarchy endpoints, backed by a synthetic org.
+
+``SyntheticOrg`` generates directories, groups, users, memberships and role
+assignments from a seed, so every run sees the same org. ``MockAdminServer``
+serves it on localhost:
+
+    /admin/v2/orgs/{orgId}/directories
+    /admin/v2/orgs/{orgId}/directories/{directoryId}/groups
+    /admin/v2/orgs/{orgId}/directories/{directoryId}/users
+    /admin/v2/orgs/{orgId}/directories/{directoryId}/groups/{groupId}/users
+    /admin/v2/orgs/{orgId}/directories/{directoryId}/groups/{groupId}/role-assignments
+    /admin/v2/orgs/{orgId}/directories/{directoryId}/users/{accountId}/groups
+
+Group listings report ``counts.users``, which the crawl planner uses.
+
+Listings are paginated with ``links.next`` cursors (``?cursor=`` / ``limit``),
+answer ``If-None-Match`` with ``304`` and can be slowed down (``latency_ms``
+plus jitter) or throttled (a fraction of requests answered ``429`` with
+``Retry-After``). Point the crawler at it with ``ATLASSIAN_API_BASE``:
+
+    python mock_admin_api.py --groups 200 --users 2000 --port 8089
+    ATLASSIAN_API_BASE=http://127.0.0.1:8089 python crawler.py --org-id mock-org --token x
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+DEFAULT_ORG_ID = "mock-org"
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+ROLE_KEYS = ("atlassian/user", "jira-software/user", "confluence/user", "jira-software/admin", "confluence/admin")
+PLATFORM_ROLES = ("org-admin", "site-admin", "user-access-admin")
+
+ROUTES = [
+    ("group_users", re.compile(r"^/admin/v2/orgs/([^/]+)/directories/([^/]+)/groups/([^/]+)/users$")),
+    ("group_roles", re.compile(r"^/admin/v2/orgs/([^/]+)/directories/([^/]+)/groups/([^/]+)/role-assignments$")),
+    ("user_groups", re.compile(r"^/admin/v2/orgs/([^/]+)/directories/([^/]+)/users/([^/]+)/groups$")),
+    ("groups", re.compile(r"^/admin/v2/orgs/([^/]+)/directories/([^/]+)/groups$")),
+    ("users", re.compile(r"^/admin/v2/orgs/([^/]+)/directories/([^/]+)/users$")),
+    ("directories", re.compile(r"^/admin/v2/orgs/([^/]+)/directories$")),
+]
+
+
+class SyntheticOrg:
+    """A reproducible org: ``directories`` x ``groups`` x ``users`` with a membership density.
+
+    Group sizes are skewed (exponentially distributed around ``density *
+    users``) and ``empty_groups`` of them have no members at all, as in real
+    orgs where a few large groups sit next to many small or unused ones.
+    ``role_groups`` of the groups carry one or two role assignments and
+    ``admins`` of the users hold a platform role.
+    """
+
+    def __init__(self, directories=2, groups=100, users=1000, density=0.02, empty_groups=0.2,
+                 role_groups=0.3, admins=0.01, seed=7, org_id=DEFAULT_ORG_ID):
+        rng = random.Random(seed)
+        self.org_id = org_id
+        self.directories = []
+        self.groups = {}  # directoryId -> [group]
+        self.users = {}  # directoryId -> [user]
+        self.members = {}  # (directoryId, groupId) -> [user index]
+        self.roles = {}  # (directoryId, groupId) -> [role assignment]
+        self._user_groups = None  # (directoryId, accountId) -> [group], built on first use
+        mean_size = max(1.0, density * users)
+        for d in range(directories):
+            dir_id = f"dir-{d:03d}"
+            self.directories.append({"directoryId": dir_id, "name": f"Directory {d}"})
+            dir_users = []
+            for u in range(users):
+                account_id = f"{d:03d}-{u:07d}"
+                dir_users.append({
+                    "accountId": account_id,
+                    "email": f"user{u}.d{d}@example.com",
+                    "name": f"User {u} (dir {d})",
+                    "nickname": f"user{u}",
+                    "platformRoles": [rng.choice(PLATFORM_ROLES)] if rng.random() < admins else [],
+                })
+            self.users[dir_id] = dir_users
+            dir_groups = []
+            for g in range(groups):
+                grp_id = f"{d:03d}-grp-{g:05d}"
+                if rng.random() < empty_groups:
+                    size = 0
+                else:
+                    size = min(users, max(1, round(rng.expovariate(1 / mean_size))))
+                self.members[(dir_id, grp_id)] = sorted(rng.sample(range(users), size))
+                self.roles[(dir_id, grp_id)] = (
+                    [{"roleKey": key, "resourceId": f"ari:cloud:platform::site/{d}"} for key in rng.sample(ROLE_KEYS, rng.randint(1, 2))]
+                    if rng.random() < role_groups else []
+                )
+                dir_groups.append({"id": grp_id, "name": f"group-{g}", "counts": {"users": size}})
+            self.groups[dir_id] = dir_groups
+
+    @property
+    def memberships(self):
+        return sum(len(m) for m in self.members.values())
+
+    def stats(self):
+        return {
+            "directories": len(self.directories),
+            "groups": sum(len(g) for g in self.groups.values()),
+            "users": sum(len(u) for u in self.users.values()),
+            "memberships": self.memberships,
+            "role_assignments": sum(len(r) for r in self.roles.values()),
+        }
+
+    def user_groups(self):
+        if self._user_groups is None:
+            by_user = {(dir_id, u["accountId"]): [] for dir_id, dir_users in self.users.items() for u in dir_users}
+            for dir_id, dir_groups in self.groups.items():
+                dir_users = self.users[dir_id]
+                for g in dir_groups:
+                    for i in self.members[(dir_id, g["id"])]:
+                        by_user[(dir_id, dir_users[i]["accountId"])].append({"id": g["id"], "name": g["name"]})
+            self._user_groups = by_user
+        return self._user_groups
+
+    def listing(self, route, dir_id=None, grp_id=None):
+        """The full item list behind a route, or None for an unknown directory / group / user.
+
+        For ``user_groups`` the third id is the account id.
+        """
+        if route == "directories":
+            return self.directories
+        if dir_id not in self.users:
+            return None
+        if route == "groups":
+            return self.groups[dir_id]
+        if route == "users":
+            return self.users[dir_id]
+        if route == "user_groups":
+            return self.user_groups().get((dir_id, grp_id))
+        key = (dir_id, grp_id)
+        if key not in self.members:
+            return None
+        if route == "group_roles":
+            return self.roles[key]
+        dir_users = self.users[dir_id]
+        return [{"accountId": dir_users[i]["accountId"], "email": dir_users[i]["email"]} for i in self.members[key]]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server_version = "MockAdminAPI"
+
+    def do_GET(self):
+        server = self.server.mock
+        parts = urlsplit(self.path)
+        query = parse_qs(parts.query)
+        server.count("requests")
+        time.sleep(server.delay())
+        if server.throttle and server.rng.random() < server.throttle:
+            server.count("throttled")
+            return self._send(429, {"message": "Too many requests"}, {"Retry-After": str(server.retry_after)})
+
+        for route, pattern in ROUTES:
+            match = pattern.match(parts.path)
+            if match:
+                break
+        else:
+            return self._send(404, {"message": f"No route for {parts.path}"})
+        org_id, *ids = match.groups()
+        items = server.org.listing(route, *ids) if org_id == server.org.org_id else None
+        if items is None:
+            return self._send(404, {"message": "Not found"})
+        server.count(route)
+
+        try:
+            offset = int(query.get("cursor", ["0"])[0])
+            limit = min(MAX_PAGE_SIZE, int(query.get("limit", [server.page_size])[0]))
+        except ValueError:
+            return self._send(400, {"message": "Invalid cursor or limit"})
+        page = items[offset:offset + limit]
+        links = {"next": str(offset + limit)} if offset + limit < len(items) else {}
+        body = json.dumps({"data": page, "links": links}).encode()
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        if self.headers.get("If-None-Match") == etag:
+            server.count("not_modified")
+            return self._send(304, None, {"ETag": etag})
+        self._send(200, body, {"ETag": etag})
+
+    def _send(self, status, body, headers=None):
+        if isinstance(body, dict):
+            body = json.dumps(body).encode()
+        body = body or b""
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if body:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.mock.count("bytes", len(body))
+
+    def log_message(self, *args):
+        pass
+
+
+class MockAdminServer:
+    """Serve a ``SyntheticOrg`` in a background thread; use as a context manager.
+
+    ``latency_ms`` (+/- ``jitter_ms``) is added to every request and
+    ``throttle`` is the fraction answered ``429`` with ``Retry-After:
+    retry_after``.
+    """
+
+    def __init__(self, org, host="127.0.0.1", port=0, page_size=DEFAULT_PAGE_SIZE,
+                 latency_ms=0.0, jitter_ms=0.0, throttle=0.0, retry_after=1, seed=7):
+        self.org = org
+        self.page_size = page_size
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.throttle = throttle
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {}
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.mock = self
+        self.thread = None
+
+    @property
+    def api_base(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def base_url(self):
+        """Same shape as ``crawler.BASE_URL``."""
+        return f"{self.api_base}/admin/v2/orgs"
+
+    def delay(self):
+        if not (self.latency_ms or self.jitter_ms):
+            return 0.0
+        return max(0.0, self.latency_ms + self.rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+
+    def count(self, key, n=1):
+        with self.lock:
+            self.stats[key] = self.stats.get(key, 0) + n
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--directories", type=int, default=2)
+    parser.add_argument("--groups", type=int, default=100, help="groups per directory")
+    parser.add_argument("--users", type=int, default=1000, help="users per directory")
+    parser.add_argument("--density", type=float, default=0.02, help="mean share of a directory's users in a group")
+    parser.add_argument("--empty-groups", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--org-id", default=DEFAULT_ORG_ID)
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--throttle", type=float, default=0.0, help="fraction of requests answered 429")
+    parser.add_argument("--retry-after", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    org = SyntheticOrg(args.directories, args.groups, args.users, args.density, args.empty_groups,
+                       seed=args.seed, org_id=args.org_id)
+    server = MockAdminServer(org, port=args.port, page_size=args.page_size, latency_ms=args.latency_ms,
+                             jitter_ms=args.jitter_ms, throttle=args.throttle, retry_after=args.retry_after, seed=args.seed)
+    print(f"{org.stats()}")
+    print(f"serving org {org.org_id!r} at {server.base_url}; crawl it with ATLASSIAN_API_BASE={server.api_base}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        print(server.stats)
+
+
+if __name__ == "__main__":
+    main()
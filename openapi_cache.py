@@ -0,0 +1,158 @@
+"""On-disk cache of the Atlassian OpenAPI specs and the playground's endpoint index.
+
+Each spec is stored under ``.openapi_cache/`` with its ``ETag`` /
+``Last-Modified`` validators and is revalidated with a conditional GET once
+``OPENAPI_CACHE_TTL`` seconds have passed (default one hour). If the download
+fails the cached copy is used, so the playground also starts offline.
+
+The tag -> endpoints index the sidebar needs and the endpoint search index
+are pickled next to the specs, keyed by the specs' content hashes: while no
+spec has changed, a cold start loads both without reading or parsing the
+spec JSON at all.
+"""
+import hashlib
+import json
+import os
+import pickle
+import time
+
+import atlassian_client as client
+from endpoint_search import EndpointSearch
+
+SPEC_URLS = [
+    "https://dac-static.atlassian.com/cloud/admin/organization/swagger.v3.json",
+    "https://dac-static.atlassian.com/cloud/jira/platform/swagger-v3.v3.json",
+]
+CACHE_DIR = os.environ.get("OPENAPI_CACHE_DIR", ".openapi_cache")
+CACHE_TTL = float(os.environ.get("OPENAPI_CACHE_TTL", "3600"))
+INDEX_FILE = "endpoint_index.pickle"
+DEFAULT_SERVER = "https://api.atlassian.com"
+# Operation fields the playground reads; response schemas make up most of the spec and are dropped
+DETAIL_FIELDS = ("operationId", "summary", "description", "parameters", "requestBody")
+
+
+def _slug(url):
+    return hashlib.sha256(url.encode()).hexdigest()[:16]
+
+
+def _paths(url):
+    base = os.path.join(CACHE_DIR, _slug(url))
+    return f"{base}.json", f"{base}.meta.json"
+
+
+def _write_atomic(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _read_meta(url):
+    _, meta_path = _paths(url)
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _save(url, content, resp, meta):
+    spec_path, meta_path = _paths(url)
+    if content is not None:
+        _write_atomic(spec_path, content)
+        meta = {"url": url, "sha256": hashlib.sha256(content).hexdigest()}
+    meta["etag"] = resp.headers.get("ETag", meta.get("etag"))
+    meta["last_modified"] = resp.headers.get("Last-Modified", meta.get("last_modified"))
+    meta["checked"] = time.time()
+    _write_atomic(meta_path, json.dumps(meta).encode())
+    return meta
+
+
+def refresh_spec(url, ttl=CACHE_TTL):
+    """Make sure ``url`` is cached and fresh; returns ``(meta, warning)``.
+
+    ``meta`` is None only when the spec could not be downloaded and no cached
+    copy exists.
+    """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    meta = _read_meta(url)
+    spec_path, _ = _paths(url)
+    if meta and not os.path.exists(spec_path):
+        meta = None
+    if meta and time.time() - meta.get("checked", 0) < ttl:
+        return meta, None
+
+    headers = {}
+    if meta and meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta and meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+    try:
+        resp = client.get(url, headers=headers)
+    except Exception as e:
+        resp, error = None, str(e)
+    else:
+        if resp.status_code == 304 and meta:
+            return _save(url, None, resp, meta), None
+        if resp.status_code == 200:
+            return _save(url, resp.content, resp, meta or {}), None
+        error = f"HTTP {resp.status_code}"
+
+    if meta:
+        checked = time.strftime("%Y-%m-%d %H:%M", time.localtime(meta.get("checked", 0)))
+        return meta, f"Could not refresh {url} ({error}); using the copy cached at {checked}."
+    return None, f"Failed to load {url}: {error}"
+
+
+def read_spec(url):
+    spec_path, _ = _paths(url)
+    with open(spec_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def build_index(specs):
+    """``{tag: [endpoint, ...]}`` with each endpoint's path, method, details and server."""
+    tags = {}
+    for spec in specs:
+        server_url = spec.get("servers", [{}])[0].get("url", DEFAULT_SERVER)
+        for path, methods in spec.get("paths", {}).items():
+            for method, details in methods.items():
+                if not isinstance(details, dict):
+                    continue
+                for tag in details.get("tags", []):
+                    tags.setdefault(tag, []).append({
+                        "path": path,
+                        "method": method.upper(),
+                        "details": {k: details[k] for k in DETAIL_FIELDS if k in details},
+                        "server_url": server_url,
+                    })
+    return tags
+
+
+def load_endpoint_index(urls=SPEC_URLS, ttl=CACHE_TTL):
+    """Return ``(tags, search, warnings)``, rebuilding the pickled indexes only when a spec changed."""
+    warnings = []
+    metas = []
+    for url in urls:
+        meta, warning = refresh_spec(url, ttl)
+        if warning:
+            warnings.append(warning)
+        if meta:
+            metas.append(meta)
+    key = [(m["url"], m["sha256"]) for m in metas]
+
+    index_path = os.path.join(CACHE_DIR, INDEX_FILE)
+    try:
+        with open(index_path, "rb") as f:
+            cached = pickle.load(f)
+        if cached["key"] == key:
+            return cached["tags"], cached["search"], warnings
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError, KeyError, AttributeError):
+        pass
+
+    tags = build_index(read_spec(m["url"]) for m in metas)
+    search = EndpointSearch(ep for endpoints in tags.values() for ep in endpoints)
+    if metas:
+        payload = {"key": key, "tags": tags, "search": search}
+        _write_atomic(index_path, pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL))
+    return tags, search, warnings
@@ -0,0 +1,66 @@
+"""Streaming pagination over ``links.next`` cursors.
+
+``iter_pages`` yields one page at a time and ``iter_items`` one item at a
+time, so callers can feed the snapshot writer or build lookups without
+holding the whole listing in memory. ``paginate`` is the list-returning
+wrapper for callers that need everything at once.
+"""
+from typing import NamedTuple
+
+import atlassian_client as client
+from request_metrics import get_metrics
+
+
+class Page(NamedTuple):
+    url: str
+    response: object
+    body: dict
+    items: list
+    next_url: str
+
+
+def iter_pages(url, headers=None, params=None, on_error=None, first_response=None):
+    """Yield each page of a listing until ``links.next`` runs out.
+
+    Query ``params`` are sent with every page unless the API hands back an
+    absolute next URL, which already carries them. On a non-200 response
+    ``on_error(url, resp)`` is called and iteration stops. A response the
+    caller already fetched for ``url`` can be passed as ``first_response`` to
+    be used as page one instead of requesting it again. The number of pages
+    is recorded per listing in ``request_metrics``, also when the caller
+    stops early.
+    """
+    start_url = url
+    pages = 0
+    try:
+        while url:
+            if first_response is not None:
+                resp, first_response = first_response, None
+            else:
+                resp = client.get(url, headers=headers, params=params)
+            if resp.status_code != 200:
+                if on_error:
+                    on_error(url, resp)
+                return
+            pages += 1
+            body = resp.json()
+            data = body.get("data", []) if isinstance(body, dict) else []
+            items = data if isinstance(data, list) else []
+            next_link = body.get("links", {}).get("next") if isinstance(body, dict) else None
+            next_url = client.resolve_next(url, next_link)
+            yield Page(url, resp, body, items, next_url)
+            if next_link and next_link.startswith("http"):
+                params = None
+            url = next_url
+    finally:
+        if start_url:
+            get_metrics().record_listing(start_url, pages)
+
+
+def iter_items(url, headers=None, params=None, on_error=None, first_response=None):
+    for page in iter_pages(url, headers, params, on_error, first_response):
+        yield from page.items
+
+
+def paginate(url, headers=None, params=None, on_error=None, first_response=None):
+    return list(iter_items(url, headers, params, on_error, first_response))
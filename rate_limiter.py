@@ -0,0 +1,140 @@
+"""Adaptive token-bucket rate limiter shared by every API request.
+
+The bucket starts at the configured ceiling and adapts to what the API tells
+us: ``Retry-After`` on a 429 pauses all callers and halves the rate,
+``X-RateLimit-Remaining`` / ``X-RateLimit-Reset`` pace us to the remaining
+budget, and successful responses slowly raise the rate back to the ceiling.
+"""
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+DEFAULT_RATE = 10.0
+MIN_RATE = 0.2
+# Fraction of the ceiling regained per successful response after a throttle
+RECOVERY_STEP = 0.05
+
+
+def _parse_http_time(value):
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).astimezone(timezone.utc).timestamp()
+    except ValueError:
+        return None
+
+
+def parse_retry_after(value, now=None):
+    """Seconds to wait from a ``Retry-After`` header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    ts = _parse_http_time(value)
+    if ts is None:
+        return None
+    return max(0.0, ts - (now if now is not None else time.time()))
+
+
+def parse_reset(value, now=None):
+    """Seconds until an ``X-RateLimit-Reset`` header (epoch, delta or ISO-8601)."""
+    if not value:
+        return None
+    now = now if now is not None else time.time()
+    try:
+        number = float(value)
+    except ValueError:
+        ts = _parse_http_time(value)
+        return None if ts is None else max(0.0, ts - now)
+    # Large values are epoch seconds, small ones a delta
+    return max(0.0, number - now) if number > 1e9 else number
+
+
+class AdaptiveRateLimiter:
+    def __init__(self, rate=DEFAULT_RATE, burst=None, min_rate=MIN_RATE):
+        self.max_rate = float(rate)
+        self.rate = float(rate)
+        self.min_rate = min(min_rate, self.max_rate)
+        self.capacity = float(burst or max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+        self.metrics = {
+            "requests": 0,
+            "throttled": 0,
+            "retries": 0,
+            "wait_seconds": 0.0,
+            "retry_after_seconds": 0.0,
+        }
+
+    def set_ceiling(self, rate):
+        with self.lock:
+            self.max_rate = float(rate)
+            self.rate = min(self.rate, self.max_rate)
+            self.min_rate = min(self.min_rate, self.max_rate)
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """Block until a request may be sent; returns the time spent waiting."""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                elif self.tokens >= 1:
+                    self.tokens -= 1
+                    self.metrics["requests"] += 1
+                    self.metrics["wait_seconds"] += waited
+                    return waited
+                else:
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+    def observe(self, resp):
+        """Adapt to a response; returns the back-off in seconds for a 429, else None."""
+        headers = resp.headers
+        with self.lock:
+            if resp.status_code == 429:
+                retry_after = parse_retry_after(headers.get("Retry-After"))
+                if retry_after is None:
+                    retry_after = max(1.0, 1.0 / self.rate)
+                self.metrics["throttled"] += 1
+                self.metrics["retry_after_seconds"] += retry_after
+                self.rate = max(self.min_rate, self.rate / 2)
+                self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+                self.tokens = 0.0
+                return retry_after
+
+            remaining = headers.get("X-RateLimit-Remaining")
+            reset = parse_reset(headers.get("X-RateLimit-Reset"))
+            if remaining is not None and reset:
+                try:
+                    budget = float(remaining) / reset
+                except ValueError:
+                    budget = None
+                if budget is not None:
+                    self.rate = min(self.max_rate, max(self.min_rate, budget))
+                    return None
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate * RECOVERY_STEP)
+            return None
+
+    def record_retry(self):
+        with self.lock:
+            self.metrics["retries"] += 1
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.metrics, rate=round(self.rate, 3), ceiling=self.max_rate)
@@ -0,0 +1,215 @@
+"""Lightweight request metrics for the crawler and the playground.
+
+Every HTTP attempt made through ``atlassian_client`` is counted per endpoint
+template (ids replaced by ``{directoryId}``, ``{groupId}``, ...): requests,
+status codes, a fixed-bucket latency histogram and bytes received. Retries,
+429s and time spent sleeping in the rate limiter are counted too, and
+``iter_pages`` records how many pages each listing call took. Recording is a
+dict update under a lock; the last ``RECENT_SIZE`` requests are kept in a
+ring buffer instead of dumping every page.
+
+``to_json()`` and ``to_prometheus()`` export the current counters.
+"""
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+# Upper bounds in seconds, Prometheus-style (the last bucket is +Inf)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+RECENT_SIZE = 200
+# Path segment -> name of the id that follows it
+ID_SEGMENTS = {
+    "orgs": "orgId", "directories": "directoryId", "groups": "groupId", "users": "userId",
+    "accounts": "accountId", "workspaces": "workspaceId", "policies": "policyId", "domains": "domainId",
+}
+
+
+def endpoint_template(url):
+    """``/admin/v2/orgs/abc/directories/d1/groups`` -> ``/admin/v2/orgs/{orgId}/directories/{directoryId}/groups``."""
+    parts = urlsplit(url)
+    segments = parts.path.split("/")
+    for i in range(1, len(segments)):
+        name = ID_SEGMENTS.get(segments[i - 1])
+        if name and segments[i] and segments[i] not in ID_SEGMENTS:
+            segments[i] = f"{{{name}}}"
+    return f"{parts.netloc}{'/'.join(segments)}"
+
+
+class _EndpointStats:
+    __slots__ = ("requests", "statuses", "latency_sum", "buckets", "bytes", "calls", "pages")
+
+    def __init__(self):
+        self.requests = 0
+        self.statuses = {}
+        self.latency_sum = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.bytes = 0
+        self.calls = 0
+        self.pages = 0
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th quantile."""
+        target = q * self.requests
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS + (float("inf"),), self.buckets):
+            seen += count
+            if seen >= target and count:
+                return bound
+        return 0.0
+
+
+class RequestMetrics:
+    def __init__(self, recent_size=RECENT_SIZE):
+        self.lock = threading.Lock()
+        self.recent_size = recent_size
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.started = time.time()
+            self.endpoints = {}
+            self.retries = 0
+            self.throttled = 0
+            self.sleep_seconds = 0.0
+            self.recent = deque(maxlen=self.recent_size)
+
+    def _stats(self, url):
+        template = endpoint_template(url)
+        stats = self.endpoints.get(template)
+        if stats is None:
+            stats = self.endpoints[template] = _EndpointStats()
+        return stats
+
+    def record_request(self, method, url, status, seconds, nbytes=0):
+        """One HTTP attempt; ``status`` is None when the request raised."""
+        bucket = next((i for i, bound in enumerate(LATENCY_BUCKETS) if seconds <= bound), len(LATENCY_BUCKETS))
+        status = status or "error"
+        with self.lock:
+            stats = self._stats(url)
+            stats.requests += 1
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+            stats.latency_sum += seconds
+            stats.buckets[bucket] += 1
+            stats.bytes += nbytes
+            if status == 429:
+                self.throttled += 1
+            self.recent.append((time.time(), method, url, status, round(seconds * 1000, 1), nbytes))
+
+    def record_retry(self):
+        with self.lock:
+            self.retries += 1
+
+    def record_sleep(self, seconds):
+        if seconds > 0:
+            with self.lock:
+                self.sleep_seconds += seconds
+
+    def record_listing(self, url, pages):
+        with self.lock:
+            stats = self._stats(url)
+            stats.calls += 1
+            stats.pages += pages
+
+    def summary(self):
+        """One row per endpoint template, busiest first."""
+        with self.lock:
+            rows = [
+                {
+                    "endpoint": template,
+                    "requests": s.requests,
+                    "errors": sum(n for status, n in s.statuses.items() if status == "error" or status >= 400),
+                    "throttled": s.statuses.get(429, 0),
+                    "mean_ms": round(s.latency_sum / s.requests * 1000, 1) if s.requests else 0.0,
+                    "p50_ms": s.quantile(0.5) * 1000,
+                    "p95_ms": s.quantile(0.95) * 1000,
+                    "bytes": s.bytes,
+                    "pages_per_call": round(s.pages / s.calls, 2) if s.calls else None,
+                }
+                for template, s in self.endpoints.items()
+            ]
+        return sorted(rows, key=lambda r: -r["requests"])
+
+    def totals(self):
+        with self.lock:
+            return {
+                "requests": sum(s.requests for s in self.endpoints.values()),
+                "bytes": sum(s.bytes for s in self.endpoints.values()),
+                "retries": self.retries,
+                "throttled": self.throttled,
+                "sleep_seconds": round(self.sleep_seconds, 3),
+                "elapsed_seconds": round(time.time() - self.started, 3),
+            }
+
+    def recent_requests(self):
+        with self.lock:
+            return [
+                {"time": time.strftime("%H:%M:%S", time.localtime(t)), "method": m, "url": u, "status": str(s), "ms": ms, "bytes": b}
+                for t, m, u, s, ms, b in reversed(self.recent)
+            ]
+
+    def to_json(self):
+        with self.lock:
+            endpoints = {
+                template: {
+                    "requests": s.requests,
+                    "statuses": {str(k): v for k, v in s.statuses.items()},
+                    "latency_seconds_sum": round(s.latency_sum, 6),
+                    "latency_buckets": dict(zip([str(b) for b in LATENCY_BUCKETS] + ["+Inf"], s.buckets)),
+                    "bytes": s.bytes,
+                    "listing_calls": s.calls,
+                    "pages": s.pages,
+                }
+                for template, s in self.endpoints.items()
+            }
+        return {"totals": self.totals(), "endpoints": endpoints}
+
+    def to_prometheus(self, prefix="atlassian_crawl"):
+        """Prometheus text exposition format (e.g. for node_exporter's textfile collector)."""
+        lines = []
+
+        def metric(name, kind, help_text):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+
+        with self.lock:
+            endpoints = sorted(self.endpoints.items())
+            totals = (self.retries, self.throttled, self.sleep_seconds)
+        metric("requests_total", "counter", "HTTP requests by endpoint template and status.")
+        for template, s in endpoints:
+            for status, n in sorted(s.statuses.items(), key=str):
+                lines.append(f'{prefix}_requests_total{{endpoint="{template}",status="{status}"}} {n}')
+        metric("request_duration_seconds", "histogram", "HTTP request latency.")
+        for template, s in endpoints:
+            cumulative = 0
+            for bound, count in zip([str(b) for b in LATENCY_BUCKETS] + ["+Inf"], s.buckets):
+                cumulative += count
+                lines.append(f'{prefix}_request_duration_seconds_bucket{{endpoint="{template}",le="{bound}"}} {cumulative}')
+            lines.append(f'{prefix}_request_duration_seconds_sum{{endpoint="{template}"}} {s.latency_sum:.6f}')
+            lines.append(f'{prefix}_request_duration_seconds_count{{endpoint="{template}"}} {s.requests}')
+        metric("response_bytes_total", "counter", "Response body bytes received.")
+        for template, s in endpoints:
+            lines.append(f'{prefix}_response_bytes_total{{endpoint="{template}"}} {s.bytes}')
+        metric("pages_total", "counter", "Pages fetched by paginated listing calls.")
+        for template, s in endpoints:
+            if s.calls:
+                lines.append(f'{prefix}_pages_total{{endpoint="{template}"}} {s.pages}')
+        metric("listing_calls_total", "counter", "Paginated listing calls.")
+        for template, s in endpoints:
+            if s.calls:
+                lines.append(f'{prefix}_listing_calls_total{{endpoint="{template}"}} {s.calls}')
+        retries, throttled, sleep_seconds = totals
+        metric("retries_total", "counter", "Requests retried after a 429.")
+        lines.append(f"{prefix}_retries_total {retries}")
+        metric("throttled_total", "counter", "429 responses.")
+        lines.append(f"{prefix}_throttled_total {throttled}")
+        metric("sleep_seconds_total", "counter", "Time spent waiting on the rate limiter or Retry-After.")
+        lines.append(f"{prefix}_sleep_seconds_total {sleep_seconds:.3f}")
+        return "\n".join(lines) + "\n"
+
+
+_metrics = RequestMetrics()
+
+
+def get_metrics():
+    return _metrics
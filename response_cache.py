@@ -0,0 +1,66 @@
+"""In-memory TTL + LRU cache for the playground's GET responses.
+
+Entries are keyed by method, URL, query params, a hash of the bearer token
+and whatever else changes the result (pagination settings), so repeating a
+request within ``ttl`` seconds is answered without touching the API or the
+rate limit budget. The cache holds at most ``max_entries`` responses and
+drops the least recently used one when full.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_TTL = 300
+DEFAULT_MAX_ENTRIES = 128
+
+
+def token_hash(token):
+    return hashlib.sha256((token or "").encode()).hexdigest()[:16]
+
+
+def cache_key(method, url, params=None, token=None, **extra):
+    return (
+        method.upper(),
+        url,
+        tuple(sorted((params or {}).items())),
+        token_hash(token),
+        tuple(sorted(extra.items())),
+    )
+
+
+class ResponseCache:
+    def __init__(self, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # key -> (stored_at, value)
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                self.entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry[1]
+            if entry is not None:
+                del self.entries[key]
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic(), value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.stats, entries=len(self.entries))
@@ -0,0 +1,100 @@
+"""Sankey input frames built with joins and group-by aggregation.
+
+``ausankey`` takes one row per flow with a (label, weight) column pair per
+stage. Identical paths are collapsed into a single row whose weights are the
+number of memberships / role assignments on that path, which draws the same
+diagram as one row per membership with weight 1.
+"""
+import pandas as pd
+
+MEMBERSHIP_COLUMNS = ["Source", "Source_Weight", "Intermediate", "Intermediate_Weight", "Target", "Target_Weight"]
+ROLE_COLUMNS = MEMBERSHIP_COLUMNS + ["Role", "Role_Weight"]
+
+
+def _weighted(paths, labels, columns):
+    counts = paths.groupby(labels, sort=False, dropna=False, observed=True).size().reset_index(name="weight")
+    frame = pd.DataFrame(index=counts.index)
+    for label, (name_col, weight_col) in zip(labels, zip(columns[::2], columns[1::2])):
+        frame[name_col] = counts[label]
+        frame[weight_col] = counts["weight"]
+    return frame[columns]
+
+
+def membership_sankey_frame(df):
+    """Directory -> Group -> User (Email), one row per distinct path."""
+    if df.empty:
+        return pd.DataFrame(columns=MEMBERSHIP_COLUMNS)
+    return _weighted(df, ["directoryName", "groupName", "userEmail"], MEMBERSHIP_COLUMNS)
+
+
+def role_sankey_frame(df, roles_df):
+    """Directory -> Group -> User (Email) -> Role, one row per distinct path.
+
+    Each role row is placed under the directory and group of the user's first
+    membership row, as the original per-row lookup did.
+    """
+    if df.empty or roles_df.empty:
+        return pd.DataFrame(columns=ROLE_COLUMNS)
+    first_membership = df.drop_duplicates("userId")[["userId", "directoryName", "groupName"]]
+    paths = roles_df[["userId", "userEmail", "roleKey"]].merge(first_membership, on="userId", how="inner", sort=False)
+    return _weighted(paths, ["directoryName", "groupName", "userEmail", "roleKey"], ROLE_COLUMNS)
+
+
+OTHER_LABEL = "Other"
+# Stage positions shared by both frames: Directory, Group, User, [Role]
+GROUP_STAGE = 1
+USER_STAGE = 2
+
+
+def drill_down(df, roles_df, directory=None, group=None):
+    """Restrict both tables to one directory and/or group name."""
+    if directory:
+        df = df[df["directoryName"] == directory]
+    if group:
+        df = df[df["groupName"] == group]
+    if directory or group:
+        roles_df = roles_df[roles_df["userId"].isin(df["userId"])] if not roles_df.empty else roles_df
+    return df, roles_df
+
+
+def _bucket(labels, weights, top_n, other_label):
+    totals = weights.groupby(labels, sort=False, observed=True).sum()
+    if not top_n or len(totals) <= top_n:
+        return labels
+    keep = totals.nlargest(top_n, keep="first").index
+    other = f"{other_label} ({len(totals) - top_n})"
+    # Columnar snapshots load group names as categoricals, which only accept known labels
+    if isinstance(labels.dtype, pd.CategoricalDtype) and other not in labels.cat.categories:
+        labels = labels.cat.add_categories([other])
+    return labels.where(labels.isin(keep), other)
+
+
+def level_of_detail(frame, top_groups=None, top_users=None, collapse_users=False, other_label=OTHER_LABEL):
+    """Bound the number of Sankey nodes regardless of org size.
+
+    Groups and users outside the ``top_groups`` / ``top_users`` heaviest are
+    merged into one "Other (n)" node per stage, and ``collapse_users`` drops
+    the User stage entirely so its flows are summed into the neighbouring
+    stages. Returns a re-aggregated frame with the remaining stage columns.
+    """
+    if frame.empty:
+        return frame
+    columns = list(frame.columns)
+    stages = columns[::2]
+    weight_stages = columns[1::2]
+    weights = frame[weight_stages[-1]]
+    paths = frame[stages].copy()
+    paths[stages[GROUP_STAGE]] = _bucket(paths[stages[GROUP_STAGE]], weights, top_groups, other_label)
+    if collapse_users:
+        paths = paths.drop(columns=stages[USER_STAGE])
+    else:
+        paths[stages[USER_STAGE]] = _bucket(paths[stages[USER_STAGE]], weights, top_users, other_label)
+
+    kept = list(paths.columns)
+    paths["weight"] = weights.values
+    summed = paths.groupby(kept, sort=False, dropna=False, observed=True)["weight"].sum().reset_index()
+    result = pd.DataFrame(index=summed.index)
+    for stage in kept:
+        result[stage] = summed[stage]
+        result[f"{stage}_Weight"] = summed["weight"]
+    return result
@@ -0,0 +1,146 @@
+"""Sankey rendering in a worker process with an on-disk image cache.
+
+Charts are rendered to PNG/SVG bytes by a process pool so the Streamlit
+script can keep emitting tables while matplotlib lays the diagrams out.
+Images are cached under ``.sankey_cache/`` keyed by a hash of the input frame
+and the render options; re-opening the same snapshot is a file read. The
+cache is capped by total size and evicts least recently used images.
+"""
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+
+import pandas as pd
+
+CACHE_DIR = os.environ.get("SANKEY_CACHE_DIR", ".sankey_cache")
+CACHE_MAX_BYTES = int(os.environ.get("SANKEY_CACHE_MB", "200")) * 1024 * 1024
+DEFAULT_WORKERS = 2
+
+_executor = None
+_lock = threading.Lock()
+
+
+def _render(frame, titles, label_loc, title, figsize, fmt, dpi):
+    import ausankey as ask
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    # Figure API with an explicit ax: no pyplot global state in the worker
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    ax = fig.subplots()
+    ask.sankey(frame, ax=ax, fontsize=8, titles=titles, label_values=True, label_loc=label_loc)
+    ax.set_title(title, fontsize=12)
+    buf = io.BytesIO()
+    fig.savefig(buf, format=fmt, dpi=dpi, bbox_inches="tight")
+    return buf.getvalue()
+
+
+def get_executor(max_workers=DEFAULT_WORKERS):
+    global _executor
+    with _lock:
+        if _executor is None:
+            # spawn: forking the multi-threaded Streamlit server is not safe
+            _executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+        return _executor
+
+
+def _submit(fn, *args):
+    executor = get_executor()
+    # Streamlit registers the app script as __main__, and spawned workers would
+    # re-run it on start-up; point __main__ at this module while they launch.
+    # Workers are spawned from submit, so concurrent sessions take turns here.
+    with _lock:
+        main = sys.modules["__main__"]
+        sys.modules["__main__"] = sys.modules[__name__]
+        try:
+            return executor.submit(fn, *args)
+        finally:
+            # Unless a Streamlit rerun has installed its own script meanwhile
+            if sys.modules["__main__"] is sys.modules[__name__]:
+                sys.modules["__main__"] = main
+
+
+def cache_key(frame, **options):
+    digest = hashlib.sha256()
+    digest.update(json.dumps(list(map(str, frame.columns))).encode())
+    digest.update(pd.util.hash_pandas_object(frame, index=False).values.tobytes())
+    digest.update(json.dumps(options, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+def _cache_path(key, fmt):
+    return os.path.join(CACHE_DIR, f"{key}.{fmt}")
+
+
+def read_cached(key, fmt="png"):
+    path = _cache_path(key, fmt)
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    # Touch so LRU eviction sees the hit
+    os.utime(path)
+    return data
+
+
+def write_cached(key, data, fmt="png", max_bytes=CACHE_MAX_BYTES):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = _cache_path(key, fmt)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    evict(max_bytes)
+
+
+def evict(max_bytes=CACHE_MAX_BYTES):
+    """Delete least recently used images until the cache fits in ``max_bytes``."""
+    if not os.path.isdir(CACHE_DIR):
+        return
+    entries = []
+    for name in os.listdir(CACHE_DIR):
+        if name.endswith(".tmp"):
+            continue
+        path = os.path.join(CACHE_DIR, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+def submit_render(frame, titles, label_loc, title, figsize=(14, 10), fmt="png", dpi=100):
+    """Future resolving to the image bytes, served from the cache when possible."""
+    key = cache_key(frame, titles=titles, label_loc=label_loc, title=title, figsize=figsize, fmt=fmt, dpi=dpi)
+    cached = read_cached(key, fmt)
+    if cached is not None:
+        done = Future()
+        done.set_result(cached)
+        done.cache_hit = True
+        return done
+
+    future = _submit(_render, frame, titles, label_loc, title, figsize, fmt, dpi)
+    future.cache_hit = False
+
+    def store(f):
+        if not f.cancelled() and f.exception() is None:
+            write_cached(key, f.result(), fmt)
+
+    future.add_done_callback(store)
+    return future
@@ -0,0 +1,267 @@
+"""Crawl snapshot storage: an append-only JSONL journal plus a compacted snapshot.
+
+During a crawl every membership row is appended to ``hierarchy_data.jsonl``
+(buffered, fsync'd in batches) instead of rewriting the whole snapshot. When
+the crawl finishes the rows are compacted into ``hierarchy_data.json`` and the
+journal is removed. Loading reads the snapshot and replays any journal left
+behind by an interrupted crawl.
+
+The snapshot can also be columnar (needs ``pyarrow``): ``.parquet`` or a
+memory-mappable Arrow IPC ``.arrow`` file, with the repeated directory, group,
+role and platform-role strings stored as dictionary-encoded categoricals.
+"""
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+
+from tracing import get_tracer
+
+try:
+    import pyarrow.feather as feather
+except ImportError:
+    feather = None
+
+SNAPSHOT_PATH = "hierarchy_data.json"
+JOURNAL_PATH = "hierarchy_data.jsonl"
+SNAPSHOT_FORMATS = {
+    "json": "hierarchy_data.json",
+    "parquet": "hierarchy_data.parquet",
+    "arrow": "hierarchy_data.arrow",
+}
+# Low-cardinality strings repeated on every membership row
+# orgName / orgId only exist in the merged multi-org snapshot
+CATEGORICAL_COLUMNS = ["orgName", "orgId", "directoryId", "directoryName", "groupId", "groupName", "notes", "platformRoles"]
+MEMBERSHIP_KEY = ["directoryId", "groupId", "userId"]
+ROLE_COLUMNS = ["userId", "userName", "userEmail", "groupId", "groupName", "roleKey"]
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_FSYNC_INTERVAL = 2.0
+
+
+def journal_path_for(snapshot_path):
+    return os.path.splitext(snapshot_path)[0] + ".jsonl"
+
+
+class SnapshotJournal:
+    """Buffered JSONL appender; flushes and fsyncs every ``batch_size`` records
+    or ``fsync_interval`` seconds, whichever comes first."""
+
+    def __init__(self, path=JOURNAL_PATH, batch_size=DEFAULT_BATCH_SIZE, fsync_interval=DEFAULT_FSYNC_INTERVAL):
+        self.path = path
+        self.batch_size = batch_size
+        self.fsync_interval = fsync_interval
+        self.buffer = []
+        self.last_sync = time.monotonic()
+        self.lock = threading.RLock()
+        self.file = open(path, "a", encoding="utf-8")
+
+    def append(self, record):
+        with self.lock:
+            self.buffer.append(json.dumps(record, separators=(",", ":")))
+            if len(self.buffer) >= self.batch_size or time.monotonic() - self.last_sync >= self.fsync_interval:
+                self.flush()
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+
+    def flush(self):
+        with self.lock, get_tracer().span("journal flush", "io", records=len(self.buffer)):
+            if self.buffer:
+                self.file.write("\n".join(self.buffer) + "\n")
+                self.buffer = []
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.last_sync = time.monotonic()
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_journal(path=JOURNAL_PATH):
+    records = []
+    if not os.path.exists(path):
+        return records
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                # Torn final line from a crash mid-write
+                break
+    return records
+
+
+def rewrite_journal(records, path=JOURNAL_PATH):
+    """Atomically replace the journal with ``records``.
+
+    A resumed crawl keeps only the rows of groups the checkpoint recorded as
+    complete, so rows of a group cut off mid-write are never journaled twice.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def discard_journal(path=JOURNAL_PATH):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def roles_frame(df):
+    """``roles_from_entries`` for a hierarchy DataFrame, without a per-row loop."""
+    if df.empty:
+        return pd.DataFrame(columns=ROLE_COLUMNS)
+    notes = df["notes"].astype(object).fillna("")
+    platform = df["platformRoles"].astype(object).fillna("")
+    group_rows = df.loc[notes != "", ["userId", "userName", "userEmail", "groupId", "groupName"]]
+    group_roles = group_rows.assign(roleKey=notes[notes != ""].str.split(", ")).explode("roleKey")
+    platform_rows = df.loc[platform != "", ["userId", "userName", "userEmail"]]
+    platform_roles = platform_rows.assign(
+        groupId="ORG-LEVEL", groupName="Organization-wide", roleKey=platform[platform != ""].str.split(", ")
+    ).explode("roleKey")
+    # Index = membership position; a stable sort puts each membership's group roles before its platform roles
+    roles = pd.concat([group_roles, platform_roles]).sort_index(kind="stable")
+    return roles[roles["roleKey"] != ""].reset_index(drop=True)[ROLE_COLUMNS]
+
+
+def roles_from_entries(entries):
+    """Rebuild ``roles_mapping`` rows from hierarchy rows, in crawl order.
+
+    Group roles come from the comma-joined ``notes`` column and org-level
+    roles from ``platformRoles``, exactly as the crawler emits them.
+    """
+    roles = []
+    for e in entries:
+        user = {"userId": e["userId"], "userName": e["userName"], "userEmail": e["userEmail"]}
+        for r in filter(None, (e.get("notes") or "").split(", ")):
+            roles.append(dict(user, groupId=e["groupId"], groupName=e["groupName"], roleKey=r))
+        for p_role in filter(None, (e.get("platformRoles") or "").split(", ")):
+            roles.append(dict(user, groupId="ORG-LEVEL", groupName="Organization-wide", roleKey=p_role))
+    return roles
+
+
+def columnar_available():
+    return feather is not None
+
+
+def available_formats():
+    return [fmt for fmt in SNAPSHOT_FORMATS if fmt == "json" or columnar_available()]
+
+
+def _format_of(path):
+    ext = os.path.splitext(path)[1].lstrip(".")
+    return ext if ext in SNAPSHOT_FORMATS else "json"
+
+
+def to_columnar(data):
+    """DataFrame with the repeated string columns dictionary-encoded."""
+    df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
+    categorical = {c: "category" for c in CATEGORICAL_COLUMNS if c in df.columns}
+    return df.astype(categorical)
+
+
+def write_snapshot(data, path=SNAPSHOT_PATH):
+    """Atomically replace the snapshot file; the format follows the extension."""
+    fmt = _format_of(path)
+    with get_tracer().span("write snapshot", "io", format=fmt):
+        _write_snapshot(data, path, fmt)
+
+
+def _write_snapshot(data, path, fmt):
+    tmp_path = f"{path}.tmp"
+    if fmt == "json":
+        if isinstance(data, pd.DataFrame):
+            data = data.astype(object).to_dict("records")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+    elif not columnar_available():
+        raise RuntimeError(f"{fmt} snapshots need pyarrow: pip install pyarrow")
+    elif fmt == "parquet":
+        to_columnar(data).to_parquet(tmp_path, engine="pyarrow", compression="zstd", index=False)
+    else:
+        # Uncompressed so the file can be memory-mapped on load
+        feather.write_feather(to_columnar(data), tmp_path, compression="uncompressed")
+    os.replace(tmp_path, path)
+
+
+def compact(data, path=SNAPSHOT_PATH, journal_path=None):
+    """Write the final snapshot and drop the journal it supersedes."""
+    journal_path = journal_path or journal_path_for(path)
+    write_snapshot(data, path)
+    if os.path.exists(journal_path):
+        os.remove(journal_path)
+
+
+def load_hierarchy(path=None, journal_path=None):
+    """The snapshot as a DataFrame, updated with any rows still in the journal.
+
+    The snapshot is read columnar (``read_frame``). Rows journaled by a
+    running or interrupted crawl replace the snapshot's row for the same
+    membership and add the rest, so the viewer sees a crawl before it is
+    compacted.
+    """
+    path = path or latest_snapshot_path()
+    journal_path = journal_path or journal_path_for(path)
+    df = read_frame(path)
+    journaled = read_journal(journal_path)
+    if not journaled:
+        return df
+    df = pd.concat([df, pd.DataFrame(journaled)], ignore_index=True)
+    return df.drop_duplicates(MEMBERSHIP_KEY, keep="last", ignore_index=True)
+
+
+def latest_snapshot_path():
+    """Most recently written snapshot across all formats (JSON if none exist)."""
+    existing = [p for p in SNAPSHOT_FORMATS.values() if os.path.exists(p)]
+    return max(existing, key=os.path.getmtime) if existing else SNAPSHOT_PATH
+
+
+def read_frame(path=None):
+    """Load a snapshot straight into a DataFrame."""
+    path = path or latest_snapshot_path()
+    if not os.path.exists(path):
+        return pd.DataFrame()
+    fmt = _format_of(path)
+    if fmt == "parquet":
+        return pd.read_parquet(path, engine="pyarrow")
+    if fmt == "arrow":
+        if not columnar_available():
+            raise RuntimeError("arrow snapshots need pyarrow: pip install pyarrow")
+        return feather.read_table(path, memory_map=True).to_pandas()
+    with open(path, "r", encoding="utf-8") as f:
+        return pd.DataFrame(json.load(f))
+
+
+def read_snapshot(path=None):
+    """Rows of the last compacted snapshot only, ignoring any journal."""
+    path = path or latest_snapshot_path()
+    if _format_of(path) != "json":
+        return read_frame(path).astype(object).to_dict("records")
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def snapshot_exists(path=SNAPSHOT_PATH, journal_path=None):
+    return os.path.exists(path) or os.path.exists(journal_path or journal_path_for(path))
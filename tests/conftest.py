@@ -0,0 +1,20 @@
+import pytest
+
+import atlassian_client as client
+from mock_admin_api import MockAdminServer, SyntheticOrg
+
+
+@pytest.fixture(autouse=True)
+def in_tmp_path(tmp_path, monkeypatch):
+    # Snapshots, journals, checkpoints and metrics are written to the working directory
+    monkeypatch.chdir(tmp_path)
+    # The mock answers instantly; don't let the shared limiter pace the test crawls
+    client.configure(rate_limit=1000)
+
+
+@pytest.fixture
+def mock_server():
+    """A small synthetic org with short pages, so every listing spans several requests."""
+    org = SyntheticOrg(directories=2, groups=8, users=30, density=0.2, empty_groups=0.1, role_groups=0.5, admins=0.2)
+    with MockAdminServer(org, page_size=5) as server:
+        yield server
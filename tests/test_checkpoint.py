@@ -0,0 +1,39 @@
+"""Checkpoint replay: saved listings resume from their cursor without being held in memory."""
+from checkpoint import CrawlCheckpoint, saved_options
+
+
+def test_live_pages_keep_only_the_cursor(tmp_path):
+    path = tmp_path / "checkpoint.jsonl"
+    checkpoint = CrawlCheckpoint(path=str(path))
+    checkpoint.record_page("users", [{"accountId": "a"}, {"accountId": "b"}], "users?cursor=2")
+    assert checkpoint.pages["users"] == {"items": [], "next": "users?cursor=2"}
+    checkpoint.close()
+
+    resumed = CrawlCheckpoint(path=str(path))
+    assert resumed.resume_listing("users") == ([{"accountId": "a"}, {"accountId": "b"}], "users?cursor=2")
+    # Handed over once; the listing's new pages are recorded from here on
+    assert resumed.resume_listing("users") == ([], "users?cursor=2")
+    assert resumed.resume_listing("groups") is None
+    resumed.close()
+
+
+def test_completed_group_drops_its_listings(tmp_path):
+    path = str(tmp_path / "checkpoint.jsonl")
+    checkpoint = CrawlCheckpoint(path=path)
+    checkpoint.record_page("g1/users", [{"accountId": "a"}], None)
+    checkpoint.mark_group_done("d1", "g1", keys=["g1/users"])
+    checkpoint.close()
+
+    resumed = CrawlCheckpoint(path=path)
+    assert resumed.is_group_done("d1", "g1")
+    assert resumed.resume_listing("g1/users") is None
+    resumed.close()
+
+
+def test_options_are_recorded_first(tmp_path):
+    path = str(tmp_path / "checkpoint.jsonl")
+    options = {"org_id": "o", "user_side": False}
+    CrawlCheckpoint(path=path, options=options).close()
+    CrawlCheckpoint(path=path, options={"org_id": "other"}).close()
+    assert saved_options(path) == options
+    assert saved_options(str(tmp_path / "missing.jsonl")) is None
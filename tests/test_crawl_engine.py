@@ -0,0 +1,44 @@
+"""Group details come back in input order with a bounded number fetched ahead."""
+import threading
+import time
+
+import crawl_engine
+
+
+def slow(g):
+    time.sleep(0.02 if g % 7 == 0 else 0)
+    return g
+
+
+def test_results_keep_input_order():
+    groups = list(range(40))
+    out = list(crawl_engine.iter_group_details(groups, slow, lambda g: -g, max_workers=4))
+    assert out == [(g, g, -g) for g in groups]
+    assert list(crawl_engine.fan_out(slow, groups, max_workers=4)) == [(g, g) for g in groups]
+
+
+def test_window_bounds_work_ahead_of_a_slow_group():
+    release = threading.Event()
+    started = []
+
+    def fetch(g):
+        started.append(g)
+        if g == 0:
+            release.wait(5)
+        return g
+
+    details = crawl_engine.fan_out(fetch, range(100), max_workers=2)
+    consumer = threading.Thread(target=lambda: next(details))
+    consumer.start()
+    time.sleep(0.2)
+    # Group 0 blocks the head of the window, so only the window was submitted
+    assert len(started) <= 2 * crawl_engine.WINDOW_PER_WORKER
+    release.set()
+    consumer.join()
+    assert [item for item, _ in details] == list(range(1, 100))
+
+
+def test_serial_mode_runs_on_the_calling_thread():
+    caller = threading.get_ident()
+    out = list(crawl_engine.fan_out(lambda g: threading.get_ident(), [1, 2], max_workers=1))
+    assert out == [(1, caller), (2, caller)]
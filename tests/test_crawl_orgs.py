@@ -0,0 +1,27 @@
+"""Multi-org crawls report an org whose directories can't be listed as failed."""
+import json
+
+import crawler
+
+
+def test_wrong_org_id_is_reported_as_an_error(mock_server):
+    server = mock_server
+    orgs = [
+        {"name": "good", "org_id": server.org.org_id, "api_key": "k"},
+        {"name": "wrong", "org_id": "no-such-org", "api_key": "k"},
+    ]
+    summary = crawler.crawl_orgs(orgs, processes=2, base_url=server.base_url, resume=False)
+
+    assert "error" not in summary["orgs"]["good"]
+    assert summary["orgs"]["good"]["memberships"] > 0
+    assert summary["orgs"]["wrong"]["error"] == "directories listing failed: HTTP 404"
+    assert summary["memberships"] == summary["orgs"]["good"]["memberships"]
+    with open(crawler.ALL_ORGS_METRICS_PATH, encoding="utf-8") as f:
+        assert "error" in json.load(f)["orgs"]["wrong"]
+
+
+def test_single_org_cli_exits_non_zero_for_a_wrong_org(mock_server, monkeypatch):
+    server = mock_server
+    monkeypatch.setattr(crawler, "BASE_URL", server.base_url)
+    assert crawler.main(["--org-id", "no-such-org", "--token", "k", "--fresh", "--rate-limit", "1000"]) == 1
+    assert crawler.main(["--org-id", server.org.org_id, "--token", "k", "--fresh", "--rate-limit", "1000"]) == 0
@@ -0,0 +1,91 @@
+"""Crawl planner: request estimates and the per-group / per-user choice."""
+import json
+
+import crawler
+import snapshot
+from crawl_planner import PER_GROUP, PER_USER, CrawlPlan, member_count, plan_directory
+from mock_admin_api import MockAdminServer, SyntheticOrg
+
+
+def groups(*sizes):
+    return [{"id": f"g{i}", "name": f"group {i}", "counts": {"users": n}} for i, n in enumerate(sizes)]
+
+
+def test_member_count_needs_an_integer_count():
+    assert member_count({"counts": {"users": 3}}) == 3
+    assert member_count({"counts": {}}) is None
+    assert member_count({}) is None
+
+
+def test_empty_groups_are_skipped_and_pages_counted():
+    plan = plan_directory("d", "D", groups(0, 1, 250, 0), users=300, page_size=100)
+    assert [g["id"] for g in plan.groups] == ["g1", "g2"]
+    assert [g["id"] for g in plan.skipped] == ["g0", "g3"]
+    # Roles + one page for g1; roles + three pages for g2
+    assert plan.costs == {PER_GROUP: 6}
+    assert plan.strategy == PER_GROUP
+    assert plan.baseline == 6 + 2 * 2
+
+
+def test_keep_empty_groups():
+    plan = plan_directory("d", "D", groups(0, 5), users=10, skip_empty=False)
+    assert plan.skipped == [] and len(plan.groups) == 2
+    assert plan.requests == plan.baseline == 4
+
+
+def test_unknown_counts_assume_one_page_and_skip_nothing():
+    plan = plan_directory("d", "D", [{"id": "g0"}, {"id": "g1", "counts": {"users": 0}}], users=10)
+    assert plan.skipped == []
+    assert plan.requests == 4
+
+
+def test_per_user_wins_with_few_users_and_many_groups():
+    many_groups = groups(*[2] * 50)
+    plan = plan_directory("d", "D", many_groups, users=5, user_side=True)
+    # One page per user, plus roles for each group with members
+    assert plan.costs == {PER_GROUP: 100, PER_USER: 55}
+    assert plan.strategy == PER_USER
+    assert plan_directory("d", "D", many_groups, users=5).strategy == PER_GROUP
+
+
+def test_per_group_wins_with_many_users():
+    plan = plan_directory("d", "D", groups(40, 40), users=1000, user_side=True)
+    assert plan.strategy == PER_GROUP
+    assert plan.costs[PER_USER] > plan.costs[PER_GROUP]
+
+
+def test_ties_go_to_per_group():
+    plan = plan_directory("d", "D", groups(1, 1), users=2, user_side=True)
+    assert plan.costs[PER_USER] == plan.costs[PER_GROUP]
+    assert plan.strategy == PER_GROUP
+
+
+def test_crawl_plan_totals():
+    plan = CrawlPlan(listing_requests=7)
+    plan.add(plan_directory("d1", "D1", groups(0, 3), users=3))
+    plan.add(plan_directory("d2", "D2", groups(*[1] * 20), users=2, user_side=True))
+    assert plan.requests == 2 + 22
+    assert plan.baseline_requests == 4 + 40
+    summary = plan.to_dict()
+    assert summary["planned_requests"] == 24 and summary["listing_requests"] == 7
+    assert [row["strategy"] for row in summary["directories"]] == [PER_GROUP, PER_USER]
+
+
+def test_per_user_crawl_gives_the_same_rows(tmp_path):
+    # Few users, many groups: the planner picks per-user fetching for every directory
+    org = SyntheticOrg(directories=2, groups=60, users=8, density=0.3, empty_groups=0.2)
+    with MockAdminServer(org, page_size=100) as server:
+        def run(**options):
+            result = crawler.crawl("token", org.org_id, base_url=server.base_url, resume=False,
+                                   on_message=lambda level, text: None, **options)
+            with open(snapshot.SNAPSHOT_PATH, encoding="utf-8") as f:
+                return result, sorted(json.dumps(r, sort_keys=True) for r in json.load(f))
+
+        baseline, baseline_rows = run(skip_empty_groups=False)
+        per_user, per_user_rows = run(user_side=True)
+
+    assert {row["strategy"] for row in per_user.plan.rows()} == {PER_USER}
+    assert per_user_rows == baseline_rows
+    requests = per_user.metrics["requests"]["totals"]["requests"]
+    assert requests < baseline.metrics["requests"]["totals"]["requests"]
+    assert requests == per_user.plan.listing_requests + per_user.plan.requests
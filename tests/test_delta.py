@@ -0,0 +1,77 @@
+"""Incremental crawls: unchanged groups come from the previous snapshot, changes land in the delta."""
+import json
+
+import crawler
+import delta
+import snapshot
+
+
+def run_crawl(server, **options):
+    return crawler.crawl("token", server.org.org_id, base_url=server.base_url, max_workers=2,
+                         on_message=lambda level, text: None, **options)
+
+
+def snapshot_rows():
+    with open(snapshot.SNAPSHOT_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_diff_rows_ignores_key_order_and_keeps_row_order():
+    previous = [{"a": 1, "b": 2}, {"a": 2, "b": 3}]
+    current = [{"b": 2, "a": 1}, {"a": 3, "b": 4}]
+    assert delta.diff_rows(previous, current) == {"added": [{"a": 3, "b": 4}], "removed": [{"a": 2, "b": 3}]}
+
+
+def test_rows_round_trip_to_api_items():
+    rows = [
+        {"directoryId": "d", "groupId": "g", "groupName": "G", "userId": "u1", "userName": "a@x", "userEmail": "a@x",
+         "notes": "admin, viewer", "platformRoles": "org-admin", "directoryName": "D"},
+        {"directoryId": "d", "groupId": "g", "groupName": "G", "userId": "u2", "userName": "b@x", "userEmail": "b@x",
+         "notes": "admin, viewer", "platformRoles": "", "directoryName": "D"},
+    ]
+    assert delta.roles_from_rows(rows) == [{"roleKey": "admin"}, {"roleKey": "viewer"}]
+    assert delta.roles_from_rows([]) is None
+    assert [m["platformRoles"] for m in delta.members_from_rows(rows)] == [["org-admin"], []]
+    assert delta.group_rows(rows) == {("d", "g"): rows}
+
+
+def test_unchanged_org_is_answered_from_the_previous_snapshot(mock_server):
+    run_crawl(mock_server)
+    full = snapshot_rows()
+
+    result = run_crawl(mock_server, incremental=True)
+    assert result.validator_stats["modified"] == 0
+    assert result.validator_stats["not_modified"] > 0
+    assert snapshot_rows() == full
+    assert result.changes == {"memberships": {"added": [], "removed": []}, "roles": {"added": [], "removed": []}}
+
+
+def test_changed_group_is_refetched_and_written_to_the_delta(mock_server):
+    org = mock_server.org
+    run_crawl(mock_server)
+    previous = snapshot_rows()
+
+    # Move one user into a group and out of another
+    dir_id = org.directories[0]["directoryId"]
+    groups = [g["id"] for g in org.groups[dir_id] if org.members[(dir_id, g["id"])]]
+    source, target = groups[0], groups[1]
+    user = next(i for i in org.members[(dir_id, source)] if i not in org.members[(dir_id, target)])
+    org.members[(dir_id, source)].remove(user)
+    org.members[(dir_id, target)] = sorted(org.members[(dir_id, target)] + [user])
+    for g in org.groups[dir_id]:
+        g["counts"]["users"] = len(org.members[(dir_id, g["id"])])
+    account_id = org.users[dir_id][user]["accountId"]
+
+    result = run_crawl(mock_server, incremental=True)
+    added, removed = result.changes["memberships"]["added"], result.changes["memberships"]["removed"]
+    assert [(r["groupId"], r["userId"]) for r in added] == [(target, account_id)]
+    assert [(r["groupId"], r["userId"]) for r in removed] == [(source, account_id)]
+    with open(delta.DELTA_PATH, encoding="utf-8") as f:
+        assert json.load(f) == result.changes
+    assert result.validator_stats["not_modified"] > 0
+
+    # Same snapshot as a full crawl of the changed org
+    incremental = snapshot_rows()
+    run_crawl(mock_server, resume=False)
+    assert incremental == snapshot_rows()
+    assert incremental != previous
@@ -0,0 +1,109 @@
+"""Chunked exports round-trip in every format and stream model tables chunk by chunk."""
+import gzip
+import io
+
+import pandas as pd
+import pytest
+
+import exports
+from hierarchy_model import HierarchyModel
+
+
+def frame(rows=23):
+    return pd.DataFrame({
+        "id": range(rows),
+        "name": [f"näme {i}" if i % 5 else None for i in range(rows)],
+        "kind": pd.Categorical(["a", "b", "c"] * (rows // 3) + ["a"] * (rows % 3)),
+    })
+
+
+def read(path, fmt):
+    if fmt.startswith("csv"):
+        return pd.read_csv(path)
+    if fmt.startswith("ndjson"):
+        return pd.read_json(path, lines=True)
+    return pd.read_parquet(path)
+
+
+@pytest.mark.parametrize("fmt", exports.available_formats())
+def test_round_trip(tmp_path, fmt):
+    df = frame()
+    path = exports.export_file(df, "t", fmt, str(tmp_path), chunk_rows=5)
+    assert path.endswith(f"t.{fmt}")
+    back = read(path, fmt)
+    assert len(back) == len(df)
+    assert back["id"].tolist() == df["id"].tolist()
+    assert back["name"].isna().tolist() == df["name"].isna().tolist()
+    assert back["kind"].astype(str).tolist() == df["kind"].astype(str).tolist()
+    assert not (tmp_path / f"t.{fmt}.tmp").exists()
+
+
+def test_gzip_output_is_deterministic(tmp_path):
+    first = open(exports.export_file(frame(), "a", "csv.gz", str(tmp_path)), "rb").read()
+    second = open(exports.export_file(frame(), "b", "csv.gz", str(tmp_path)), "rb").read()
+    assert first == second
+    assert gzip.decompress(first).decode("utf-8").startswith("id,name,kind\n")
+
+
+def test_iterable_of_frames_uses_the_first_frames_columns(tmp_path):
+    chunks = [frame(3), frame(4)[["kind", "id", "name"]]]
+    path = exports.export_file(iter(chunks), "t", "csv", str(tmp_path))
+    back = pd.read_csv(path)
+    assert list(back.columns) == ["id", "name", "kind"]
+    assert back["id"].tolist() == [0, 1, 2, 0, 1, 2, 3]
+
+
+@pytest.mark.skipif("parquet" not in exports.available_formats(), reason="needs pyarrow")
+def test_nested_values_are_stored_as_json_in_parquet(tmp_path):
+    df = pd.DataFrame({"id": [1, 2, 3], "meta": [{"k": 1}, None, {"k": 3}], "tags": [["a"], [], ["b", "c"]]})
+    back = pd.read_parquet(exports.export_file(df, "t", "parquet", str(tmp_path), chunk_rows=1))
+    assert back["meta"].fillna("").tolist() == ['{"k": 1}', "", '{"k": 3}']
+    assert back["tags"].tolist() == ['["a"]', "[]", '["b", "c"]']
+
+
+def test_empty_frame_writes_a_header(tmp_path):
+    path = exports.export_file(pd.DataFrame(columns=["a", "b"]), "t", "csv.gz", str(tmp_path))
+    assert gzip.open(path, "rt").read() == "a,b\n"
+
+
+def test_file_reader_returns_the_file_bytes():
+    data = exports.file_reader(frame(), "t", "csv.gz")()
+    assert pd.read_csv(io.BytesIO(data), compression="gzip").shape == (23, 3)
+
+
+def test_format_of():
+    assert exports.format_of("x/hierarchy_data.ndjson.gz") == "ndjson.gz"
+    assert exports.format_of("hierarchy_data.csv") == "csv"
+    with pytest.raises(ValueError):
+        exports.format_of("hierarchy_data.xlsx")
+
+
+def test_export_model_streams_both_tables(tmp_path):
+    rows = [
+        {"directoryId": "d", "directoryName": "D", "groupId": f"g{i % 3}", "groupName": f"G{i % 3}",
+         "userId": f"u{i}", "userName": f"u{i}@x", "userEmail": f"u{i}@x",
+         "notes": "admin" if i % 3 == 0 else "", "platformRoles": "org-admin" if i % 4 == 0 else ""}
+        for i in range(12)
+    ]
+    model = HierarchyModel.from_rows(rows)
+    paths = exports.export_model(model, ["csv.gz"], str(tmp_path), chunk_rows=5)
+    assert [p.rsplit("/", 1)[-1] for p in paths] == ["hierarchy_data.csv.gz", "roles_mapping.csv.gz"]
+    hierarchy = pd.read_csv(paths[0], keep_default_na=False)
+    roles = pd.read_csv(paths[1], keep_default_na=False)
+    assert hierarchy.to_dict("records") == model.hierarchy_frame().to_dict("records")
+    assert roles.to_dict("records") == model.roles_frame().to_dict("records")
+
+
+def test_chunks_share_one_lookup_build(monkeypatch):
+    rows = [
+        {"directoryId": "d", "directoryName": "D", "groupId": f"g{i % 4}", "groupName": f"G{i % 4}",
+         "userId": f"u{i % 7}", "userName": f"u{i % 7}", "userEmail": f"u{i % 7}@x", "notes": "", "platformRoles": ""}
+        for i in range(50)
+    ]
+    model = HierarchyModel.from_rows(rows)
+    builds = []
+    lookup_columns = model._lookup_columns
+    monkeypatch.setattr(model, "_lookup_columns", lambda: builds.append(1) or lookup_columns())
+    chunks = list(model.iter_hierarchy_frames(8))
+    assert len(chunks) == 7 and len(builds) == 1
+    assert pd.concat(chunks, ignore_index=True).to_dict("records") == model.hierarchy_frame().to_dict("records")
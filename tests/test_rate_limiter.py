@@ -0,0 +1,85 @@
+"""Adaptive rate limiting: header parsing, back-off on 429 and the client's retries."""
+import json
+from email.utils import formatdate
+
+import atlassian_client as client
+import crawler
+import snapshot
+from mock_admin_api import MockAdminServer, SyntheticOrg
+from rate_limiter import AdaptiveRateLimiter, RECOVERY_STEP, parse_reset, parse_retry_after
+
+
+class Response:
+    def __init__(self, status_code=200, **headers):
+        self.status_code = status_code
+        self.headers = headers
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after("-1") == 0.0
+    assert parse_retry_after(formatdate(1_000_030, usegmt=True), now=1_000_000) == 30.0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+
+def test_parse_reset():
+    assert parse_reset("1000010", now=1_000_000) == 1000010  # small numbers are a delta
+    assert parse_reset("2000000010", now=2_000_000_000) == 10.0  # large ones an epoch
+    assert parse_reset("2033-05-18T03:33:30Z", now=2_000_000_000) == 10.0
+
+
+def test_429_halves_the_rate_and_blocks_callers():
+    limiter = AdaptiveRateLimiter(rate=8)
+    assert limiter.observe(Response(429, **{"Retry-After": "2"})) == 2.0
+    assert limiter.rate == 4
+    assert limiter.tokens == 0
+    assert limiter.blocked_until > 0
+    assert limiter.snapshot()["throttled"] == 1
+
+    # Successful responses raise the rate back towards the ceiling
+    limiter.observe(Response(200))
+    assert limiter.rate == 4 + 8 * RECOVERY_STEP
+
+
+def test_rate_never_drops_below_the_minimum():
+    limiter = AdaptiveRateLimiter(rate=1, min_rate=0.5)
+    for _ in range(5):
+        limiter.observe(Response(429, **{"Retry-After": "0"}))
+    assert limiter.rate == 0.5
+
+
+def test_remaining_budget_paces_the_rate():
+    limiter = AdaptiveRateLimiter(rate=10)
+    limiter.observe(Response(200, **{"X-RateLimit-Remaining": "6", "X-RateLimit-Reset": "3"}))
+    assert limiter.rate == 2
+    limiter.observe(Response(200, **{"X-RateLimit-Remaining": "600", "X-RateLimit-Reset": "3"}))
+    assert limiter.rate == 10
+
+
+def test_set_ceiling_caps_the_current_rate():
+    limiter = AdaptiveRateLimiter(rate=10)
+    limiter.set_ceiling(4)
+    assert limiter.snapshot()["rate"] == 4 and limiter.snapshot()["ceiling"] == 4
+
+
+def test_throttled_crawl_retries_to_the_same_rows():
+    org = SyntheticOrg(directories=1, groups=10, users=30, density=0.2)
+
+    def crawl(**server_options):
+        with MockAdminServer(org, page_size=10, **server_options) as server:
+            crawler.crawl("token", org.org_id, base_url=server.base_url, max_workers=1, resume=False,
+                          on_message=lambda level, text: None)
+            throttled = server.stats.get("throttled", 0)
+        with open(snapshot.SNAPSHOT_PATH, encoding="utf-8") as f:
+            return json.load(f), throttled
+
+    expected, _ = crawl()
+    before = client.get_rate_limiter().snapshot()
+    rows, throttled = crawl(throttle=0.2, retry_after=0)
+    after = client.get_rate_limiter().snapshot()
+
+    assert throttled > 0
+    assert after["throttled"] - before["throttled"] == throttled
+    assert after["retries"] - before["retries"] == throttled
+    assert rows == expected
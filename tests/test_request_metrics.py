@@ -0,0 +1,46 @@
+"""Prometheus export: every sample sits in a family declared by its own HELP / TYPE lines."""
+from request_metrics import RequestMetrics, endpoint_template
+
+HISTOGRAM_SUFFIXES = ("_bucket", "_sum", "_count")
+
+
+def families(text):
+    """Family name -> (type, sample names), failing on samples outside their family."""
+    declared, current, helped = {}, None, set()
+    for line in text.splitlines():
+        if line.startswith("# HELP "):
+            helped.add(line.split()[2])
+        elif line.startswith("# TYPE "):
+            _, _, name, kind = line.split()
+            assert name in helped, f"{name} has no HELP line"
+            assert name not in declared, f"{name} declared twice"
+            current = name
+            declared[name] = (kind, [])
+        elif line:
+            sample = line.split("{")[0].split()[0]
+            kind = declared[current][0]
+            allowed = [current + s for s in HISTOGRAM_SUFFIXES] if kind == "histogram" else [current]
+            assert sample in allowed, f"{sample} written inside the {current} family"
+            declared[current][1].append(sample)
+    return declared
+
+
+def test_prometheus_families_are_well_formed():
+    metrics = RequestMetrics()
+    url = "https://api.atlassian.com/admin/v2/orgs/o1/directories/d1/groups"
+    metrics.record_request("GET", url, 200, 0.02, 512)
+    metrics.record_request("GET", url, 429, 0.01)
+    metrics.record_retry()
+    metrics.record_listing(url, 3)
+
+    declared = families(metrics.to_prometheus())
+    prefix = "atlassian_crawl_"
+    assert declared[prefix + "pages_total"] == ("counter", [prefix + "pages_total"])
+    assert declared[prefix + "listing_calls_total"] == ("counter", [prefix + "listing_calls_total"])
+    assert declared[prefix + "request_duration_seconds"][0] == "histogram"
+    assert declared[prefix + "throttled_total"][0] == "counter"
+
+
+def test_endpoint_template_replaces_ids():
+    url = "https://api.atlassian.com/admin/v2/orgs/o1/directories/d1/groups/g1/users?cursor=x"
+    assert endpoint_template(url) == "api.atlassian.com/admin/v2/orgs/{orgId}/directories/{directoryId}/groups/{groupId}/users"
@@ -0,0 +1,45 @@
+"""Playground response cache: keys, TTL expiry and LRU eviction."""
+import response_cache
+from response_cache import ResponseCache, cache_key
+
+
+def test_key_separates_tokens_params_and_options():
+    key = cache_key("get", "https://x/api", {"b": "2", "a": "1"}, "token-1", paginate=True)
+    assert key == cache_key("GET", "https://x/api", {"a": "1", "b": "2"}, "token-1", paginate=True)
+    assert key != cache_key("GET", "https://x/api", {"a": "1", "b": "2"}, "token-2", paginate=True)
+    assert key != cache_key("GET", "https://x/api", {"a": "1"}, "token-1", paginate=True)
+    assert key != cache_key("GET", "https://x/api", {"a": "1", "b": "2"}, "token-1", paginate=False)
+    assert "token-1" not in repr(key)
+
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(response_cache.time, "monotonic", lambda: now[0])
+    cache = ResponseCache(ttl=10)
+    cache.put("k", "value")
+    now[0] += 9
+    assert cache.get("k") == "value"
+    now[0] += 2
+    assert cache.get("k") is None
+    assert cache.snapshot() == {"hits": 1, "misses": 1, "evictions": 0, "entries": 0}
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "b" is now the least recently used
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.snapshot()["evictions"] == 1
+
+
+def test_put_refreshes_an_entry():
+    cache = ResponseCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.put("a", 10)
+    cache.put("c", 3)
+    assert cache.get("a") == 10
+    assert cache.get("b") is None
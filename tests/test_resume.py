@@ -0,0 +1,94 @@
+"""Interrupted crawls resume without duplicating rows or reusing another crawl's checkpoint."""
+import json
+
+import pytest
+
+import crawler
+import snapshot
+from checkpoint import CrawlCheckpoint
+
+
+class Interrupted(Exception):
+    pass
+
+
+def run_crawl(server, pages=None, messages=None, **options):
+    """Crawl the mock org, raising ``Interrupted`` after ``pages`` fetched pages."""
+    fetched = []
+
+    def on_page(page):
+        fetched.append(page.url)
+        if pages is not None and len(fetched) > pages:
+            raise Interrupted
+
+    def on_message(level, text):
+        if messages is not None:
+            messages.append((level, text))
+
+    return crawler.crawl("token", server.org.org_id, base_url=server.base_url, max_workers=1,
+                         on_page=on_page, on_message=on_message, **options)
+
+
+def snapshot_rows():
+    with open(snapshot.SNAPSHOT_PATH, encoding="utf-8") as f:
+        return sorted(json.dumps(r, sort_keys=True) for r in json.load(f))
+
+
+def membership_keys(rows):
+    return [(r["directoryId"], r["groupId"], r["userId"]) for r in rows]
+
+
+@pytest.fixture
+def reference(mock_server):
+    run_crawl(mock_server, resume=False)
+    rows = snapshot_rows()
+    assert rows
+    return rows
+
+
+def test_resume_after_a_hard_kill_does_not_duplicate_rows(mock_server, reference):
+    with pytest.raises(Interrupted):
+        run_crawl(mock_server, pages=30)
+    checkpoint = CrawlCheckpoint()
+    assert checkpoint.done_groups
+    # A hard kill mid-group: some of an unfinished group's rows reached the journal
+    full = [json.loads(r) for r in reference]
+    unfinished = [r for r in full if not checkpoint.is_group_done(r["directoryId"], r["groupId"])]
+    checkpoint.close()
+    with snapshot.SnapshotJournal() as journal:
+        journal.extend(unfinished[:3])
+
+    # The resumed crawl dies again before compacting
+    messages = []
+    with pytest.raises(Interrupted):
+        run_crawl(mock_server, pages=4, messages=messages)
+    assert any("Resuming interrupted crawl" in text for _, text in messages)
+    journaled = snapshot.read_journal()
+    checkpoint = CrawlCheckpoint()
+    assert len(set(membership_keys(journaled))) == len(journaled)
+    assert all(checkpoint.is_group_done(r["directoryId"], r["groupId"]) for r in journaled)
+    checkpoint.close()
+
+    run_crawl(mock_server)
+    assert snapshot_rows() == reference
+    assert not snapshot.read_journal()
+
+
+def test_checkpoint_of_other_options_is_not_reused(mock_server, reference):
+    run_crawl(mock_server, plan_only=True, user_side=True)
+    messages = []
+    run_crawl(mock_server, messages=messages)
+    assert ("warning", "The saved checkpoint is from a crawl with other options; starting fresh.") in messages
+    assert not any("Resuming" in text for _, text in messages)
+    assert snapshot_rows() == reference
+
+
+def test_plan_only_listings_are_reused_by_the_same_crawl(mock_server, reference):
+    run_crawl(mock_server, plan_only=True)
+    messages = []
+    result = run_crawl(mock_server, messages=messages)
+    assert any("Resuming interrupted crawl" in text for _, text in messages)
+    # Only the group fan-out is fetched; the directory, group and user listings come from the checkpoint
+    endpoints = result.metrics["requests"]["endpoints"]
+    assert endpoints and all(e.endswith(("/role-assignments", "{groupId}/users")) for e in endpoints)
+    assert snapshot_rows() == reference
@@ -0,0 +1,94 @@
+"""The grouped Sankey frames describe the same flows as the original per-row code."""
+import pandas as pd
+import pytest
+
+from benchmarks.sankey_reference import flows, legacy_membership, legacy_roles, reference_roles, synthetic_hierarchy
+import snapshot
+from sankey_frames import (
+    MEMBERSHIP_COLUMNS, ROLE_COLUMNS, drill_down, level_of_detail, membership_sankey_frame, role_sankey_frame,
+)
+from snapshot import roles_from_entries
+
+
+def frames(rows=400, **sizes):
+    hierarchy = synthetic_hierarchy(rows, **sizes)
+    return pd.DataFrame(hierarchy), pd.DataFrame(roles_from_entries(hierarchy))
+
+
+def small_frames():
+    return frames(directories=3, groups=12, users=60, seed=3)
+
+
+def test_membership_frame_matches_legacy_flows():
+    df, _ = small_frames()
+    frame = membership_sankey_frame(df)
+    assert flows(frame, MEMBERSHIP_COLUMNS) == flows(legacy_membership(df), MEMBERSHIP_COLUMNS)
+    # Each path appears once, with every stage weighted by its membership count
+    assert not frame.duplicated(MEMBERSHIP_COLUMNS[::2]).any()
+    assert frame["Source_Weight"].sum() == len(df)
+
+
+def test_role_frame_matches_legacy_flows():
+    df, roles_df = small_frames()
+    assert not roles_df.empty
+    frame = role_sankey_frame(df, roles_df)
+    assert flows(frame, ROLE_COLUMNS) == flows(legacy_roles(df, roles_df), ROLE_COLUMNS)
+    assert frame["Role_Weight"].sum() == len(roles_df)
+
+
+def test_empty_inputs_give_empty_frames():
+    df, roles_df = small_frames()
+    empty = df.iloc[0:0]
+    assert list(membership_sankey_frame(empty).columns) == MEMBERSHIP_COLUMNS
+    assert role_sankey_frame(df, roles_df.iloc[0:0]).empty
+    assert role_sankey_frame(empty, roles_df).empty
+
+
+def detail_flows(df, roles_df, **options):
+    membership = level_of_detail(membership_sankey_frame(df), **options)
+    roles = level_of_detail(role_sankey_frame(df, roles_df), **options)
+    return flows(membership, list(membership.columns)), flows(roles, list(roles.columns))
+
+
+def columnar_frames(tmp_path):
+    """The same hierarchy as the viewer loads it from a parquet snapshot, with categorical names."""
+    df, roles_df = small_frames()
+    path = str(tmp_path / "hierarchy_data.parquet")
+    snapshot.write_snapshot(df, path)
+    loaded = snapshot.load_hierarchy(path)
+    assert isinstance(loaded["groupName"].dtype, pd.CategoricalDtype)
+    return df, roles_df, loaded, snapshot.roles_frame(loaded)
+
+
+@pytest.mark.skipif(not snapshot.columnar_available(), reason="needs pyarrow")
+@pytest.mark.parametrize("options", [
+    dict(top_groups=5, top_users=10),
+    dict(top_groups=5, collapse_users=True),
+    dict(top_groups=25, top_users=50),
+])
+def test_level_of_detail_on_categorical_columns(tmp_path, options):
+    df, roles_df, loaded, loaded_roles = columnar_frames(tmp_path)
+    assert detail_flows(loaded, loaded_roles, **options) == detail_flows(df, roles_df, **options)
+    columnar = snapshot.to_columnar(df)
+    assert detail_flows(columnar, snapshot.roles_frame(columnar), **options) == detail_flows(df, roles_df, **options)
+
+
+@pytest.mark.skipif(not snapshot.columnar_available(), reason="needs pyarrow")
+def test_other_counts_only_groups_left_after_drill_down(tmp_path):
+    _, _, loaded, loaded_roles = columnar_frames(tmp_path)
+    df, _ = drill_down(loaded, loaded_roles, directory="Directory 0")
+    frame = level_of_detail(membership_sankey_frame(df), top_groups=5)
+    shown = df["groupName"].nunique()
+    assert f"Other ({shown - 5})" in set(frame["Intermediate"])
+    assert frame["Intermediate_Weight"].sum() == len(df)
+
+
+@pytest.mark.slow
+def test_100k_rows_match_legacy_flows():
+    """The benchmark's output check at its default size (``pytest -m slow``)."""
+    df, roles_df = frames(100_000)
+    assert flows(membership_sankey_frame(df), MEMBERSHIP_COLUMNS) == flows(legacy_membership(df), MEMBERSHIP_COLUMNS)
+    assert flows(role_sankey_frame(df, roles_df), ROLE_COLUMNS) == flows(reference_roles(df, roles_df), ROLE_COLUMNS)
+    # The original role code scans the hierarchy once per role row
+    sample = roles_df.head(2_000)
+    assert flows(role_sankey_frame(df, sample), ROLE_COLUMNS) == flows(legacy_roles(df, sample), ROLE_COLUMNS)
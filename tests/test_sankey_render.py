@@ -0,0 +1,37 @@
+"""Concurrent renders never leave __main__ pointing at sankey_render."""
+import os
+import sys
+import threading
+import types
+
+import pytest
+
+import sankey_render
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    monkeypatch.setattr(sankey_render, "_executor", None)
+    yield
+    sankey_render._executor.shutdown()
+
+
+def test_concurrent_submits_restore_main(executor, monkeypatch):
+    app = types.ModuleType("__main__")
+    monkeypatch.setitem(sys.modules, "__main__", app)
+    start = threading.Barrier(8)
+    futures = []
+
+    def session():
+        start.wait()
+        for _ in range(5):
+            futures.append(sankey_render._submit(os.getpid))
+
+    threads = [threading.Thread(target=session) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sys.modules["__main__"] is app
+    assert all(f.result(timeout=60) != os.getpid() for f in futures)
+
@@ -0,0 +1,72 @@
+"""Snapshot loading: columnar read plus journal replay, and the derived role mapping."""
+import json
+
+import pandas as pd
+import pytest
+
+import snapshot
+
+
+def row(directory, group, user, notes="", platform=""):
+    return {
+        "directoryId": directory, "directoryName": f"Directory {directory}",
+        "groupId": group, "groupName": f"Group {group}",
+        "userId": user, "userName": f"{user}@example.com", "userEmail": f"{user}@example.com",
+        "notes": notes, "platformRoles": platform,
+    }
+
+
+ROWS = [
+    row("d1", "g1", "u1", "admin, viewer", "org-admin"),
+    row("d1", "g1", "u2", "admin, viewer"),
+    row("d1", "g2", "u1", "", "org-admin"),
+    row("d2", "g3", "u3"),
+]
+
+
+@pytest.mark.parametrize("fmt", snapshot.available_formats())
+def test_load_hierarchy_reads_the_snapshot_and_replays_the_journal(tmp_path, fmt):
+    path = str(tmp_path / snapshot.SNAPSHOT_FORMATS[fmt])
+    snapshot.write_snapshot(ROWS[:3], path)
+    journal_path = snapshot.journal_path_for(path)
+    changed = row("d1", "g2", "u1", "owner", "org-admin")
+    with snapshot.SnapshotJournal(journal_path) as journal:
+        journal.extend([changed, ROWS[3]])
+
+    df = snapshot.load_hierarchy(path)
+    # The journaled row replaces the snapshot's row for the same membership
+    assert df.astype(object).to_dict("records") == ROWS[:2] + [changed, ROWS[3]]
+
+
+def test_load_hierarchy_without_journal_is_the_snapshot(tmp_path):
+    path = str(tmp_path / "hierarchy_data.json")
+    snapshot.write_snapshot(ROWS, path)
+    assert snapshot.load_hierarchy(path).to_dict("records") == ROWS
+    assert snapshot.snapshot_exists(path)
+
+
+def test_journal_only_crawl_is_visible(tmp_path):
+    path = str(tmp_path / "hierarchy_data.json")
+    with snapshot.SnapshotJournal(snapshot.journal_path_for(path)) as journal:
+        journal.extend(ROWS)
+    assert snapshot.snapshot_exists(path)
+    assert snapshot.load_hierarchy(path).to_dict("records") == ROWS
+
+
+def test_roles_frame_matches_roles_from_entries():
+    expected = pd.DataFrame(snapshot.roles_from_entries(ROWS))
+    assert snapshot.roles_frame(pd.DataFrame(ROWS)).equals(expected)
+    columnar = snapshot.roles_frame(snapshot.to_columnar(ROWS))
+    assert columnar.astype(object).to_dict("records") == expected.to_dict("records")
+    assert list(snapshot.roles_frame(pd.DataFrame()).columns) == snapshot.ROLE_COLUMNS
+
+
+def test_rewrite_journal_replaces_its_rows(tmp_path):
+    journal_path = str(tmp_path / "hierarchy_data.jsonl")
+    with snapshot.SnapshotJournal(journal_path) as journal:
+        journal.extend(ROWS)
+    snapshot.rewrite_journal(ROWS[:1], journal_path)
+    assert snapshot.read_journal(journal_path) == ROWS[:1]
+    with open(journal_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(ROWS[1])[:20])  # torn final line
+    assert snapshot.read_journal(journal_path) == ROWS[:1]
@@ -0,0 +1,141 @@
+"""Optional phase spans for the crawl and render path, exported as a Chrome trace.
+
+The crawler, the snapshot writer and the Streamlit viewer wrap their phases
+(directory / user / group listings, per-group roles and members, journal
+flushes, snapshot writes, DataFrame construction, Sankey frames and renders)
+in ``get_tracer().span(name)``. Tracing is off by default and a disabled span
+is a shared no-op context manager, so the hooks cost next to nothing.
+
+``to_chrome_trace()`` returns the Trace Event Format JSON that
+``chrome://tracing`` and https://ui.perfetto.dev open directly (one track per
+thread); ``summary()`` totals each phase for a quick table.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+TRACE_PATH = "crawl_trace.json"
+
+_NOOP = nullcontext()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "category", "args", "start")
+
+    def __init__(self, tracer, name, category, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.record(self.name, self.category, self.start, time.perf_counter_ns(), self.args)
+
+
+class Tracer:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.enabled = False
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.origin = time.perf_counter_ns()
+            self.events = []
+            self.threads = {}  # thread ident -> (tid, name)
+
+    def enable(self, reset=True):
+        if reset:
+            self.reset()
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def span(self, name, category="crawl", **args):
+        """Context manager timing one phase; a no-op while tracing is disabled."""
+        if not self.enabled:
+            return _NOOP
+        return _Span(self, name, category, args)
+
+    def record(self, name, category, start_ns, end_ns, args=None):
+        """Add a span timed by the caller (``time.perf_counter_ns()`` values)."""
+        if not self.enabled:
+            return
+        thread = threading.current_thread()
+        with self.lock:
+            tid = self.threads.get(thread.ident)
+            if tid is None:
+                tid = self.threads[thread.ident] = (len(self.threads) + 1, thread.name)
+            self.events.append((name, category, start_ns, end_ns, tid[0], args))
+
+    def to_chrome_trace(self):
+        pid = os.getpid()
+        with self.lock:
+            events = list(self.events)
+            threads = list(self.threads.values())
+            origin = self.origin
+        trace = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+            for tid, name in threads
+        ]
+        for name, category, start, end, tid, args in events:
+            event = {
+                "name": name, "cat": category, "ph": "X", "pid": pid, "tid": tid,
+                "ts": (start - origin) / 1000, "dur": (end - start) / 1000,
+            }
+            if args:
+                event["args"] = args
+            trace.append(event)
+        return {"traceEvents": trace, "displayTimeUnit": "ms"}
+
+    def write(self, path=TRACE_PATH):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome_trace(), f)
+        os.replace(tmp_path, path)
+        return path
+
+    def summary(self):
+        """Per-phase count and total / mean / max duration, longest total first.
+
+        Spans from worker threads overlap, so a phase's total can exceed the
+        wall time it covered; ``wall_s`` is first start to last end.
+        """
+        phases = {}
+        with self.lock:
+            events = list(self.events)
+        for name, category, start, end, _tid, _args in events:
+            phase = phases.setdefault((category, name), {"count": 0, "total": 0, "max": 0, "first": start, "last": end})
+            duration = end - start
+            phase["count"] += 1
+            phase["total"] += duration
+            phase["max"] = max(phase["max"], duration)
+            phase["first"] = min(phase["first"], start)
+            phase["last"] = max(phase["last"], end)
+        rows = [
+            {
+                "category": category,
+                "phase": name,
+                "count": p["count"],
+                "total_s": round(p["total"] / 1e9, 3),
+                "wall_s": round((p["last"] - p["first"]) / 1e9, 3),
+                "mean_ms": round(p["total"] / p["count"] / 1e6, 2),
+                "max_ms": round(p["max"] / 1e6, 2),
+            }
+            for (category, name), p in phases.items()
+        ]
+        return sorted(rows, key=lambda r: -r["total_s"])
+
+
+_tracer = Tracer()
+
+
+def get_tracer():
+    return _tracer